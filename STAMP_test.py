@@ -40,51 +40,52 @@ class VerifyPostHocTests(unittest.TestCase):
 		from stamp.plugins.multiGroups.postHoc.GamesHowell import GamesHowell
 		gh = GamesHowell(preferences)
 
-		# ground truth found with SPSS v19. Values are not exact since the critical Q value 
-		# are interpolated from tables in the STAMP implementation.
+		# ground truth found with SPSS v19. Confidence intervals differ slightly since SPSS
+		# approximates the quantiles of the studentized range distribution less precisely.
 		pValues, effectSize, lowerCI, upperCI, labels, _ = gh.run([[1,2,3,4,5],[10,20,30,40,50,60],[1,2,3,4,5,6,7]], 0.95, ['1', '2', '3'])
 		self.assertEqual(labels[0], '1 : 2')
 		self.assertAlmostEqual(effectSize[0], -32)
-		self.assertAlmostEqual(lowerCI[0], -56.836534205367272) # SPSS = -56.80902338101632
-		self.assertAlmostEqual(upperCI[0],  -7.163465794632728) # SPSS = -7.190976618983683
-		self.assertEqual(pValues[0] == '< 0.02', True) # SPSS = 0.019165308600281317
+		self.assertAlmostEqual(lowerCI[0], -56.80902245953338) # SPSS = -56.80902338101632
+		self.assertAlmostEqual(upperCI[0],  -7.190977540466623) # SPSS = -7.190976618983683
+		self.assertAlmostEqual(pValues[0], 0.019165308600281317)
 		
 		self.assertEqual(labels[1], '1 : 3')
 		self.assertAlmostEqual(effectSize[1], -1.0)
-		self.assertAlmostEqual(lowerCI[1], -3.9627938823820417) # SPSS = -3.962591041989213
-		self.assertAlmostEqual(upperCI[1],  1.9627938823820417) # SPSS = 1.9625910419892132
-		self.assertEqual(pValues[1] == '>= 0.1', True) # SPSS = 0.6372223228477465
+		self.assertAlmostEqual(lowerCI[1], -3.962591041989213)
+		self.assertAlmostEqual(upperCI[1],  1.9625910419892132)
+		self.assertAlmostEqual(pValues[1], 0.6372223228477465)
 		
 		self.assertEqual(labels[2], '2 : 3')
 		self.assertAlmostEqual(effectSize[2], 31)
-		self.assertAlmostEqual(lowerCI[2], 6.1693311597445302) # SPSS = 6.2047330662731035
-		self.assertAlmostEqual(upperCI[2], 55.83066884025547) # SPSS = 55.79526693372689
-		self.assertEqual(pValues[2] == '< 0.05', True) # SPSS = 0.021640761239221984
+		self.assertAlmostEqual(lowerCI[2], 6.204733969194585) # SPSS = 6.2047330662731035
+		self.assertAlmostEqual(upperCI[2], 55.795266030805415) # SPSS = 55.79526693372689
+		self.assertAlmostEqual(pValues[2], 0.021640761239221984)
 		
 	def testTukeyKramer(self):
 		"""Verify computation of Tukey-Kramer post-hoc test"""
 		from stamp.plugins.multiGroups.postHoc.TukeyKramer import TukeyKramer
 		tk = TukeyKramer(preferences)
 		
-		# ground truth found with the anova1 and multcompare function in MATLAB v7.10.0 and SPSS v19
+		# ground truth found with the anova1 and multcompare function in MATLAB v7.10.0 and SPSS v19.
+		# Confidence intervals differ slightly since MATLAB uses a critical value rounded to 10 digits.
 		pValues, effectSize, lowerCI, upperCI, labels, _ = tk.run([[1,2,3,4,5],[10,20,30,40,50,60],[1,2,3,4,5,6,7]], 0.95, ['1', '2', '3'])
 		self.assertEqual(labels[0], '1 : 2')
 		self.assertAlmostEqual(effectSize[0], -32)
-		self.assertAlmostEqual(lowerCI[0], -49.172140035619407)
-		self.assertAlmostEqual(upperCI[0],  -14.827859964380597)
-		self.assertEqual(pValues[0] == '< 0.001', True) # 5.960611653675896E-4
+		self.assertAlmostEqual(lowerCI[0], -49.17214019407929) # MATLAB = -49.172140035619407
+		self.assertAlmostEqual(upperCI[0],  -14.827859805920713) # MATLAB = -14.827859964380597
+		self.assertAlmostEqual(pValues[0], 5.960611653675896E-4)
 		
 		self.assertEqual(labels[1], '1 : 3')
 		self.assertAlmostEqual(effectSize[1], -1.0)
-		self.assertAlmostEqual(lowerCI[1], -17.605245738594071)
-		self.assertAlmostEqual(upperCI[1],  15.605245738594071)
-		self.assertEqual(pValues[1] == '>= 0.1', True) # 0.9866130284213506
+		self.assertAlmostEqual(lowerCI[1], -17.605245891822808) # MATLAB = -17.605245738594071
+		self.assertAlmostEqual(upperCI[1],  15.605245891822808) # MATLAB = 15.605245738594071
+		self.assertAlmostEqual(pValues[1], 0.9866130284213506)
 		
 		self.assertEqual(labels[2], '2 : 3')
 		self.assertAlmostEqual(effectSize[2], 31)
-		self.assertAlmostEqual(lowerCI[2], 15.222589067602378)
-		self.assertAlmostEqual(upperCI[2], 46.777410932397622)
-		self.assertEqual(pValues[2] == '< 0.001', True) # 3.593658536739097E-4
+		self.assertAlmostEqual(lowerCI[2], 15.22258892201268) # MATLAB = 15.222589067602378
+		self.assertAlmostEqual(upperCI[2], 46.777411077987324) # MATLAB = 46.777410932397622
+		self.assertAlmostEqual(pValues[2], 3.593658536739097E-4)
 
 	def testScheffe(self):
 		"""Verify computation of Scheffe post-hoc test"""
@@ -133,6 +134,33 @@ class VerifyPostHocTests(unittest.TestCase):
 		self.assertAlmostEqual(lowerCI[2], 14.51606322368572)
 		self.assertAlmostEqual(upperCI[2], 47.48393677631428)
 		self.assertAlmostEqual(pValues[2], 5.261333896968458E-4)
+		
+	def testPostHocTestsAll(self):
+		"""Verify post-hoc tests calculated for all features at once"""
+		from stamp.plugins.multiGroups.postHoc.GamesHowell import GamesHowell
+		from stamp.plugins.multiGroups.postHoc.TukeyKramer import TukeyKramer
+		from stamp.plugins.multiGroups.postHoc.Scheffe import Scheffe
+		from stamp.plugins.multiGroups.postHoc.WelchUncorrected import WelchUncorrected
+		from stamp.metagenomics.stats.GroupSummaryStats import GroupSummaryStats, groupMatrix
+		
+		allData = [[[1,2,3,4,5],[10,20,30,40,50,60],[1,2,3,4,5,6,7]], [[2,2,2,2,2],[1,3,5,7,9,11],[4,3,4,3,4,3,4]], [[5,5,5,5,5],[5,5,5,5,5,5],[5,5,5,5,5,5,5]]]
+		groupNames = ['1', '2', '3']
+		values, groupLabels = groupMatrix(allData)
+		groupStats = GroupSummaryStats(values, groupLabels)
+		for postHocTest in [GamesHowell(preferences), TukeyKramer(preferences), Scheffe(preferences), WelchUncorrected(preferences)]:
+			pValues, effectSizes, lowerCIs, upperCIs, labels, notes = postHocTest.runAll(values[[1, 2]], groupLabels, 0.95, groupNames, groupStats.subset([1, 2]))
+			for i, data in enumerate(allData[1:]):
+				results = postHocTest.run(data, 0.95, groupNames)
+				self.assertEqual(results[4], labels)
+				self.assertEqual(results[5], notes[i])
+				for j in xrange(0, len(labels)):
+					if isinstance(results[0][j], str):
+						self.assertEqual(results[0][j], pValues[i][j])
+					else:
+						self.assertAlmostEqual(results[0][j], pValues[i][j])
+					self.assertAlmostEqual(results[1][j], effectSizes[i][j])
+					self.assertAlmostEqual(results[2][j], lowerCIs[i][j])
+					self.assertAlmostEqual(results[3][j], upperCIs[i][j])
 
 class VerifyStatisticalTests(unittest.TestCase): 
 	def testANOVA(self):
@@ -154,6 +182,34 @@ class VerifyStatisticalTests(unittest.TestCase):
 		pValue, _ = anova.hypothesisTest([[1,2,3,4,5],[1,2,3,4,5],[1,2,3,4,5]])
 		self.assertAlmostEqual(pValue, 1.0)
 		
+	def testMultiGroupTestsAll(self):
+		"""Verify ANOVA and eta-squared calculated for all features at once"""
+		from stamp.plugins.multiGroups.statisticalTests.ANOVA import ANOVA
+		from stamp.plugins.multiGroups.effectSizeFilters.EtaSquared import EtaSquared
+		from stamp.metagenomics.stats.GroupSummaryStats import groupMatrix
+		from scipy.stats import f_oneway
+		anova = ANOVA(preferences)
+		etaSquared = EtaSquared(preferences)
+		
+		allData = [[[5,4,6],[5,2,2,5],[1,2]], [[1,2,3],[10,20,30,40],[4,5]], [[3,3,3],[3,3,3,3],[3,3]], [[5,4,5],[6,5,6,5],[700,800]]]
+		values, groupLabels = groupMatrix(allData)
+		pValues, notes = anova.hypothesisTestAll(values, groupLabels)
+		effectSizes = etaSquared.runAll(values, groupLabels)
+		for i in [0, 1, 3]:
+			self.assertAlmostEqual(pValues[i], f_oneway(*allData[i])[1])
+			self.assertEqual(notes[i], '')
+			
+		# ground truth calculated by hand
+		self.assertAlmostEqual(effectSizes[1], 1083.055555556 / 1585.555555556)
+		
+		# feature with no variation
+		self.assertAlmostEqual(pValues[2], 1.0)
+		self.assertAlmostEqual(effectSizes[2], -1)
+		
+		pValue, note = anova.hypothesisTest([[1,2,3],[4],[5,6]])
+		self.assertAlmostEqual(pValue, 1.0)
+		self.assertEqual(note, 'degenerate case: at least one group contains less than 2 samples')
+		
 	def testKruskalWallis(self):
 		"""Verify computation of Kruskal-Wallis H-test"""
 		from stamp.plugins.multiGroups.statisticalTests.KruskalWallis import KruskalWallis
@@ -169,6 +225,19 @@ class VerifyStatisticalTests(unittest.TestCase):
 		pValue, _ = kw.hypothesisTest([[1,2,3,4,5],[1,2,3,4,5],[1,2,3,4,5]])
 		self.assertAlmostEqual(pValue, 1.0)
 		
+		pValue, note = kw.hypothesisTest([[3,3,3,3,3],[3,3,3,3,3],[3,3,3,3,3]])
+		self.assertAlmostEqual(pValue, 1.0)
+		self.assertEqual(note, 'Invalid input data for Kruskal-Wallis H-test.')
+		
+		# features with tied values tested at once give the same results as scipy
+		from stamp.metagenomics.stats.GroupSummaryStats import groupMatrix
+		from scipy.stats import kruskal
+		allData = [[[1,1,2,2,3],[2,3,3,4,4,4],[1,5,5,5,6]], [[0,0,0,1,0],[1,1,0,1,1,1],[2,2,1,2,2]]]
+		values, groupLabels = groupMatrix(allData)
+		pValues, _ = kw.hypothesisTestAll(values, groupLabels)
+		for data, pValue in zip(allData, pValues):
+			self.assertAlmostEqual(pValue, kruskal(*data)[1])
+		
 	def testTTest(self):
 		"""Verify computation of t-test (equal variance assumption) """
 		from stamp.plugins.groups.statisticalTests.Ttest import Ttest
@@ -208,7 +277,30 @@ class VerifyStatisticalTests(unittest.TestCase):
 		self.assertAlmostEqual(lowerCI, -7120.16500998)
 		self.assertAlmostEqual(upperCI, -2779.83499002)
 		self.assertAlmostEqual(effectSize, -4950.0)
-		
+
+	def testGroupTestsAll(self):
+		"""Verify t-tests processing all features at once agree with tests of individual features"""
+		from stamp.plugins.groups.statisticalTests.Ttest import Ttest
+		from stamp.plugins.groups.statisticalTests.Welch import Welch
+
+		# features include degenerate cases
+		seqGroup1 = [[5,4,6,4,3], [2,2,2,2,2], [1,1,1,1,1], [1,2,3,4,5]]
+		seqGroup2 = [[5,2,2,5,6,7], [1,1,1,1,1,1], [1,1,1,1,1,1], [1,2,3,4,5,6]]
+		parentSeqGroup1 = [[10,10,10,10,10], [8,8,8,8,8], [8,8,8,8,8], [10,10,0,10,10]]
+		parentSeqGroup2 = [[10,10,10,10,10,10], [8,8,8,8,8,8], [8,8,8,8,8,8], [10,10,10,10,10,10]]
+		for test in [Ttest(preferences), Welch(preferences)]:
+			results = test.runAll(seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, None, 0.95)
+			for i in xrange(0, len(seqGroup1)):
+				expected = test.run(seqGroup1[i], seqGroup2[i], parentSeqGroup1[i], parentSeqGroup2[i], None, 0.95)
+				for j in xrange(0, 5):
+					self.assertAlmostEqual(results[j][i], expected[j])
+				self.assertEqual(results[5][i], expected[5])
+
+			self.assertAlmostEqual(results[1][1], 0.0)
+			self.assertEqual(results[5][1], 'degenerate case: variance of both groups is zero')
+			self.assertAlmostEqual(results[1][2], 1.0)
+			self.assertEqual(results[5][3], 'degenerate case: parent group had a count of zero')
+
 	def testWhiteTest(self):
 		"""Verify computation of White's non-parametric test"""
 		from stamp.plugins.groups.statisticalTests.White import White
@@ -291,7 +383,22 @@ class VerifyStatisticalTests(unittest.TestCase):
 		oneSided, twoSided, _ = fishers.hypothesisTest(0.0, 0.0, 920852.999591, 953828.994346)
 		self.assertAlmostEqual(oneSided, 1.0)
 		self.assertAlmostEqual(twoSided, 1.0)
-		
+
+	def testFishersAll(self):
+		"""Verify computation of Fisher's exact test over all features"""
+		from stamp.plugins.samples.statisticalTests.Fishers import Fishers
+		fishers = Fishers(preferences)
+
+		# Ground truth obtained from R version 2.10
+		oneSided, twoSided, _ = fishers.hypothesisTestAll([table1[0], table2[0], 0.0], [table1[1], table2[1], 0.0],
+																												[table1[2], table2[2], 920852.999591], [table1[3], table2[3], 953828.994346])
+		self.assertAlmostEqual(oneSided[0], 0.16187126209690825)
+		self.assertAlmostEqual(twoSided[0], 0.2715543327789185)
+		self.assertAlmostEqual(oneSided[1], 2.220446049e-16)
+		self.assertAlmostEqual(twoSided[1], 2.220446049e-16)
+		self.assertAlmostEqual(oneSided[2], 1.0)
+		self.assertAlmostEqual(twoSided[2], 1.0)
+
 	def testGTest(self):
 		"""Verify computation of G-test"""
 		from stamp.plugins.samples.statisticalTests.GTest import GTest
@@ -320,6 +427,47 @@ class VerifyStatisticalTests(unittest.TestCase):
 		self.assertEqual(oneSided, float('inf'))
 		self.assertAlmostEqual(twoSided, 2.220446049e-16)
 		
+	def testSampleTestsAll(self):
+		"""Verify two sample tests processing all features at once agree with tests of individual features"""
+		from stamp.plugins.samples.statisticalTests.ChiSquare import ChiSquare
+		from stamp.plugins.samples.statisticalTests.ChiSquareYates import ChiSquareYates
+		from stamp.plugins.samples.statisticalTests.DiffBetweenProp import DiffBetweenProp
+		from stamp.plugins.samples.statisticalTests.GTest import GTest
+		from stamp.plugins.samples.statisticalTests.GTestYates import GTestYates
+		
+		# tables include degenerate cases
+		tables = [table1, table2, [0, 0, 10, 20], [10, 5, 10, 20]]
+		for test in [ChiSquare(preferences), ChiSquareYates(preferences), DiffBetweenProp(preferences), GTest(preferences), GTestYates(preferences)]:
+			oneSided, twoSided, notes = test.hypothesisTestAll(*zip(*tables))
+			for i, table in enumerate(tables):
+				expectedOneSided, expectedTwoSided, expectedNote = test.hypothesisTest(table[0], table[1], table[2], table[3])
+				self.assertAlmostEqual(oneSided[i], expectedOneSided)
+				self.assertAlmostEqual(twoSided[i], expectedTwoSided)
+				self.assertEqual(notes[i], expectedNote)
+		
+	def testResamplingTestsAll(self):
+		"""Verify bootstrap and permutation tests processing all features at once"""
+		from stamp.plugins.samples.statisticalTests.Bootstrap import Bootstrap
+		from stamp.plugins.samples.statisticalTests.Permutation import Permutation
+		
+		# these tests are based on random sampling and as such p-values are only verified for clear-cut cases
+		tables = [[30, 1, 100, 120], [7, 7, 7, 7], [5, 0, 0, 10], [0, 0, 100, 200], table1]
+		for test in [Bootstrap(preferences), Permutation(preferences)]:
+			oneSided, twoSided, notes = test.hypothesisTestAll(*zip(*tables))
+			
+			# each feature has its own random stream so results do not depend on the other features
+			for i, table in enumerate(tables):
+				self.assertEqual((oneSided[i], twoSided[i], notes[i]), test.hypothesisTest(*table))
+			
+			self.assertAlmostEqual(oneSided[0], 0.0)
+			self.assertAlmostEqual(twoSided[0], 0.0)
+			for i in xrange(1, 4):
+				self.assertAlmostEqual(oneSided[i], 1.0)
+				self.assertAlmostEqual(twoSided[i], 1.0)
+				
+			self.assertEqual(notes[1], '')
+			self.assertEqual(notes[2], 'degenerate case: parent has a count of zero')
+		
 	def testHypergeometric(self):
 		"""Verify computation of Hypergeometric test (Fisher's exact test with p-value doubling approach)"""
 		from stamp.plugins.samples.statisticalTests.Hypergeometric import Hypergeometric
@@ -330,10 +478,52 @@ class VerifyStatisticalTests(unittest.TestCase):
 		self.assertAlmostEqual(oneSided, 0.161871262097)
 		self.assertAlmostEqual(twoSided, 2 * 0.161871262097)
 		
-		oneSided, twoSided, _ = hypergeometric.hypothesisTest(table2[0], table2[1], table2[2], table2[3])	 
+		oneSided, twoSided, _ = hypergeometric.hypothesisTest(table2[0], table2[1], table2[2], table2[3])
 		self.assertAlmostEqual(oneSided, 2.220446049e-16)
 		self.assertAlmostEqual(twoSided, 2.220446049e-16)
+
+		# Ground truth for small p-values obtained using hypergeom.sf() in SciPy version 1.2
+		oneSided, twoSided, notes = hypergeometric.hypothesisTestAll([table1[0], 170, 0], [table1[1], 7, 0], [table1[2], 2616, 10], [table1[3], 645, 20])
+		self.assertAlmostEqual(oneSided[0], 0.161871262097)
+		self.assertAlmostEqual(oneSided[1] / 3.280936989175511e-10, 1.0)
+		self.assertAlmostEqual(twoSided[1] / 3.280936989175511e-10, 2.0)
+		self.assertAlmostEqual(twoSided[2], 1.0)
+		self.assertEqual(notes, ['', '', ''])
+
+	def testBarnard(self):
+		"""Verify computation of Barnard's exact test"""
+		from stamp.plugins.samples.statisticalTests.Barnard import Barnard
+		barnard = Barnard(preferences)
+
+		# Ground truth obtained by enumerating extreme tables and summing their probabilities one at a time
+		oneSided, twoSided, _ = barnard.hypothesisTest(table1[0], table1[1], table1[2], table1[3])
+		self.assertAlmostEqual(oneSided, 0.11409144577786062)
+		self.assertAlmostEqual(twoSided, 0.22459464221027645)
+
+		oneSided, twoSided, _ = barnard.hypothesisTest(1, 9, 12, 11)
+		self.assertAlmostEqual(oneSided, 0.0002496923907551879)
+		self.assertAlmostEqual(twoSided, 0.0004882812500000002)
+
+		oneSided, twoSided, note = barnard.hypothesisTest(0, 0, 10, 20)
+		self.assertAlmostEqual(twoSided, 1.0)
+
+		oneSided, twoSided, note = barnard.hypothesisTest(5, 0, 0, 10)
+		self.assertAlmostEqual(twoSided, 1.0)
+		self.assertEqual(note, 'degenerate case: parent has a count of zero')
+		
+		# p-value is maximized over a coarser grid of the nuisance parameter
+		coarseBarnard = Barnard(dict(preferences, **{'Barnard nuisance steps': 10}))
+		self.assertEqual(coarseBarnard.nuisanceSteps, 10)
+		oneSided, twoSided, _ = coarseBarnard.hypothesisTest(table1[0], table1[1], table1[2], table1[3])
+		self.assertTrue(twoSided <= 0.22459464221027645)
 		
+		# samples with too many tables to enumerate use Fisher's exact test
+		from stamp.plugins.samples.statisticalTests.Fishers import Fishers
+		oneSided, twoSided, note = barnard.hypothesisTest(800, 300, 100000, 120000)
+		fisherOneSided, fisherTwoSided, _ = Fishers(preferences).hypothesisTest(800, 300, 100000, 120000)
+		self.assertEqual((oneSided, twoSided), (fisherOneSided, fisherTwoSided))
+		self.assertEqual(note, 'large sample: Fisher\'s exact test used in place of Barnard\'s')
+
 class VerifyEffectSizeFilters(unittest.TestCase):
 	def testEtaSquared(self):
 		"""Verify computation of eta-squared effect size filter"""
@@ -444,9 +634,10 @@ class VerifyConfidenceIntervalMethods(unittest.TestCase):
 		from stamp.plugins.samples.confidenceIntervalMethods.NewcombeWilson import NewcombeWilson
 		newcombeWilson = NewcombeWilson(preferences)
 		
+		# Ground truth calculated from roots of Wilson score equations found with scipy.optimize.brentq
 		lowerCI, upperCI, effectSize, _ = newcombeWilson.run(table1[0], table1[1], table1[2], table1[3], 0.95)		
-		self.assertAlmostEqual(lowerCI, -7.07911677674112)
-		self.assertAlmostEqual(upperCI, 33.5862638376494)
+		self.assertAlmostEqual(lowerCI, -7.079115140097)
+		self.assertAlmostEqual(upperCI, 33.586263792070)
 		self.assertAlmostEqual(effectSize, 13.333333333)
 				
 		lowerCI, upperCI, effectSize, _ = newcombeWilson.run(table2[0], table2[1], table2[2], table2[3], 0.95)
@@ -454,6 +645,19 @@ class VerifyConfidenceIntervalMethods(unittest.TestCase):
 		self.assertAlmostEqual(upperCI, 0.328541077116921)
 		self.assertAlmostEqual(effectSize, 0.3)
 		
+		# proportions of 1 (and 0) have a Wilson score bound at exactly 1 (and 0)
+		lowerCI, upperCI, effectSize, _ = newcombeWilson.run(146, 3, 146, 3, 0.95)
+		self.assertAlmostEqual(lowerCI, -2.563682208467)
+		self.assertAlmostEqual(upperCI, 56.149703175505)
+		self.assertAlmostEqual(effectSize, 0.0)
+		
+		lowerCIs, upperCIs, effectSizes, _ = newcombeWilson.runAll([10, 10], [0, 10], [10, 10], [10, 10], 0.95)
+		self.assertAlmostEqual(lowerCIs[0], 60.750935043052)
+		self.assertAlmostEqual(upperCIs[0], 100.0)
+		self.assertAlmostEqual(effectSizes[0], 100.0)
+		self.assertAlmostEqual(lowerCIs[1], -27.753279986289)
+		self.assertAlmostEqual(upperCIs[1], 27.753279986289)
+		
 	def testOddsRatio(self):
 		"""Verify computation of Odds ratio CI method"""
 		from stamp.plugins.samples.confidenceIntervalMethods.OddsRatio import OddsRatio
@@ -485,7 +689,26 @@ class VerifyConfidenceIntervalMethods(unittest.TestCase):
 		self.assertAlmostEqual(lowerCI, 1.53505365781)
 		self.assertAlmostEqual(upperCI, 1.6676941467)
 		self.assertAlmostEqual(effectSize, 1.6)
-		
+
+	def testConfIntervMethodsAll(self):
+		"""Verify CI methods processing all features at once agree with CIs of individual features"""
+		from stamp.plugins.samples.confidenceIntervalMethods.DiffBetweenPropAsymptotic import DiffBetweenPropAsymptotic
+		from stamp.plugins.samples.confidenceIntervalMethods.DiffBetweenPropAsymptoticCC import DiffBetweenPropAsymptoticCC
+		from stamp.plugins.samples.confidenceIntervalMethods.OddsRatio import OddsRatio
+		from stamp.plugins.samples.confidenceIntervalMethods.RatioProportions import RatioProportions
+		from stamp.plugins.samples.confidenceIntervalMethods.NewcombeWilson import NewcombeWilson
+
+		# tables include degenerate cases
+		tables = [table1, table2, [0, 5, 0, 20], [10, 0, 10, 20]]
+		for ciMethod in [DiffBetweenPropAsymptotic(preferences), DiffBetweenPropAsymptoticCC(preferences), OddsRatio(preferences), RatioProportions(preferences), NewcombeWilson(preferences)]:
+			lowerCIs, upperCIs, effectSizes, notes = ciMethod.runAll(*(zip(*tables) + [0.95]))
+			for i, table in enumerate(tables):
+				lowerCI, upperCI, effectSize, note = ciMethod.run(table[0], table[1], table[2], table[3], 0.95)
+				self.assertAlmostEqual(lowerCIs[i], lowerCI)
+				self.assertAlmostEqual(upperCIs[i], upperCI)
+				self.assertAlmostEqual(effectSizes[i], effectSize)
+				self.assertEqual(notes[i], note)
+
 class VerifyMultipleComparisonCorrectionMethods(unittest.TestCase):	
 	pValues = [1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1]
 	
@@ -551,7 +774,18 @@ class VerifyMultipleComparisonCorrectionMethods(unittest.TestCase):
 		# This method is based on a bootstrapping approach and as such does not always produce
 		# identical results. It has been tested against the results given by the R plugin by
 		# Alan Dadney and John Storey (http://cran.r-project.org/web/packages/qvalue/)
-		pass
+		from stamp.plugins.common.multipleComparisonCorrections.StoreyFDR import StoreyFDR
+		storeyFDR = StoreyFDR(preferences)
+		
+		# Ground truth for q-values calculated explicitly from the estimated pi0
+		pValues = [0.001, 0.9, 0.02, 0.3, 0.02, 0.75, 0.5, 0.04, 0.6, 0.15, 0.85, 0.45, 0.97, 0.99]
+		qValues = storeyFDR.correct(list(pValues), 0.05)
+		pi0 = storeyFDR.estimated_pi0_hat
+		self.assertTrue(0 < pi0 <= 1)
+		for i in xrange(0, len(pValues)):
+			qValue = min([pi0*len(pValues)*p / len([x for x in pValues if x <= p]) for p in pValues if p >= pValues[i]])
+			self.assertAlmostEqual(qValues[i], qValue)
+		self.assertEqual(storeyFDR.numSignFeatures, len([q for q in qValues if q <= 0.05]))
 		
 class VerifyOther(unittest.TestCase):
 	def testNormalDist(self):
@@ -571,6 +805,356 @@ class VerifyOther(unittest.TestCase):
 		self.assertAlmostEqual(zScore(0.98), 2.3263478740408408)
 		self.assertAlmostEqual(zScore(0.99), 2.5758293035489004)
 		self.assertAlmostEqual(zScore(0.80), 1.2815515655446004)
+		
+	def testStudentizedRange(self):
+		"""Verify computation of studentized range distribution"""
+		from stamp.metagenomics.stats.distributions import StudentizedRange
+		from scipy.stats import t
+		import numpy as np
+		import math
+		
+		# the range of 2 groups is related to the t-distribution
+		for df in [2, 7.3, 50]:
+			self.assertAlmostEqual(StudentizedRange.isf(0.05, 2, df), math.sqrt(2)*t.isf(0.025, df))
+			self.assertAlmostEqual(StudentizedRange.sf(3.0, 2, df), 2*t.sf(3.0 / math.sqrt(2), df))
+			
+		# tabulated critical values (data/tukeyQ_05.txt and data/tukeyQ_01.txt)
+		self.assertAlmostEqual(StudentizedRange.isf(0.05, 3, 10), 3.876776749, 6)
+		self.assertAlmostEqual(StudentizedRange.isf(0.01, 5, 20), 5.293252512, 6)
+		
+		self.assertAlmostEqual(StudentizedRange.isf(0.05, 3, float('inf')), 3.314, 3)
+		
+		# interpolated critical values agree with those solved for directly
+		dfs = [0.5, 1, 1.7, 5, 12.5, 40, 333.3]
+		cvs = StudentizedRange.isf(0.05, 4, dfs)
+		pValues = StudentizedRange.sf(cvs, 4, dfs)
+		for df, cv, pValue in zip(dfs, cvs, pValues):
+			self.assertAlmostEqual(cv, StudentizedRange.solveQuantiles(0.05, 4, np.array([df]))[0], 6)
+			self.assertAlmostEqual(pValue, 0.05)
+		
+	def testParallelStats(self):
+		"""Verify results of chunks processed in parallel are returned in order"""
+		from stamp.metagenomics.stats.ParallelStats import picklablePreferences, featureChunks, runParallel
+		import math
+		
+		workerPreferences = picklablePreferences(dict(preferences, unpicklable = lambda x: x))
+		self.assertTrue('unpicklable' not in workerPreferences)
+		self.assertEqual(workerPreferences['Replicates'], preferences['Replicates'])
+		
+		chunks = featureChunks(100, 3)
+		self.assertEqual([i for start, end in chunks for i in xrange(start, end)], range(0, 100))
+		
+		chunkResults = runParallel(math.pow, [(2, start) for start, end in chunks], [end - start for start, end in chunks], 3, 1)
+		self.assertEqual(chunkResults, [math.pow(2, start) for start, end in chunks])
+		
+	def testUniqueKeys(self):
+		"""Verify features with identical tables are grouped in order of first occurrence"""
+		from stamp.metagenomics.stats.RandomStreams import uniqueKeys
+		
+		firstPositions, keyIndices = uniqueKeys([(1, 2), (3, 4), (1, 2), (5, 6), (3, 4)])
+		self.assertEqual(firstPositions, [0, 1, 3])
+		self.assertEqual(list(keyIndices), [0, 1, 0, 2, 1])
+		
+	def testSequentialStopping(self):
+		"""Verify Monte Carlo tail counts with sequential stopping"""
+		from stamp.metagenomics.stats.MonteCarlo import tailCounts, INITIAL_REPLICATES
+		import numpy
+		
+		# every replicate of feature 0 is in the tail, no replicate of feature 1 is, and 
+		# every 25th replicate of feature 2 is (p-value of 0.04)
+		def countReplicates(indices, start, end):
+			inTail = [end - start, 0, len(range(start + (-start % 25), end, 25))]
+			return [numpy.array([inTail[i] for i in indices])]
+			
+		counts, replicatesUsed = tailCounts(3, 1, 1000, countReplicates, bAdaptive = False)
+		self.assertEqual(list(counts[0]), [1000, 0, 40])
+		self.assertEqual(list(replicatesUsed), [1000, 1000, 1000])
+		
+		# features which may be significant are given the full number of replicates
+		counts, replicatesUsed = tailCounts(3, 1, 1000, countReplicates, bAdaptive = True, alpha = 0.05, maxBlockSize = 1)
+		self.assertEqual(list(counts[0]), [INITIAL_REPLICATES, 0, 40])
+		self.assertEqual(list(replicatesUsed), [INITIAL_REPLICATES, 1000, 1000])
+		
+		# feature 2 is confidently above a significance level of 0.01
+		counts, replicatesUsed = tailCounts(3, 1, 1000, countReplicates, bAdaptive = True, alpha = 0.01, maxBlockSize = 1)
+		self.assertTrue(replicatesUsed[2] < 1000)
+		
+	def testBootstrapDiffOfMeanPropAll(self):
+		"""Verify batch bootstrap confidence intervals agree with those of individual features"""
+		from stamp.metagenomics.Bootstrap import bootstrapDiffOfMeanProp, bootstrapDiffOfMeanPropAll
+		import numpy
+		
+		group1 = [[0.1, 0.2, 0.15, 0.3], [0.5, 0.4, 0.45, 0.6], [0.0, 0.01, 0.0, 0.02]]
+		group2 = [[0.2, 0.25, 0.3], [0.5, 0.55, 0.35], [0.01, 0.0, 0.03]]
+		
+		# features are processed in several chunks which share the same bootstrap replicates
+		numpy.random.seed(1)
+		lowerCIs, upperCIs = bootstrapDiffOfMeanPropAll(group1, group2, 0.95, replicates = 500, maxBlockSize = 1000)
+		for i in xrange(0, len(group1)):
+			numpy.random.seed(1)
+			lowerCI, upperCI = bootstrapDiffOfMeanProp(group1[i], group2[i], 0.95, replicates = 500)
+			self.assertAlmostEqual(lowerCIs[i], lowerCI)
+			self.assertAlmostEqual(upperCIs[i], upperCI)
+			self.assertTrue(lowerCIs[i] <= upperCIs[i])
+
+	def testStampIO(self):
+		"""Verify profiles are read in blocks of rows and parse errors are reported"""
+		from stamp.metagenomics.fileIO.StampIO import StampIO
+		import numpy as np
+		import tempfile
+		import os
+		
+		# count matrix must grow several times to hold all leaves
+		stampIO = StampIO(preferences)
+		stampIO.CHUNK_SIZE = 2
+		profileTree, errMsg = stampIO.read('test_case.spf')
+		self.assertEqual(errMsg, None)
+		self.assertEqual(profileTree.countMatrix.shape, (7, 6))
+		self.assertEqual(profileTree.countMatrix.base, None)
+		self.assertEqual(profileTree.numSeqInSample, [51, 47, 44, 32, 34, 50])
+		
+		# block which can not be parsed even though each of its lines can
+		errMsg = stampIO.addCountBlock(np.zeros((2, 2)), [2, 3], [0, 1], ['1', '2', '3'], False)
+		self.assertEqual(errMsg, 'Failed to correctly parse lines: 2-3')
+		
+		# only data line has too many columns
+		fd, profileFile = tempfile.mkstemp(suffix = '.spf')
+		try:
+			os.write(fd, 'L1\tL2\tS1\tS2\nA\ta\t1\t2\t7\n')
+			os.close(fd)
+			profileTree, errMsg = StampIO(preferences).read(profileFile)
+			self.assertEqual(profileTree, None)
+			self.assertEqual(errMsg, 'Failed to correctly parse line: 2')
+		finally:
+			os.remove(profileFile)
+			
+	def testProfileCache(self):
+		"""Verify cached profiles are reloaded and invalidated when the profile file changes"""
+		from stamp.metagenomics.fileIO.StampIO import StampIO
+		from stamp.metagenomics.fileIO.ProfileCache import ProfileCache
+		import tempfile
+		import shutil
+		import os
+		
+		cacheDir = tempfile.mkdtemp()
+		try:
+			profileFile = os.path.join(cacheDir, 'profile.spf')
+			shutil.copyfile('test_case.spf', profileFile)
+			os.utime(profileFile, (1000000000, 1000000000))
+			profileTree, errMsg = StampIO(preferences).read(profileFile)
+			self.assertEqual(errMsg, None)
+			
+			profileCache = ProfileCache(os.path.join(cacheDir, 'cache'))
+			signature = profileCache.signature(profileFile)
+			self.assertEqual(profileCache.load(profileFile, signature), None)
+			profileCache.save(profileFile, signature, profileTree)
+			
+			cachedTree = profileCache.load(profileFile, signature)
+			self.assertEqual(cachedTree.hierarchyHeadings, profileTree.hierarchyHeadings)
+			self.assertEqual(cachedTree.sampleNames, profileTree.sampleNames)
+			self.assertEqual(cachedTree.numSeqInSample, profileTree.numSeqInSample)
+			self.assertEqual(cachedTree.countMatrix.tolist(), profileTree.countMatrix.tolist())
+			profile = cachedTree.createSampleProfile('S13', 'S18', 'Entire sample', 'Level_2', 'Retain unclassified reads')
+			self.assertEqual(profile.getTableData('p__Proteobacteria'), [20, 13, 51, 47])
+			self.assertEqual(profile.getHierarchy('p__Proteobacteria'), ['k__Bacteria', 'p__Proteobacteria'])
+			
+			# entries are invalidated by a change in size, modification time, or content
+			size, mtime, contentHash = signature
+			self.assertEqual(profileCache.load(profileFile, (size+1, mtime, contentHash)), None)
+			self.assertEqual(profileCache.load(profileFile, (size, mtime+1, contentHash)), None)
+			self.assertEqual(profileCache.load(profileFile, (size, mtime, '0'*40)), None)
+			
+			# content changed without changing the size or modification time
+			data = open(profileFile, 'rb').read()
+			fout = open(profileFile, 'wb')
+			fout.write(data.replace('S13', 'S14'))
+			fout.close()
+			os.utime(profileFile, (1000000000, 1000000000))
+			newSignature = profileCache.signature(profileFile)
+			self.assertEqual(newSignature[0:2], signature[0:2])
+			self.assertEqual(profileCache.load(profileFile, newSignature), None)
+			
+			# corrupt entries are treated as missing
+			treeFile, countFile = profileCache.entryFiles(profileFile)
+			fout = open(treeFile, 'wb')
+			fout.write('corrupt')
+			fout.close()
+			self.assertEqual(profileCache.load(profileFile, signature), None)
+			
+			profileCache.clear()
+			self.assertFalse(os.path.exists(countFile))
+		finally:
+			shutil.rmtree(cacheDir)
+			
+	def testProfileTree(self):
+		"""Verify sample, group and multiple group profiles aggregate counts across hierarchical levels"""
+		from stamp.metagenomics.fileIO.StampIO import StampIO
+		from stamp.metagenomics.fileIO.MetadataIO import MetadataIO
+		import tempfile
+		import os
+		
+		profileTree, errMsg = StampIO(preferences).read('test_case.spf')
+		self.assertEqual(errMsg, None)
+		
+		fd, metadataFile = tempfile.mkstemp(suffix = '.tsv')
+		try:
+			os.write(fd, 'Sample\tGroup\nS13\tA\nS18\tA\nS6\tA\nS17\tB\nS16\tB\nS33\tC\n')
+			os.close(fd)
+			metadata, warningMsg = MetadataIO(preferences).read(metadataFile, profileTree)
+			self.assertEqual(warningMsg, None)
+		finally:
+			os.remove(metadataFile)
+		metadata.setActiveField('Group', profileTree)
+		
+		# sample profiles
+		profile = profileTree.createSampleProfile('S13', 'S18', 'Entire sample', 'Level_2', 'Retain unclassified reads')
+		self.assertEqual(profile.getNumFeatures(), 5)
+		self.assertEqual(profile.getNumParentCategories(), 1)
+		self.assertEqual(profile.getTableData('p__Proteobacteria'), [20, 13, 51, 47])
+		self.assertEqual(profile.getTableData('p__WS6'), [10, 6, 51, 47])
+		self.assertEqual(profile.getHierarchy('p__Proteobacteria'), ['k__Bacteria', 'p__Proteobacteria'])
+		
+		profile = profileTree.createSampleProfile('S13', 'S18', 'Level_2', 'Level_3', 'Retain unclassified reads')
+		self.assertEqual(profile.getNumFeatures(), 7)
+		self.assertEqual(profile.getNumParentCategories(), 5)
+		self.assertEqual(profile.getTableData('c__Alphaproteobacteria'), [5, 8, 20, 13])
+		self.assertEqual(profile.getTableData('c__ZB2'), [9, 9, 9, 9])
+		self.assertEqual(profile.getHierarchy('c__ZB2'), ['k__Bacteria', 'p__OD1', 'c__ZB2'])
+		
+		# group profiles
+		groupProfile = profileTree.createGroupProfile('A', 'B', 'Entire sample', 'Level_2', metadata, 'Retain unclassified reads')
+		self.assertEqual(groupProfile.samplesInGroup1, ['S13', 'S18', 'S6'])
+		self.assertEqual(groupProfile.samplesInGroup2, ['S16', 'S17'])
+		self.assertEqual(groupProfile.getFeatureCounts('p__Proteobacteria'), ([20, 13, 13], [13, 14]))
+		self.assertEqual(groupProfile.getParentFeatureCounts('p__Proteobacteria'), ([51, 47, 44], [34, 32]))
+		
+		groupProfile = profileTree.createGroupProfile('A', '<All other samples>', 'Level_1', 'Level_3', metadata, 'Retain unclassified reads')
+		self.assertEqual(groupProfile.samplesInGroup2, ['S16', 'S17', 'S33'])
+		self.assertEqual(groupProfile.getFeatureCounts('c__Deltaproteobacteria'), ([8, 3, 3], [5, 8, 10]))
+		self.assertEqual(groupProfile.getParentFeatureCounts('c__Deltaproteobacteria'), ([51, 47, 44], [34, 32, 50]))
+		
+		# multiple group profiles
+		multiGroupProfile = profileTree.createMultiGroupProfile(['C', 'A', 'B'], 'Level_2', 'Level_3', metadata, 'Retain unclassified reads')
+		self.assertEqual(multiGroupProfile.groupNames, ['A', 'B', 'C'])
+		self.assertEqual(multiGroupProfile.smallestGroup, 1)
+		self.assertEqual(multiGroupProfile.getFeatureCounts('c__Betaproteobacteria'), [[7, 2, 9], [7, 2], [6]])
+		self.assertEqual(multiGroupProfile.getParentCounts('c__Betaproteobacteria'), [[20, 13, 13], [13, 14], [25]])
+		
+	def testProfileTreeUnclassified(self):
+		"""Verify treatment of unclassified reads and truncation of ' - #' feature names"""
+		from stamp.metagenomics.fileIO.StampIO import StampIO
+		from stamp.metagenomics.fileIO.MetadataIO import MetadataIO
+		import tempfile
+		import os
+		
+		fd, profileFile = tempfile.mkstemp(suffix = '.spf')
+		fdMetadata, metadataFile = tempfile.mkstemp(suffix = '.tsv')
+		try:
+			os.write(fd, 'Level_1\tLevel_2\tLevel_3\tS1\tS2\n'
+								+ 'k__A\tp__X\tc__Z - #1\t1\t2\n'
+								+ 'k__A\tp__X\tc__W\t3\t4\n'
+								+ 'k__A\tunclassified\tunclassified\t5\t6\n'
+								+ 'k__B\tp__Y\tc__Z - #2\t7\t8\n'
+								+ 'k__B\tp__Y\tunclassified\t9\t10\n')
+			os.close(fd)
+			os.write(fdMetadata, 'Sample\tGroup\nS1\tA\nS2\tB\n')
+			os.close(fdMetadata)
+			
+			profileTree, errMsg = StampIO(preferences).read(profileFile)
+			self.assertEqual(errMsg, None)
+			metadata, warningMsg = MetadataIO(preferences).read(metadataFile, profileTree)
+			self.assertEqual(warningMsg, None)
+		finally:
+			os.remove(profileFile)
+			os.remove(metadataFile)
+		metadata.setActiveField('Group', profileTree)
+		
+		# features relative to the entire sample drop ' - #' and ignore later duplicates
+		profile = profileTree.createSampleProfile('S1', 'S2', 'Entire sample', 'Level_3', 'Retain unclassified reads')
+		self.assertEqual(sorted(profile.getFeatures()), ['Unclassified k__A', 'Unclassified p__Y', 'c__W', 'c__Z'])
+		self.assertEqual(profile.getTableData('c__Z'), [1, 2, 18, 22])
+		self.assertEqual(profile.getTableData('Unclassified p__Y'), [9, 10, 18, 22])
+		self.assertEqual(profile.getHierarchy('c__Z'), ['k__A', 'p__X', 'c__Z - #1'])
+		
+		profile = profileTree.createSampleProfile('S1', 'S2', 'Entire sample', 'Level_3', 'Use only for calculating frequency profiles')
+		self.assertEqual(sorted(profile.getFeatures()), ['c__W', 'c__Z'])
+		self.assertEqual(profile.getTableData('c__W'), [3, 4, 18, 22])
+		
+		profile = profileTree.createSampleProfile('S1', 'S2', 'Entire sample', 'Level_3', 'Remove unclassified reads')
+		self.assertEqual(sorted(profile.getFeatures()), ['c__W', 'c__Z'])
+		self.assertEqual(profile.getTableData('c__W'), [3, 4, 4, 6])
+		
+		# names are only truncated relative to the entire sample
+		profile = profileTree.createSampleProfile('S1', 'S2', 'Level_2', 'Level_3', 'Retain unclassified reads')
+		self.assertEqual(profile.getNumFeatures(), 5)
+		self.assertEqual(profile.getNumParentCategories(), 3)
+		self.assertEqual(profile.getTableData('c__Z - #1'), [1, 2, 4, 6])
+		self.assertEqual(profile.getTableData('c__Z - #2'), [7, 8, 16, 18])
+		self.assertEqual(profile.getTableData('Unclassified k__A'), [5, 6, 5, 6])
+		
+		profile = profileTree.createSampleProfile('S1', 'S2', 'Level_2', 'Level_3', 'Remove unclassified reads')
+		self.assertEqual(profile.getNumFeatures(), 3)
+		self.assertEqual(profile.getNumParentCategories(), 2)
+		self.assertEqual(profile.getTableData('c__Z - #2'), [7, 8, 7, 8])
+		
+		profile = profileTree.createSampleProfile('S1', 'S2', 'Entire sample', 'Level_2', 'Remove unclassified reads')
+		self.assertEqual(sorted(profile.getFeatures()), ['p__X', 'p__Y'])
+		self.assertEqual(profile.getTableData('p__Y'), [16, 18, 20, 24])
+		
+		# all profile types name features the same way
+		groupProfile = profileTree.createGroupProfile('A', 'B', 'Entire sample', 'Level_3', metadata, 'Use only for calculating frequency profiles')
+		self.assertEqual(sorted(groupProfile.getFeatures()), ['c__W', 'c__Z'])
+		self.assertEqual(groupProfile.getFeatureCounts('c__Z'), ([1], [2]))
+		self.assertEqual(groupProfile.getParentFeatureCounts('c__Z'), ([18], [22]))
+		
+		multiGroupProfile = profileTree.createMultiGroupProfile(['A', 'B'], 'Entire sample', 'Level_3', metadata, 'Use only for calculating frequency profiles')
+		self.assertEqual(sorted(multiGroupProfile.getFeatures()), ['c__W', 'c__Z'])
+		self.assertEqual(multiGroupProfile.getFeatureCounts('c__Z'), [[1], [2]])
+		self.assertEqual(multiGroupProfile.getParentCounts('c__Z'), [[18], [22]])
+			
+	def testStatisticsCache(self):
+		"""Verify least recently used statistics are evicted and saved statistics can be reloaded"""
+		from stamp.metagenomics.stats.StatisticsCache import StatisticsCache
+		import tempfile
+		import shutil
+		import os
+
+		cacheDir = tempfile.mkdtemp()
+		try:
+			cacheFile = os.path.join(cacheDir, 'statistics.pkl')
+			cache = StatisticsCache(cacheFile, maxEntries = 2)
+			cache.put((1, 2, 3, 4), (0.1, 0.2, -1.0, 1.0, 0.0, ''))
+			cache.put((0, 0, 3, 4), (1.0, 1.0, -1.0, 1.0, 0.0, ''))
+			cache.get((1, 2, 3, 4))
+			cache.put((5, 6, 7, 8), (0.5, 0.6, -1.0, 1.0, 0.0, ''))
+			self.assertEqual(len(cache), 2)
+			self.assertEqual(cache.get((0, 0, 3, 4)), None)
+			self.assertEqual(cache.get((1, 2, 3, 4)), (0.1, 0.2, -1.0, 1.0, 0.0, ''))
+			cache.save()
+
+			cache = StatisticsCache(cacheFile, maxEntries = 2)
+			cache.load()
+			self.assertEqual(cache.get((5, 6, 7, 8)), (0.5, 0.6, -1.0, 1.0, 0.0, ''))
+			
+			# statistics saved by an earlier version are discarded
+			import stamp.metagenomics.stats.StatisticsCache as StatisticsCacheModule
+			StatisticsCacheModule.CACHE_VERSION -= 1
+			try:
+				cache.bModified = True
+				cache.save()
+			finally:
+				StatisticsCacheModule.CACHE_VERSION += 1
+			cache = StatisticsCache(cacheFile, maxEntries = 2)
+			cache.load()
+			self.assertEqual(len(cache), 0)
+			self.assertFalse(os.path.exists(cacheFile))
+			cache.put((5, 6, 7, 8), (0.5, 0.6, -1.0, 1.0, 0.0, ''))
+
+			cache.clear()
+			self.assertEqual(len(cache), 0)
+			self.assertFalse(os.path.exists(cacheFile))
+		finally:
+			shutil.rmtree(cacheDir)
 
 if __name__ == "__main__":
 	unittest.main()
\ No newline at end of file
@@ -27,7 +27,13 @@ create an executable with all required dependencies.
 '''
 
 import stamp.metagenomics.stats.distributions.NormalDist
-import stamp.metagenomics.stats.distributions.QTable
+import stamp.metagenomics.stats.distributions.HypergeometricDist
+import stamp.metagenomics.stats.distributions.StudentizedRange
+import stamp.metagenomics.stats.MonteCarlo
+import stamp.metagenomics.stats.ParallelStats
+import stamp.metagenomics.stats.RandomStreams
+import stamp.metagenomics.stats.StatisticsCache
+import stamp.metagenomics.stats.GroupSummaryStats
 import stamp.metagenomics.stats.CI.WilsonCI
 import stamp.metagenomics.PCA
 import stamp.metagenomics.Bootstrap
@@ -24,6 +24,9 @@
 from PyQt4 import QtGui, QtCore
 from preferencesUI import Ui_preferencesDlg
 
+from stamp.metagenomics.fileIO.ProfileCache import ProfileCache
+from stamp.metagenomics.stats.SampleStatsTests import statisticsCache
+
 import math
 
 class PreferencesDlg(QtGui.QDialog):
@@ -43,6 +46,7 @@ class PreferencesDlg(QtGui.QDialog):
 		self.connect(self.ui.btnOK, QtCore.SIGNAL("clicked()"), self.accept)
 		self.connect(self.ui.btnAxesColour, QtCore.SIGNAL("clicked()"), self.setAxesColour)
 		self.connect(self.ui.btnAllOtherSamplesColour, QtCore.SIGNAL("clicked()"), self.setAllOtherSamplesColour)
+		self.connect(self.ui.btnClearProfileCache, QtCore.SIGNAL("clicked()"), self.clearProfileCache)
 		
 	def centerWindow(self):
 		screen = QtGui.QDesktopWidget().screenGeometry()
@@ -84,6 +88,11 @@ class PreferencesDlg(QtGui.QDialog):
 			colourStr = str(colour.red()) + ',' + str(colour.green()) + ',' + str(colour.blue())
 			self.ui.btnAllOtherSamplesColour.setStyleSheet('* { background-color: rgb(' + colourStr + ') }')
 		
+	def clearProfileCache(self):
+		ProfileCache().clear()
+		statisticsCache.clear()
+		QtGui.QMessageBox.information(self, 'Cache', 'Cached profiles and statistical results have been removed.')
+		
 	def setMinimumReportedPValue(self, exponent):
 		self.ui.spinMinPvalue.setValue(-exponent)
 		
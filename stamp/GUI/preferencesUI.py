@@ -17,7 +17,7 @@ except AttributeError:
 class Ui_preferencesDlg(object):
     def setupUi(self, preferencesDlg):
         preferencesDlg.setObjectName(_fromUtf8("preferencesDlg"))
-        preferencesDlg.resize(281, 284)
+        preferencesDlg.resize(281, 440)
         icon = QtGui.QIcon()
         icon.addPixmap(QtGui.QPixmap(_fromUtf8(":/icons/icons/pref.png")), QtGui.QIcon.Normal, QtGui.QIcon.Off)
         preferencesDlg.setWindowIcon(icon)
@@ -50,7 +50,38 @@ class Ui_preferencesDlg(object):
         self.spinReplicates.setProperty(_fromUtf8("value"), 1000)
         self.spinReplicates.setObjectName(_fromUtf8("spinReplicates"))
         self.formLayout.setWidget(1, QtGui.QFormLayout.FieldRole, self.spinReplicates)
+        self.label_6 = QtGui.QLabel(self.groupBox)
+        self.label_6.setObjectName(_fromUtf8("label_6"))
+        self.formLayout.setWidget(2, QtGui.QFormLayout.LabelRole, self.label_6)
+        self.spinWorkerProcesses = QtGui.QSpinBox(self.groupBox)
+        self.spinWorkerProcesses.setMinimum(1)
+        self.spinWorkerProcesses.setMaximum(256)
+        self.spinWorkerProcesses.setProperty(_fromUtf8("value"), 1)
+        self.spinWorkerProcesses.setObjectName(_fromUtf8("spinWorkerProcesses"))
+        self.formLayout.setWidget(2, QtGui.QFormLayout.FieldRole, self.spinWorkerProcesses)
+        self.label_7 = QtGui.QLabel(self.groupBox)
+        self.label_7.setObjectName(_fromUtf8("label_7"))
+        self.formLayout.setWidget(3, QtGui.QFormLayout.LabelRole, self.label_7)
+        self.spinRandomSeed = QtGui.QSpinBox(self.groupBox)
+        self.spinRandomSeed.setMinimum(0)
+        self.spinRandomSeed.setMaximum(2147483647)
+        self.spinRandomSeed.setProperty(_fromUtf8("value"), 1)
+        self.spinRandomSeed.setObjectName(_fromUtf8("spinRandomSeed"))
+        self.formLayout.setWidget(3, QtGui.QFormLayout.FieldRole, self.spinRandomSeed)
+        self.label_8 = QtGui.QLabel(self.groupBox)
+        self.label_8.setObjectName(_fromUtf8("label_8"))
+        self.formLayout.setWidget(4, QtGui.QFormLayout.LabelRole, self.label_8)
+        self.spinBarnardNuisanceSteps = QtGui.QSpinBox(self.groupBox)
+        self.spinBarnardNuisanceSteps.setMinimum(10)
+        self.spinBarnardNuisanceSteps.setMaximum(10000)
+        self.spinBarnardNuisanceSteps.setSingleStep(10)
+        self.spinBarnardNuisanceSteps.setProperty(_fromUtf8("value"), 100)
+        self.spinBarnardNuisanceSteps.setObjectName(_fromUtf8("spinBarnardNuisanceSteps"))
+        self.formLayout.setWidget(4, QtGui.QFormLayout.FieldRole, self.spinBarnardNuisanceSteps)
         self.verticalLayout_2.addLayout(self.formLayout)
+        self.chkAdaptiveReplicates = QtGui.QCheckBox(self.groupBox)
+        self.chkAdaptiveReplicates.setObjectName(_fromUtf8("chkAdaptiveReplicates"))
+        self.verticalLayout_2.addWidget(self.chkAdaptiveReplicates)
         self.verticalLayout.addWidget(self.groupBox)
         self.groupBox_2 = QtGui.QGroupBox(preferencesDlg)
         self.groupBox_2.setObjectName(_fromUtf8("groupBox_2"))
@@ -118,10 +149,27 @@ class Ui_preferencesDlg(object):
         self.formLayout_2.setWidget(2, QtGui.QFormLayout.FieldRole, self.spinMinPvalue)
         self.verticalLayout_3.addLayout(self.formLayout_2)
         self.verticalLayout.addWidget(self.groupBox_2)
+        self.groupBox_3 = QtGui.QGroupBox(preferencesDlg)
+        self.groupBox_3.setObjectName(_fromUtf8("groupBox_3"))
+        self.horizontalLayout_3 = QtGui.QHBoxLayout(self.groupBox_3)
+        self.horizontalLayout_3.setObjectName(_fromUtf8("horizontalLayout_3"))
+        self.chkCacheProfiles = QtGui.QCheckBox(self.groupBox_3)
+        self.chkCacheProfiles.setObjectName(_fromUtf8("chkCacheProfiles"))
+        self.horizontalLayout_3.addWidget(self.chkCacheProfiles)
+        self.chkCacheStatistics = QtGui.QCheckBox(self.groupBox_3)
+        self.chkCacheStatistics.setObjectName(_fromUtf8("chkCacheStatistics"))
+        self.horizontalLayout_3.addWidget(self.chkCacheStatistics)
+        spacerItem = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
+        self.horizontalLayout_3.addItem(spacerItem)
+        self.btnClearProfileCache = QtGui.QPushButton(self.groupBox_3)
+        self.btnClearProfileCache.setAutoDefault(False)
+        self.btnClearProfileCache.setObjectName(_fromUtf8("btnClearProfileCache"))
+        self.horizontalLayout_3.addWidget(self.btnClearProfileCache)
+        self.verticalLayout.addWidget(self.groupBox_3)
         self.horizontalLayout_2 = QtGui.QHBoxLayout()
         self.horizontalLayout_2.setObjectName(_fromUtf8("horizontalLayout_2"))
-        spacerItem = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
-        self.horizontalLayout_2.addItem(spacerItem)
+        spacerItem1 = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
+        self.horizontalLayout_2.addItem(spacerItem1)
         self.btnOK = QtGui.QPushButton(preferencesDlg)
         self.btnOK.setObjectName(_fromUtf8("btnOK"))
         self.horizontalLayout_2.addWidget(self.btnOK)
@@ -135,12 +183,25 @@ class Ui_preferencesDlg(object):
         self.groupBox.setTitle(QtGui.QApplication.translate("preferencesDlg", "Statistical tests", None, QtGui.QApplication.UnicodeUTF8))
         self.label.setText(QtGui.QApplication.translate("preferencesDlg", "Pseudocount for unobserved data:", None, QtGui.QApplication.UnicodeUTF8))
         self.label_4.setText(QtGui.QApplication.translate("preferencesDlg", "Bootstrap/permutation test replicates", None, QtGui.QApplication.UnicodeUTF8))
+        self.label_6.setText(QtGui.QApplication.translate("preferencesDlg", "Worker processes:", None, QtGui.QApplication.UnicodeUTF8))
+        self.spinWorkerProcesses.setToolTip(QtGui.QApplication.translate("preferencesDlg", "Number of processes used to calculate statistics for features in parallel", None, QtGui.QApplication.UnicodeUTF8))
+        self.label_7.setText(QtGui.QApplication.translate("preferencesDlg", "Random seed:", None, QtGui.QApplication.UnicodeUTF8))
+        self.spinRandomSeed.setToolTip(QtGui.QApplication.translate("preferencesDlg", "Seed used by bootstrap and permutation tests so results can be reproduced", None, QtGui.QApplication.UnicodeUTF8))
+        self.label_8.setText(QtGui.QApplication.translate("preferencesDlg", "Barnard\'s test nuisance steps:", None, QtGui.QApplication.UnicodeUTF8))
+        self.spinBarnardNuisanceSteps.setToolTip(QtGui.QApplication.translate("preferencesDlg", "Number of values in (0, 0.5] of the common proportion over which Barnard\'s exact test maximizes the p-value", None, QtGui.QApplication.UnicodeUTF8))
+        self.chkAdaptiveReplicates.setToolTip(QtGui.QApplication.translate("preferencesDlg", "Stop drawing replicates for a feature once its p-value is clearly not significant", None, QtGui.QApplication.UnicodeUTF8))
+        self.chkAdaptiveReplicates.setText(QtGui.QApplication.translate("preferencesDlg", "Stop early for non-significant features", None, QtGui.QApplication.UnicodeUTF8))
         self.groupBox_2.setTitle(QtGui.QApplication.translate("preferencesDlg", "Plots", None, QtGui.QApplication.UnicodeUTF8))
         self.chkTruncateFeatureNames.setText(QtGui.QApplication.translate("preferencesDlg", "Truncate feature names to length:", None, QtGui.QApplication.UnicodeUTF8))
         self.label_3.setText(QtGui.QApplication.translate("preferencesDlg", "Axis colour:", None, QtGui.QApplication.UnicodeUTF8))
         self.label_5.setText(QtGui.QApplication.translate("preferencesDlg", "All other samples colour:", None, QtGui.QApplication.UnicodeUTF8))
         self.label_2.setText(QtGui.QApplication.translate("preferencesDlg", "Minimum reported p-value, 10^x, x =", None, QtGui.QApplication.UnicodeUTF8))
         self.spinMinPvalue.setPrefix(QtGui.QApplication.translate("preferencesDlg", "-", None, QtGui.QApplication.UnicodeUTF8))
+        self.groupBox_3.setTitle(QtGui.QApplication.translate("preferencesDlg", "Caching", None, QtGui.QApplication.UnicodeUTF8))
+        self.chkCacheProfiles.setText(QtGui.QApplication.translate("preferencesDlg", "Cache parsed profiles", None, QtGui.QApplication.UnicodeUTF8))
+        self.chkCacheStatistics.setToolTip(QtGui.QApplication.translate("preferencesDlg", "Save statistics calculated for features so they are reused in later sessions", None, QtGui.QApplication.UnicodeUTF8))
+        self.chkCacheStatistics.setText(QtGui.QApplication.translate("preferencesDlg", "Cache statistical results", None, QtGui.QApplication.UnicodeUTF8))
+        self.btnClearProfileCache.setText(QtGui.QApplication.translate("preferencesDlg", "Clear cache", None, QtGui.QApplication.UnicodeUTF8))
         self.btnOK.setText(QtGui.QApplication.translate("preferencesDlg", "OK", None, QtGui.QApplication.UnicodeUTF8))
 
 import stamp.STAMP_rc
@@ -33,6 +33,7 @@ import os
 import sys
 import platform
 import string
+import multiprocessing
 
 import stamp.Dependencies
 from stamp.GUI.plotDlg import PlotDlg  # forward reference so py2app recognizes this file is required
@@ -54,7 +55,7 @@ from stamp.GUI.groupLegendDlg import GroupLegendDlg
 from stamp.GUI.statsTableDlg import StatsTableDlg
 from stamp.GUI.metadataTableDlg import MetadataTableDlg
 
-from stamp.metagenomics.stats.SampleStatsTests import SampleStatsTests
+from stamp.metagenomics.stats.SampleStatsTests import SampleStatsTests, statisticsCache
 from stamp.metagenomics.stats.GroupStatsTests import GroupStatsTests
 from stamp.metagenomics.stats.MultiGroupStatsTests import MultiGroupStatsTests
 from stamp.metagenomics.fileIO.StampIO import StampIO
@@ -587,18 +588,30 @@ class MainWindow(QtGui.QMainWindow):
 
 		preferencesDlg.ui.spinPseudoCount.setValue(self.preferences['Pseudocount'])
 		preferencesDlg.ui.spinReplicates.setValue(self.preferences['Replicates'])
+		preferencesDlg.ui.chkAdaptiveReplicates.setChecked(self.preferences['Adaptive replicates'])
+		preferencesDlg.ui.spinWorkerProcesses.setValue(self.preferences['Worker processes'])
+		preferencesDlg.ui.spinRandomSeed.setValue(self.preferences['Random seed'])
+		preferencesDlg.ui.spinBarnardNuisanceSteps.setValue(self.preferences['Barnard nuisance steps'])
 		preferencesDlg.ui.chkTruncateFeatureNames.setChecked(self.preferences['Truncate feature names'])
 		preferencesDlg.ui.spinFeatureNameLength.setValue(self.preferences['Length of truncated feature names'])
 		preferencesDlg.setMinimumReportedPValue(self.preferences['Minimum reported p-value exponent'])
+		preferencesDlg.ui.chkCacheProfiles.setChecked(self.preferences['Cache parsed profiles'])
+		preferencesDlg.ui.chkCacheStatistics.setChecked(self.preferences['Cache statistical results'])
 		preferencesDlg.setAxesButtonColour(self.preferences['Axes colour'])
 		preferencesDlg.setAllOtherSamplesButtonColour(self.preferences['All other samples colour'])
 
 		if preferencesDlg.exec_() == QtGui.QDialog.Accepted:
 			self.preferences['Pseudocount'] = preferencesDlg.ui.spinPseudoCount.value()
 			self.preferences['Replicates'] = preferencesDlg.ui.spinReplicates.value()
+			self.preferences['Adaptive replicates'] = preferencesDlg.ui.chkAdaptiveReplicates.isChecked()
+			self.preferences['Worker processes'] = preferencesDlg.ui.spinWorkerProcesses.value()
+			self.preferences['Random seed'] = preferencesDlg.ui.spinRandomSeed.value()
+			self.preferences['Barnard nuisance steps'] = preferencesDlg.ui.spinBarnardNuisanceSteps.value()
 			self.preferences['Truncate feature names'] = preferencesDlg.ui.chkTruncateFeatureNames.isChecked()
 			self.preferences['Length of truncated feature names'] = preferencesDlg.ui.spinFeatureNameLength.value()
 			self.preferences['Minimum reported p-value exponent'] = preferencesDlg.getMinimumReportedPValue()
+			self.preferences['Cache parsed profiles'] = preferencesDlg.ui.chkCacheProfiles.isChecked()
+			self.preferences['Cache statistical results'] = preferencesDlg.ui.chkCacheStatistics.isChecked()
 
 			self.preferences['Axes colour'] = preferencesDlg.getAxesColour()
 
@@ -641,7 +654,13 @@ class MainWindow(QtGui.QMainWindow):
 			if self.multiGroupPlot.checkFlags().bRunPostHocTest:
 				coverage = float(self.ui.cboMultiGroupNominalCoverage.currentText())
 				postHocTest = self.postHocTestDict[unicode(self.ui.cboPostHocTest.currentText(), 'latin-1')]
-				self.multiGroupStatsTest.runPostHocTest(postHocTest, self.multiGroupProfile, self.preferences['Selected multiple group feature'], coverage)
+				
+				# progress is only shown if the post-hoc test must be run on features without results
+				progress = QtGui.QProgressDialog('Running post-hoc test...', 'Cancel', 0, 1, self)
+				progress.setWindowTitle('Progress')
+				progress.setWindowModality(QtCore.Qt.WindowModal)
+				self.multiGroupStatsTest.runPostHocTest(postHocTest, self.multiGroupProfile, self.preferences['Selected multiple group feature'], coverage, progress)
+				progress.close()
 
 			self.multiGroupPlot.update(self.multiGroupProfile, self.multiGroupStatsTest.results)
 		else:
@@ -1754,11 +1773,21 @@ class MainWindow(QtGui.QMainWindow):
 		# save preferences
 		settings.setValue('Preferences/Pseudocount', self.preferences['Pseudocount'])
 		settings.setValue('Preferences/Replicates', self.preferences['Replicates'])
+		settings.setValue('Preferences/Adaptive replicates', self.preferences['Adaptive replicates'])
+		settings.setValue('Preferences/Worker processes', self.preferences['Worker processes'])
+		settings.setValue('Preferences/Random seed', self.preferences['Random seed'])
+		settings.setValue('Preferences/Barnard nuisance steps', self.preferences['Barnard nuisance steps'])
 		settings.setValue('Preferences/Truncate feature names', self.preferences['Truncate feature names'])
 		settings.setValue('Preferences/Length of truncated feature names', self.preferences['Length of truncated feature names'])
 		settings.setValue('Preferences/Axes colour', self.preferences['Axes colour'].name())
 		settings.setValue('Preferences/All other samples colour', self.preferences['All other samples colour'].name())
 		settings.setValue('Preferences/Minimum reported p-value exponent', self.preferences['Minimum reported p-value exponent'])
+		settings.setValue('Preferences/Cache parsed profiles', self.preferences['Cache parsed profiles'])
+		settings.setValue('Preferences/Cache statistical results', self.preferences['Cache statistical results'])
+		
+		# save statistics calculated during this session for use in later sessions
+		if self.preferences['Cache statistical results']:
+			statisticsCache.save()
 
 def exceptHook(exc_type, exc_value, exc_traceback):
 	# # Copyright (c) 2002-2007 Pascal Varet <p.varet@gmail.com>
@@ -1785,6 +1814,9 @@ def exceptHook(exc_type, exc_value, exc_traceback):
 	+ "</center>")
 
 def main():
+	# allow worker processes to be started from a frozen executable
+	multiprocessing.freeze_support()
+	
 	# ignore numpy warnings as invalid results are handled within STAMP
 	seterr(all='ignore')
 
@@ -1798,11 +1830,17 @@ def main():
 
 	preferences['Pseudocount'] = settings.value('Preferences/Pseudocount', 0.5).toDouble()[0]
 	preferences['Replicates'] = settings.value('Preferences/Replicates', 1000).toInt()[0]
+	preferences['Adaptive replicates'] = settings.value('Preferences/Adaptive replicates', False).toBool()
+	preferences['Worker processes'] = settings.value('Preferences/Worker processes', 1).toInt()[0]
+	preferences['Random seed'] = settings.value('Preferences/Random seed', 1).toInt()[0]
+	preferences['Barnard nuisance steps'] = settings.value('Preferences/Barnard nuisance steps', 100).toInt()[0]
 	preferences['Truncate feature names'] = settings.value('Preferences/Truncate feature names', True).toBool()
 	preferences['Length of truncated feature names'] = settings.value('Preferences/Length of truncated feature names', 50).toInt()[0]
 	preferences['Axes colour'] = QtGui.QColor(settings.value('Preferences/Axes colour', '#7f7f7f'))
 	preferences['All other samples colour'] = QtGui.QColor(settings.value('Preferences/All other samples colour', '#7f7f7f'))
 	preferences['Minimum reported p-value exponent'] = settings.value('Preferences/Minimum reported p-value exponent', -15).toDouble()[0]
+	preferences['Cache parsed profiles'] = settings.value('Preferences/Cache parsed profiles', True).toBool()
+	preferences['Cache statistical results'] = settings.value('Preferences/Cache statistical results', False).toBool()
 
 	preferences['Sample 1 colour'] = QtGui.QColor(128, 177, 211)
 	preferences['Sample 2 colour'] = QtGui.QColor(253, 180, 98)
@@ -21,34 +21,58 @@
 # along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
-import scipy
 import math
 
-from numpy import mean
+import numpy as np
+
+# maximum number of bootstrap statistics held in memory at once
+MAX_BLOCK_SIZE = 2**22
 
 def bootstrapDiffOfMeanProp(group1, group2, coverage, replicates = 1000):
-	sampleSize1 = len(group1)
-	sampleSize2 = len(group2)
+	lowerCIs, upperCIs = bootstrapDiffOfMeanPropAll([group1], [group2], coverage, replicates)
+	return lowerCIs[0], upperCIs[0]
+
+def bootstrapDiffOfMeanPropAll(group1, group2, coverage, replicates = 1000, maxBlockSize = MAX_BLOCK_SIZE, randomState = np.random):
+	'''
+	Bootstrap confidence intervals for the difference of mean proportions of each feature.
 	
-	g1 = scipy.array(group1, copy = 0) # Don't copy if possible
-	g2 = scipy.array(group2, copy = 0)
-
-	distribution = []
-	for _ in xrange(0, replicates):
-		# Draw samples from groups at random, with replacement
-		choices1 = scipy.random.random_integers(0, sampleSize1-1, sampleSize1)
-		choices2 = scipy.random.random_integers(0, sampleSize2-1, sampleSize2)
-		samplesGroup1 = g1[choices1]
-		samplesGroup2 = g2[choices2]
-		
-		# Apply function to sample of random distribution
-		diffOfMeanProp = mean(samplesGroup1) - mean(samplesGroup2)
-		distribution.append(diffOfMeanProp)
+	Rows of group1 and group2 give the proportions of a feature in each sample. The same
+	resampling of the samples is used for all features and is drawn from randomState. Features 
+	are processed in chunks so at most maxBlockSize bootstrap statistics are held in memory at once.
+	'''
+	g1 = np.asarray(group1, dtype=float)
+	g2 = np.asarray(group2, dtype=float)
+	numFeatures, sampleSize1 = g1.shape
+	sampleSize2 = g2.shape[1]
+	
+	# Draw samples from groups at random, with replacement. The number of times each sample is 
+	# drawn in a replicate allows the mean of all replicates to be calculated as a matrix product.
+	weights1 = resampleWeights(sampleSize1, replicates, randomState) / sampleSize1
+	weights2 = resampleWeights(sampleSize2, replicates, randomState) / sampleSize2
 
-	distribution.sort()
-	lowerCI = distribution[max(0, int(math.floor(0.5*(1.0-coverage)*len(distribution))))]
-	upperCI = distribution[min(len(distribution)-1, int(math.ceil((coverage + 0.5*(1.0-coverage))*len(distribution))))]
+	lowerIndex = max(0, int(math.floor(0.5*(1.0-coverage)*replicates)))
+	upperIndex = min(replicates-1, int(math.ceil((coverage + 0.5*(1.0-coverage))*replicates)))
+	
+	lowerCIs = np.zeros(numFeatures)
+	upperCIs = np.zeros(numFeatures)
+	chunkSize = max(1, maxBlockSize / replicates)
+	for start in xrange(0, numFeatures, chunkSize):
+		end = min(start + chunkSize, numFeatures)
+		
+		distribution = np.dot(g1[start:end], weights1) - np.dot(g2[start:end], weights2)
+		distribution.partition([lowerIndex, upperIndex], axis=1)
+		lowerCIs[start:end] = distribution[:, lowerIndex]
+		upperCIs[start:end] = distribution[:, upperIndex]
 
-	return lowerCI, upperCI
+	return lowerCIs, upperCIs
 
+def resampleWeights(sampleSize, replicates, randomState = np.random):
+	'''
+	Number of times each sample is drawn in each bootstrap replicate (samples x replicates).
+	'''
+	choices = randomState.randint(0, sampleSize, (replicates, sampleSize))
+	
+	weights = np.zeros((sampleSize, replicates))
+	np.add.at(weights, (choices, np.arange(0, replicates)[:, np.newaxis]), 1)
 	
+	return weights
@@ -23,25 +23,30 @@
 
 import sys
 
+import numpy as np
+from scipy import sparse
+
 from stamp.metagenomics.SampleProfile import SampleProfile, SampleProfileEntry
 from stamp.metagenomics.GroupProfile import GroupProfile, GroupProfileEntry
-from stamp.metagenomics.MultiGroupProfile import MultiGroupProfile
+from stamp.metagenomics.MultiGroupProfile import MultiGroupProfile, MultiGroupProfileEntry
 
-class Node:
+class Node(object):
+	__slots__ = ('name', 'parent', 'children', 'childIndex', 'nodeDepth', 'countIndex')
+	
 	def __init__(self, name, parent = None):
 		self.name = name
 		self.parent = parent
 		self.children = []
-		self.countData = {}
+		self.childIndex = None	# child nodes indexed by name (created when first child is added)
+		self.countIndex = -1	# row of count table for the hierarchical level of the node
+		
+		if parent == None:
+			self.nodeDepth = 0
+		else:
+			self.nodeDepth = parent.nodeDepth + 1
 
 	def depth(self):
-		depth = 0
-		curNode = self
-		while curNode.parent != None:
-			depth += 1
-			curNode = curNode.parent
-			
-		return depth
+		return self.nodeDepth
 	
 	def isLeaf(self):
 		return (len(self.children) == 0)
@@ -50,11 +55,34 @@ class Node:
 		return (self.parent == None)
 	
 	def childWithName(self, name):
-		for child in self.children:
-			if child.name == name:
-				return child
+		if self.childIndex == None:
+			return None
 			
-		return None
+		return self.childIndex.get(name)
+	
+	def addChild(self, name):
+		child = Node(name, self)
+		self.children.append(child)
+		
+		if self.childIndex == None:
+			self.childIndex = {}
+		self.childIndex[name] = child
+		
+		return child
+		
+class ProfileAggregation:
+	'''
+	Mapping of leaf nodes to the features and parent categories of a profile.
+	'''
+	def __init__(self):
+		self.features = []				# name of each feature
+		self.hierarchies = []			# hierarchy of each feature
+		self.featureParents = []		# index of parent category of each feature
+		self.numParentCategories = 0
+		
+		# features x nodes indicator matrix stacked on parent categories x nodes indicator matrix,
+		#   where nodes are all nodes at the profile level
+		self.indicatorMatrix = None
 	
 class ProfileTree:
 	def __init__(self):
@@ -64,17 +92,89 @@ class ProfileTree:
 		self.groupActive = {}
 		self.numSeqInSample = []
 		
+		# counts for each leaf node (rows) in each sample (columns)
+		self.countMatrix = np.zeros((0, 0))
+		self.sampleIndex = {}
+		
+		# nodes and aggregated counts at each depth of the hierarchy
+		self.levelNodes = []
+		self.levelCounts = []
+		
+		# count table row of the ancestor at each depth (columns) for each leaf node (rows)
+		self.leafAncestors = np.zeros((0, 0), dtype=int)
+		
+		self.aggregationCache = {}
+		
 		self.root = Node('Entire sample')
 		
 	def numSamples(self):
 		return len(self.sampleNames)
+		
+	def setCountMatrix(self, countMatrix):
+		self.countMatrix = countMatrix
+		self.sampleIndex = dict((sampleName, i) for i, sampleName in enumerate(self.sampleNames))
+		
+		self.buildLevelCounts()
+		self.aggregationCache = {}
+		
+		self.numSeqInSample = self.levelCounts[0][0].tolist()
+		
+	def buildLevelCounts(self):
+		'''
+		Aggregate counts for every hierarchical level in a single bottom-up pass.
+		'''
+		numLevels = self.numHierarchicalLevels()
+		
+		self.levelNodes = [[] for _ in xrange(0, numLevels+1)]
+		self.leafAncestors = np.zeros((self.countMatrix.shape[0], numLevels+1), dtype=int)
+		self.addLevelNodesRecursive(self.root, [])
+		
+		self.levelCounts = [None] * (numLevels+1)
+		self.levelCounts[numLevels] = self.countMatrix
+		for depth in xrange(numLevels-1, -1, -1):
+			childNodes = self.levelNodes[depth+1]
+			rows = [child.parent.countIndex for child in childNodes]
+			cols = [child.countIndex for child in childNodes]
+			childToParent = sparse.csr_matrix((np.ones(len(childNodes)), (rows, cols)), 
+																shape=(len(self.levelNodes[depth]), self.levelCounts[depth+1].shape[0]))
+			self.levelCounts[depth] = childToParent.dot(self.levelCounts[depth+1])
+			
+	def addLevelNodesRecursive(self, node, ancestors):
+		# leaf nodes already index rows of the count matrix
+		if not node.isLeaf():
+			node.countIndex = len(self.levelNodes[node.nodeDepth])
+		else:
+			self.leafAncestors[node.countIndex] = ancestors + [node.countIndex]
+			
+		self.levelNodes[node.nodeDepth].append(node)
+		
+		for child in node.children:
+			self.addLevelNodesRecursive(child, ancestors + [node.countIndex])
+			
+	def getAncestors(self, depth):
+		'''
+		Get count table row of the ancestor at each depth (columns) for each node at the specified depth (rows).
+		
+		Rows of the count table for internal nodes follow the order of levelNodes, while leaf nodes
+		  retain the order in which they were read.
+		'''
+		ancestors = np.zeros((len(self.levelNodes[depth]), depth+1), dtype=int)
+		ancestors[self.leafAncestors[:, depth]] = self.leafAncestors[:, 0:depth+1]
+		
+		return ancestors
+		
+	def getSampleCounts(self, sampleNames, depth):
+		'''
+		Get counts for nodes at the specified depth restricted to the specified samples (columns in the order given).
+		'''
+		sampleIndices = [self.sampleIndex[sampleName] for sampleName in sampleNames]
+		return self.levelCounts[depth][:, sampleIndices]
 	
 	def numSequencesInSample(self, name):
 		if name == '':
 			return 0
 			
-		index = self.sampleNames.index(name)
-		return self.numSeqInSample[index]
+		return self.numSeqInSample[self.sampleIndex[name]]
 		
 	def numSequencesInGroup(self, group, metadata):
 		if group == '':
@@ -84,8 +184,7 @@ class ProfileTree:
 		
 		totalSeqs = 0
 		for seqId in seqIds:
-			index = self.sampleNames.index(seqId)
-			totalSeqs += self.numSeqInSample[index]
+			totalSeqs += self.numSeqInSample[self.sampleIndex[seqId]]
 
 		return totalSeqs
 		
@@ -134,12 +233,7 @@ class ProfileTree:
 		for child in node.children:
 			self.getLeafNodesRecursive(child, leafNodes)
 	
-	def createSampleProfile(self, sampleName1, sampleName2, parentHeading, profileHeading, unclassifiedTreatment):
-		profile = SampleProfile() 
-		
-		# get depth of hierarchical levels of interest 
-		self.parentHeading = parentHeading
-		self.profileHeading = profileHeading
+	def getHierarchicalDepths(self, parentHeading, profileHeading):
 		if parentHeading == 'Entire sample':
 			parentDepth = 0
 		else:
@@ -147,81 +241,115 @@ class ProfileTree:
 			
 		profileDepth = self.hierarchyHeadings.index(profileHeading) + 1
 		
-		profile.hierarchyHeadings = self.hierarchyHeadings[0:profileDepth]
-		
-		# get index for samples of interest
-		sampleIndex1 = self.sampleNames.index(sampleName1)
-		sampleIndex2 = self.sampleNames.index(sampleName2)
-		profile.sampleNames = [sampleName1, sampleName2]
-		
-		# get all leaf nodes
-		leafNodes = self.getLeafNodes()
+		return parentDepth, profileDepth
 		
-		# traverse up tree from each leaf node
-		parentSeqDict = {} 
-		for leaf in leafNodes:
-			curDepth = len(self.hierarchyHeadings) 
+	def getAggregation(self, parentDepth, profileDepth, unclassifiedTreatment):
+		'''
+		Get sparse indicator matrices mapping nodes at the profile level to features and to
+		  categories at the parent level. Matrices only depend on the structure of the tree 
+		  so are calculated once for each choice of hierarchical levels.
+		'''
+		key = (parentDepth, profileDepth, str(unclassifiedTreatment))
+		aggregation = self.aggregationCache.get(key)
+		if aggregation != None:
+			return aggregation
 			
-			curNode = leaf
-			hierarchy = []
-			bRemoveUnclassified = False
-			while curNode != None:
-				if not curNode.isRoot() and curDepth <= profileDepth:
-					hierarchy.append(curNode.name)
-				
-				# add profile level information
-				if curDepth == profileDepth:
-					if 'unclassified' in curNode.name.lower():
-						if unclassifiedTreatment == 'Remove unclassified reads':
-							bRemoveUnclassified = True
-							break
-						elif unclassifiedTreatment == 'Use only for calculating frequency profiles':
-							bRemoveUnclassified = True
+		aggregation = ProfileAggregation()
+		featureIndex = {}
+		parentIndex = {}
+		featureRows = []
+		featureCols = []
+		parentRows = []
+		parentCols = []
+		ancestors = self.getAncestors(profileDepth)
+		for profileNode in self.levelNodes[profileDepth]:
+			nodeAncestors = ancestors[profileNode.countIndex]
+			
+			# determine feature at profile level
+			bFeature = True
+			if 'unclassified' in profileNode.name.lower():
+				if unclassifiedTreatment == 'Remove unclassified reads':
+					continue
+				elif unclassifiedTreatment == 'Use only for calculating frequency profiles':
+					bFeature = False
 					
-					if not bRemoveUnclassified:
-						name = curNode.name
-						
-						# remove ' - #' if feature is being calculated relative to the entire sample
-						bTruncatedName = False
-						if curNode.isLeaf() and parentDepth == 0:
-							if name.rfind(' - #') != -1:
-								name = name[0:name.rfind(' - #')]
-								bTruncatedName = True
+			if bFeature:
+				name = profileNode.name
+				
+				# remove ' - #' if feature is being calculated relative to the entire sample
+				if profileNode.isLeaf() and parentDepth == 0 and name.rfind(' - #') != -1:
+					name = name[0:name.rfind(' - #')]
+					if name in featureIndex:
+						continue
 						
-						profileEntry = profile.profileDict.get(name)
-						if bTruncatedName and profileEntry != None:
-							bRemoveUnclassified = True
-							break
-							
-						if profileEntry == None:
-							profileEntry = SampleProfileEntry()
-							profileEntry.featureCounts = [0, 0]
-							profile.profileDict[name] = profileEntry
-
-						profileEntry.featureCounts[0] += leaf.countData[sampleName1]
-						profileEntry.featureCounts[1] += leaf.countData[sampleName2]
+				featureRow = featureIndex.get(name)
+				if featureRow == None:
+					featureRow = len(aggregation.features)
+					featureIndex[name] = featureRow
+					aggregation.features.append(name)
+					aggregation.hierarchies.append(None)
+					aggregation.featureParents.append(None)
+					
+				featureRows.append(featureRow)
+				featureCols.append(profileNode.countIndex)
+				
+			# determine category at parent level
+			parentName = self.levelNodes[parentDepth][nodeAncestors[parentDepth]].name
+			parentRow = parentIndex.get(parentName)
+			if parentRow == None:
+				parentRow = len(parentIndex)
+				parentIndex[parentName] = parentRow
+				
+			parentRows.append(parentRow)
+			parentCols.append(profileNode.countIndex)
 			
-				# add parent level information
-				if curDepth == parentDepth:
-					sequences = parentSeqDict.get(curNode.name)
-					if sequences == None:
-						sequences = [0, 0]
-						parentSeqDict[curNode.name] = sequences
-
-					sequences[0] += leaf.countData[sampleName1]
-					sequences[1] += leaf.countData[sampleName2]
-						
-					if not bRemoveUnclassified:
-						profileEntry.parentCounts = sequences
-						
-				curDepth -= 1
-				curNode = curNode.parent
+			if bFeature:
+				hierarchy = [self.levelNodes[d][nodeAncestors[d]].name for d in xrange(1, profileDepth)]
+				aggregation.hierarchies[featureRow] = hierarchy + [profileNode.name]
+				aggregation.featureParents[featureRow] = parentRow
+				
+		# features and parent categories are stacked so counts can be found with a single product
+		numFeatures = len(aggregation.features)
+		aggregation.numParentCategories = len(parentIndex)
+		rows = featureRows + [numFeatures + r for r in parentRows]
+		cols = featureCols + parentCols
+		aggregation.indicatorMatrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)),
+															shape=(numFeatures + aggregation.numParentCategories, self.levelCounts[profileDepth].shape[0]))
+		
+		self.aggregationCache[key] = aggregation
+		
+		return aggregation
+		
+	def aggregateCounts(self, profile, profileEntryClass, sampleNames, parentHeading, profileHeading, unclassifiedTreatment):
+		'''
+		Populate profile with feature and parent counts for the specified samples.
+		'''
+		parentDepth, profileDepth = self.getHierarchicalDepths(parentHeading, profileHeading)
+		profile.hierarchyHeadings = self.hierarchyHeadings[0:profileDepth]
+		
+		aggregation = self.getAggregation(parentDepth, profileDepth, unclassifiedTreatment)
+		counts = aggregation.indicatorMatrix.dot(self.getSampleCounts(sampleNames, profileDepth))
+		
+		numFeatures = len(aggregation.features)
+		featureCounts = counts[0:numFeatures].tolist()
+		parentCounts = counts[numFeatures:].tolist()
+		for i, feature in enumerate(aggregation.features):
+			profileEntry = profileEntryClass()
+			profileEntry.hierarchy = list(aggregation.hierarchies[i])
+			profileEntry.featureCounts = featureCounts[i]
+			profileEntry.parentCounts = parentCounts[aggregation.featureParents[i]]
+			profile.profileDict[feature] = profileEntry
 			
-			if not bRemoveUnclassified:
-				hierarchy.reverse()
-				profileEntry.hierarchy = hierarchy
-
-		profile.numParentCategories = len(parentSeqDict)
+		profile.numParentCategories = aggregation.numParentCategories
+	
+	def createSampleProfile(self, sampleName1, sampleName2, parentHeading, profileHeading, unclassifiedTreatment):
+		profile = SampleProfile() 
+		
+		self.parentHeading = parentHeading
+		self.profileHeading = profileHeading
+		
+		profile.sampleNames = [sampleName1, sampleName2]
+		self.aggregateCounts(profile, SampleProfileEntry, profile.sampleNames, parentHeading, profileHeading, unclassifiedTreatment)
 		
 		return profile
 		
@@ -234,16 +362,6 @@ class ProfileTree:
 		groupProfile.groupName1 = groupName1
 		groupProfile.groupName2 = groupName2
 		
-		# get depth of hierarchical levels of interest 
-		if parentHeading == 'Entire sample':
-			parentDepth = 0
-		else:
-			parentDepth = self.hierarchyHeadings.index(parentHeading) + 1
-			
-		profileDepth = self.hierarchyHeadings.index(profileHeading) + 1
-		
-		groupProfile.hierarchyHeadings = self.hierarchyHeadings[0:profileDepth]
-		
 		# get list of samples in each group for samples of interest
 		samplesInGroup1 = list(set(self.groupDict[groupName1]).intersection(metadata.activeSamples))
 		if groupName2 != '<All other samples>':
@@ -259,78 +377,7 @@ class ProfileTree:
 		groupProfile.samplesInGroup2 = sorted(samplesInGroup2)
 		samples = groupProfile.samplesInGroup1 + groupProfile.samplesInGroup2
 		
-		# get counts for all samples
-		leafNodes = self.getLeafNodes()
-
-		# traverse up tree from each leaf node
-		parentSeqDict = {} 
-		for leaf in leafNodes:
-			curDepth = len(self.hierarchyHeadings) 
-			
-			curNode = leaf
-			hierarchy = []
-			bRemoveUnclassified = False
-			while curNode != None:
-				if not curNode.isRoot() and curDepth <= profileDepth:
-					hierarchy.append(curNode.name)
-				
-				# add profile level information
-				if curDepth == profileDepth:
-					if 'unclassified' in curNode.name.lower():
-						if unclassifiedTreatment == 'Remove unclassified reads':
-							bRemoveUnclassified = True
-							break
-						elif unclassifiedTreatment == 'Use only for calculating frequency profiles':
-							bRemoveUnclassified = True
-					
-					if bRemoveUnclassified == False:
-						name = curNode.name
-						
-						# remove ' - #' if feature is being calculated relative to the entire sample
-						bTruncatedName = False
-						if curNode.isLeaf() and parentDepth == 0:
-							if name.rfind(' - #') != -1:
-								name = name[0:name.rfind(' - #')]
-								bTruncatedName = True
-						
-						profileEntry = groupProfile.profileDict.get(name)
-						if bTruncatedName == True and profileEntry != None:
-							bRemoveUnclassified = True
-							break
-							
-						if profileEntry == None:
-							profileEntry = GroupProfileEntry()
-							profileEntry.featureCounts = [0]*len(samples)
-							groupProfile.profileDict[name] = profileEntry
-							
-						col = 0
-						for sampleName in samples:
-							profileEntry.featureCounts[col] += leaf.countData[sampleName]
-							col += 1
-									
-				# add parent level information
-				if curDepth == parentDepth:
-					sequences = parentSeqDict.get(curNode.name)
-					if sequences == None:
-						sequences = [0]*len(samples)
-						parentSeqDict[curNode.name] = sequences
-						
-					col = 0
-					for sampleName in samples:
-						sequences[col] += leaf.countData[sampleName]
-						col += 1
-						
-					if bRemoveUnclassified == False:
-						profileEntry.parentCounts = sequences
-						
-				curDepth -= 1
-				curNode = curNode.parent
-			
-			if bRemoveUnclassified == False:
-				hierarchy.reverse()
-				profileEntry.hierarchy = hierarchy
-			
-		groupProfile.numParentCategories = len(parentSeqDict)
+		self.aggregateCounts(groupProfile, GroupProfileEntry, samples, parentHeading, profileHeading, unclassifiedTreatment)
 	
 		return groupProfile
 		
@@ -339,16 +386,6 @@ class ProfileTree:
 		
 		multiGroupProfile.groupNames = sorted(groupNames)
 		
-		# get depth of hierarchical levels of interest 
-		if parentHeading == 'Entire sample':
-			parentDepth = 0
-		else:
-			parentDepth = self.hierarchyHeadings.index(parentHeading) + 1
-			
-		profileDepth = self.hierarchyHeadings.index(profileHeading) + 1
-		
-		multiGroupProfile.hierarchyHeadings = self.hierarchyHeadings[0:profileDepth]
-		
 		# get list of samples in each group for samples of interest
 		multiGroupProfile.samplesInGroups = []
 		samples = []
@@ -362,79 +399,7 @@ class ProfileTree:
 			if len(sortedSampleNames) < multiGroupProfile.smallestGroup:
 				multiGroupProfile.smallestGroup = len(sortedSampleNames)
 				
-		# get counts for all samples
-		leafNodes = self.getLeafNodes()
-
-		# traverse up tree from each leaf node
-		parentSeqDict = {} 
-		for leaf in leafNodes:
-			curDepth = len(self.hierarchyHeadings) 
-			
-			curNode = leaf
-			hierarchy = []
-			bRemoveUnclassified = False
-			while curNode != None:
-				if not curNode.isRoot() and curDepth <= profileDepth:
-					hierarchy.append(curNode.name)
-				
-				# add profile level information
-				if curDepth == profileDepth:
-					if 'unclassified' in curNode.name.lower():
-						if unclassifiedTreatment == 'Remove unclassified reads':
-							bRemoveUnclassified = True
-							break
-						elif unclassifiedTreatment == 'Use only for calculating frequency profiles':
-							bRemoveUnclassified = True
-					
-					if bRemoveUnclassified == False:
-						name = curNode.name
-						
-						# remove ' - #' if feature is being calculated relative to the entire sample
-						bTruncatedName = False
-						if curNode.isLeaf() and parentDepth == 0:
-							if name.rfind(' - #') != -1:
-								name = name[0:name.rfind(' - #')]
-								bTruncatedName = True
-						
-						profileEntry = multiGroupProfile.profileDict.get(name)
-						if bTruncatedName == True and profileEntry != None:
-							bRemoveUnclassified = True
-							break
-					
-						if profileEntry == None:
-							profileEntry = GroupProfileEntry()
-							profileEntry.featureCounts = [0]*len(samples)
-							multiGroupProfile.profileDict[curNode.name] = profileEntry
-							
-						col = 0
-						for sampleName in samples:
-							profileEntry.featureCounts[col] += leaf.countData[sampleName]
-							col += 1
-									
-				# add parent level information
-				if curDepth == parentDepth:
-					sequences = parentSeqDict.get(curNode.name)
-					if sequences == None:
-						sequences = [0]*len(samples)
-						parentSeqDict[curNode.name] = sequences
-						
-					col = 0
-					for sampleName in samples:
-						sequences[col] += leaf.countData[sampleName]
-						col += 1
-						
-					if bRemoveUnclassified == False:
-						profileEntry.parentCounts = sequences
-						
-				curDepth -= 1
-				curNode = curNode.parent
-		
-			if bRemoveUnclassified == False:
-				hierarchy.reverse()
-				profileEntry.hierarchy = hierarchy
-
-		multiGroupProfile.numParentCategories = len(parentSeqDict)
+		self.aggregateCounts(multiGroupProfile, MultiGroupProfileEntry, samples, parentHeading, profileHeading, unclassifiedTreatment)
 		multiGroupProfile.setActiveGroups(self.groupActive)
 
 		return multiGroupProfile
-		
\ No newline at end of file
@@ -0,0 +1,182 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Binary cache of parsed STAMP profiles.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import os
+import hashlib
+import zipfile
+
+import numpy as np
+
+from stamp.metagenomics.ProfileTree import ProfileTree
+
+class ProfileCache(object):
+	'''
+	Cache of parsed profile files.
+
+	Each cached profile is stored as a pair of files: an .npz file with the signature
+	of the profile file and the profile hierarchy, and an .npy file with the count matrix.
+	'''
+
+	# size of blocks used to calculate content hash of a profile file
+	BLOCK_SIZE = 1024*1024
+
+	def __init__(self, cacheDir = None):
+		if cacheDir == None:
+			cacheDir = os.path.join(os.path.expanduser('~'), '.stamp', 'profile_cache')
+		self.cacheDir = cacheDir
+
+	def signature(self, filename):
+		'''
+		Size, modification time, and content hash of a profile file.
+		'''
+		stat = os.stat(filename)
+
+		contentHash = hashlib.sha1()
+		fin = open(filename, 'rb')
+		block = fin.read(self.BLOCK_SIZE)
+		while block:
+			contentHash.update(block)
+			block = fin.read(self.BLOCK_SIZE)
+		fin.close()
+
+		return (stat.st_size, stat.st_mtime, contentHash.hexdigest())
+
+	def entryFiles(self, filename):
+		path = os.path.abspath(filename)
+		if isinstance(path, unicode):
+			path = path.encode('utf-8')
+			
+		key = hashlib.sha1(path).hexdigest()
+		entry = os.path.join(self.cacheDir, key)
+		return entry + '.npz', entry + '.npy'
+
+	def load(self, filename, signature):
+		'''
+		Load cached profile tree. Returns None if the profile is not in the cache or the
+		cached profile is out of date.
+		'''
+		treeFile, countFile = self.entryFiles(filename)
+		if not os.path.exists(treeFile) or not os.path.exists(countFile):
+			return None
+
+		try:
+			entry = np.load(treeFile)
+			try:
+				size, mtime, contentHash = signature
+				if entry['size'] != size or entry['mtime'] != mtime or str(entry['contentHash']) != contentHash:
+					return None
+
+				# level counts are aggregated from the full count matrix so it is read into memory
+				countMatrix = np.load(countFile)
+				if countMatrix.shape != tuple(entry['countShape']):
+					return None
+
+				profileTree = ProfileTree()
+				profileTree.hierarchyHeadings = entry['hierarchyHeadings'].tolist()
+				profileTree.sampleNames = entry['sampleNames'].tolist()
+
+				# nodes are stored in depth-first order so children are added to their parent in their original order
+				nodes = []
+				for name, parentIndex, countIndex in zip(entry['nodeNames'].tolist(), entry['nodeParents'].tolist(), entry['nodeCountIndices'].tolist()):
+					if parentIndex == -1:
+						parentNode = profileTree.root
+					else:
+						parentNode = nodes[parentIndex]
+
+					node = parentNode.addChild(name)
+					node.countIndex = countIndex
+					nodes.append(node)
+			finally:
+				entry.close()
+			
+			profileTree.setCountMatrix(countMatrix)
+		except (IOError, OSError, ValueError, KeyError, IndexError, zipfile.BadZipfile):
+			# corrupt or incompatible entries are treated as missing
+			return None
+
+		return profileTree
+
+	def save(self, filename, signature, profileTree):
+		'''
+		Save parsed profile tree to the cache.
+		'''
+		treeFile, countFile = self.entryFiles(filename)
+
+		nodeNames = []
+		nodeParents = []
+		nodeCountIndices = []
+		self.addNodesRecursive(profileTree.root, -1, nodeNames, nodeParents, nodeCountIndices)
+
+		try:
+			if not os.path.exists(self.cacheDir):
+				os.makedirs(self.cacheDir)
+
+			# write to temporary files so an incomplete entry is never read
+			fout = open(countFile + '.tmp', 'wb')
+			try:
+				np.save(fout, np.asarray(profileTree.countMatrix, dtype=float))
+			finally:
+				fout.close()
+
+			size, mtime, contentHash = signature
+			fout = open(treeFile + '.tmp', 'wb')
+			try:
+				np.savez(fout, size=size, mtime=mtime, contentHash=contentHash,
+										countShape=np.array(profileTree.countMatrix.shape),
+										hierarchyHeadings=np.array(profileTree.hierarchyHeadings, dtype=str),
+										sampleNames=np.array(profileTree.sampleNames, dtype=str),
+										nodeNames=np.array(nodeNames, dtype=str),
+										nodeParents=np.array(nodeParents, dtype=int),
+										nodeCountIndices=np.array(nodeCountIndices, dtype=int))
+			finally:
+				fout.close()
+
+			for f in [countFile, treeFile]:
+				if os.path.exists(f):
+					os.remove(f)
+				os.rename(f + '.tmp', f)
+		except (IOError, OSError):
+			# profiles which can not be cached are simply parsed again when next loaded
+			pass
+
+	def addNodesRecursive(self, node, parentIndex, nodeNames, nodeParents, nodeCountIndices):
+		for child in node.children:
+			nodeNames.append(child.name)
+			nodeParents.append(parentIndex)
+			nodeCountIndices.append(child.countIndex)
+			self.addNodesRecursive(child, len(nodeNames)-1, nodeNames, nodeParents, nodeCountIndices)
+
+	def clear(self):
+		'''
+		Remove all cached profiles.
+		'''
+		if not os.path.exists(self.cacheDir):
+			return
+
+		for f in os.listdir(self.cacheDir):
+			if f.endswith('.npz') or f.endswith('.npy') or f.endswith('.tmp'):
+				try:
+					os.remove(os.path.join(self.cacheDir, f))
+				except OSError:
+					# cached profile may be in use
+					pass
@@ -22,85 +22,197 @@
 #=======================================================================
 
 import string
+import itertools
 from collections import defaultdict
 
-from stamp.metagenomics.ProfileTree import ProfileTree, Node
+import numpy as np
+
+from stamp.metagenomics.ProfileTree import ProfileTree
+from stamp.metagenomics.fileIO.ProfileCache import ProfileCache
 from stamp.metagenomics.StringHelper import isNumber
 
 class StampIO(object):
+	# number of rows parsed into the count matrix at a time
+	CHUNK_SIZE = 4096
+	
 	def __init__(self, preferences):
 		self.preferences = preferences
 		
 	def read(self, filename):
+		if not self.preferences.get('Cache parsed profiles', False):
+			return self.parse(filename)
+			
+		if not isinstance(filename, basestring):
+			filename = unicode(filename)
+			
+		# use previously parsed profile if the file is unchanged
+		profileCache = ProfileCache()
+		signature = profileCache.signature(filename)
+		profileTree = profileCache.load(filename, signature)
+		if profileTree != None:
+			return profileTree, None
+			
+		profileTree, errMsg = self.parse(filename)
+		if errMsg == None:
+			profileCache.save(filename, signature, profileTree)
+			
+		return profileTree, errMsg
+		
+	def parse(self, filename):
 		errMsg = None
 		
 		fin = open(filename, 'U')
-		data = map(string.strip, fin.readlines())
-		fin.close()
+		headerLine = fin.readline().strip()
+		firstDataLine = fin.readline().strip()
 
 		profileTree = ProfileTree()
 		
 		# determine number of hierarchical levels and samples
-		self.determineColumns(data, profileTree)
+		self.determineColumns(headerLine, firstDataLine, profileTree)
+		numHierarchicalLevels = profileTree.numHierarchicalLevels()
+		numSamples = profileTree.numSamples()
 
-		if profileTree.numSamples() < 2:
+		if numSamples < 2:
+			fin.close()
 			errMsg = 'Profile file must contain at least two samples.'
 			return None, errMsg
 		
-		if profileTree.numHierarchicalLevels() == 0:
+		if numHierarchicalLevels == 0:
+			fin.close()
 			errMsg = 'Profile file must contain a column indicating feature names.'
 			return None, errMsg
 		
-		# verify data forms a strict hierarchy
-		errMsg = self.checkHierarchy(data, profileTree.numHierarchicalLevels())
+		# verify data forms a strict hierarchy while constructing the profile tree in a single
+		# pass over the file, parsing count data in blocks of rows
+		parent = defaultdict(dict)
+		errMsg = self.checkHierarchyLine(headerLine.split('\t'), numHierarchicalLevels, parent)
 		if errMsg != None:
+			fin.close()
 			return None, errMsg
 		
-		# construct profile tree
-		try:
-			profileTree.numSeqInSample = [0] * profileTree.numSamples()
-			for i in xrange(1, len(data)):
-				# ignore blank lines
-				if data[i].strip() == "":
-					continue
-
-				lineSplit = data[i].split('\t')
-				lineSplit = map(string.strip, lineSplit)
+		# count matrix grows by blocks of rows as new leaves are encountered
+		countMatrix = np.zeros((self.CHUNK_SIZE, numSamples))
+		numLeaves = 0
+		
+		chunkLineNums = []
+		chunkRows = []
+		chunkCounts = []
+		bDuplicateRows = False
+		
+		parseErrMsg = None
+		lineNum = 1
+		for line in itertools.chain([firstDataLine], fin):
+			lineNum += 1
+			
+			# ignore blank lines
+			line = line.strip()
+			if line == "":
+				continue
+			
+			lineSplit = line.split('\t', numHierarchicalLevels)
+			
+			errMsg = self.checkHierarchyLine(lineSplit, numHierarchicalLevels, parent)
+			if errMsg != None:
+				fin.close()
+				return None, errMsg
+			
+			# once a line fails to parse only the hierarchy of the remaining lines is verified
+			if parseErrMsg != None:
+				continue
+			
+			counts = []
+			if len(lineSplit) > numHierarchicalLevels:
+				counts = lineSplit[numHierarchicalLevels].split('\t')
+				
+			if len(counts) != numSamples:
+				# earlier lines in the current block may also fail to parse
+				parseErrMsg = self.addCountBlock(countMatrix, chunkLineNums, chunkRows, chunkCounts, bDuplicateRows)
+				if parseErrMsg == None:
+					parseErrMsg = 'Failed to correctly parse line: ' + str(lineNum)
+				continue
 				
-				categories = lineSplit[0:profileTree.numHierarchicalLevels()]
-				countData = [float(count) for count in lineSplit[profileTree.numHierarchicalLevels():]]
+			categories = map(string.strip, lineSplit[0:numHierarchicalLevels])
+			
+			# check for unclassified categories
+			taxa = ''
+			for j in xrange(0, len(categories)):
+				if self.isUnclassified(categories[j]):
+					categories[j] = 'Unclassified ' + taxa
+					categories[j] = categories[j].rstrip()
+				else:
+					taxa = categories[j]
+			
+			# add all hierarchical levels
+			curNode = profileTree.root
+			for category in categories:
+				node = curNode.childWithName(category)
+				if node == None:
+					node = curNode.addChild(category)
+					
+				curNode = node
 				
-				# check for unclassified categories
-				taxa = ''
-				for j in xrange(0, len(categories)):
-					if self.isUnclassified(categories[j]):
-						categories[j] = 'Unclassified ' + taxa
-						categories[j] = categories[j].rstrip()
-					else:
-						taxa = categories[j]
+			# count data is added to row of count matrix associated with leaf node
+			if curNode.countIndex == -1:
+				if numLeaves == countMatrix.shape[0]:
+					countMatrix = self.growCountMatrix(countMatrix)
+				curNode.countIndex = numLeaves
+				numLeaves += 1
+			else:
+				bDuplicateRows = True
 				
-				# add all hierarchical levels
-				curNode = profileTree.root
-				for category in categories:
-					node = curNode.childWithName(category)
-					if node == None:
-						node = Node(category, curNode)
-						curNode.children.append(node)
-						
-					curNode = node
+			chunkLineNums.append(lineNum)
+			chunkRows.append(curNode.countIndex)
+			chunkCounts.extend(counts)
+			
+			if len(chunkRows) == self.CHUNK_SIZE:
+				parseErrMsg = self.addCountBlock(countMatrix, chunkLineNums, chunkRows, chunkCounts, bDuplicateRows)
+				chunkLineNums = []
+				chunkRows = []
+				chunkCounts = []
+				bDuplicateRows = False
+		fin.close()
+		
+		if parseErrMsg == None:
+			parseErrMsg = self.addCountBlock(countMatrix, chunkLineNums, chunkRows, chunkCounts, bDuplicateRows)
+			
+		if parseErrMsg != None:
+			return None, parseErrMsg
+			
+		# copy rows holding leaf counts so the unused rows of the grown count matrix are released
+		profileTree.setCountMatrix(countMatrix[0:numLeaves].copy())
+			
+		return profileTree, None
+		
+	def growCountMatrix(self, countMatrix):
+		"""Double the number of rows in the count matrix."""
+		grownMatrix = np.zeros((2*countMatrix.shape[0], countMatrix.shape[1]))
+		grownMatrix[0:countMatrix.shape[0]] = countMatrix
+		return grownMatrix
+		
+	def addCountBlock(self, countMatrix, lineNums, rows, counts, bDuplicateRows):
+		"""Parse a block of count data and add it to the specified rows of the count matrix."""
+		if len(rows) == 0:
+			return None
+			
+		try:
+			block = np.array(counts, dtype=float).reshape(len(rows), countMatrix.shape[1])
+		except ValueError:
+			# find first line which could not be parsed
+			numSamples = countMatrix.shape[1]
+			for i, lineNum in enumerate(lineNums):
+				try:
+					np.array(counts[i*numSamples:(i+1)*numSamples], dtype=float)
+				except ValueError:
+					return 'Failed to correctly parse line: ' + str(lineNum)
 					
-				# add count data to leaf node
-				for j in xrange(0, len(profileTree.sampleNames)):
-					sampleName = profileTree.sampleNames[j]
-					curNode.countData[sampleName] = curNode.countData.get(sampleName, 0) + countData[j]
-						
-				# add count data to total sequence count
-				for j in xrange(0, len(countData)):
-					profileTree.numSeqInSample[j] += countData[j]
-		except:
-			errMsg = 'Failed to correctly parse line: ' + str(i+1)
+			return 'Failed to correctly parse lines: ' + str(lineNums[0]) + '-' + str(lineNums[-1])
+		
+		if bDuplicateRows:
+			np.add.at(countMatrix, rows, block)
+		else:
+			countMatrix[rows] += block
 			
-		return profileTree, errMsg
+		return None
 	
 	def isUnclassified(self, value):
 		"""Check if value (taxon, metabolic pathway) is unclassified."""
@@ -110,8 +222,8 @@ class StampIO(object):
 		# the format used by GreenGenes
 		return value.lower() == 'unclassified' or value.lower()[1:] == '__unclassified'
 				
-	def determineColumns(self, data, profileTree):
-		firstDataRow = data[1].split('\t')
+	def determineColumns(self, headerLine, firstDataLine, profileTree):
+		firstDataRow = firstDataLine.split('\t')
 		
 		# first column entry that is numeric is assumed to be from first sample
 		firstSampleIndex = 0
@@ -121,42 +233,32 @@ class StampIO(object):
 			firstSampleIndex += 1
 			
 		# get hierarchical and sample names
-		headings = data[0].split('\t')
+		headings = headerLine.split('\t')
 		headings = map(string.strip, headings)
 		profileTree.hierarchyHeadings = headings[0:firstSampleIndex]
 		profileTree.sampleNames = headings[firstSampleIndex:]
 		
-	def checkHierarchy(self, data, numHierarchicalLevels):
-		"""Verify that data forms a strict hierarchy."""
-		parent = defaultdict(dict)
-		for line in data:
-			lineSplit = line.split('\t')
-			lineSplit = map(string.strip, lineSplit)
-				
-			categories = lineSplit[0:numHierarchicalLevels]
-			for r, value in enumerate(categories):
-				# top of hierarchy has no parent
-				if r == 0:
-					continue 
-				
-				# ignore unclassified sequences
-				if self.isUnclassified(value):
-					continue 
-				
-				# make sure parent is not unclassified
-				parentValue = categories[r-1]
-				if self.isUnclassified(parentValue):
-					return "Child %s has an unclassified parent." % value
-					continue 
-				
-				if r not in parent:
-					parent[r] = {}
-					
-				if value not in parent[r]:
-					parent[r][value] = parentValue
-				else:
-					if parent[r][value] != parentValue:
-						# data is not a strict hierarchy
-						return "Data does not form a strict hierarchy. Child %s has multiple parents (e.g., %s, %s)." % (value, parent[r][value], parentValue)		
+	def checkHierarchyLine(self, lineSplit, numHierarchicalLevels, parent):
+		"""Verify that a single line is consistent with the hierarchy of previously checked lines."""
+		categories = map(string.strip, lineSplit[0:numHierarchicalLevels])
+		for r, value in enumerate(categories):
+			# top of hierarchy has no parent
+			if r == 0:
+				continue 
+			
+			# ignore unclassified sequences
+			if self.isUnclassified(value):
+				continue 
+			
+			# make sure parent is not unclassified
+			parentValue = categories[r-1]
+			if self.isUnclassified(parentValue):
+				return "Child %s has an unclassified parent." % value
+			
+			if value not in parent[r]:
+				parent[r][value] = parentValue
+			else:
+				if parent[r][value] != parentValue:
+					# data is not a strict hierarchy
+					return "Data does not form a strict hierarchy. Child %s has multiple parents (e.g., %s, %s)." % (value, parent[r][value], parentValue)		
 		return None
-			
\ No newline at end of file
@@ -27,12 +27,35 @@
 # along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
-import math
+import numpy as np
 
 from stamp.metagenomics.stats.distributions.NormalDist import zScore
 
 from scipy.stats import chi2
 
+def wilsonScoreInterval(posSeqs, totalSeqs, z):
+	'''
+	Wilson score interval for binomial proportions. Arguments may be arrays with an entry for each proportion.
+	
+	The bounds are the two roots of (p' - p)^2 = z^2 p'(1-p') / n in p' and are clipped to [0, 1]
+	to guard against rounding error. Returns the lower bounds, upper bounds, and observed proportions.
+	'''
+	posSeqs = np.asarray(posSeqs, dtype=float)
+	totalSeqs = np.asarray(totalSeqs, dtype=float)
+	zSqrd = z*z
+	
+	p = posSeqs / totalSeqs
+	q = 1.0 - p
+
+	term1 = p + zSqrd / (2*totalSeqs)
+	offset = z * np.sqrt(np.maximum(p*q / totalSeqs, 0) + zSqrd / (4*totalSeqs*totalSeqs))
+	denom = 1 + zSqrd / totalSeqs
+	
+	lowerCI = np.clip((term1 - offset) / denom, 0.0, 1.0)
+	upperCI = np.clip((term1 + offset) / denom, 0.0, 1.0)
+	
+	return lowerCI, upperCI, p
+
 class WilsonCI():
 	
 	def __init__(self):
@@ -54,25 +77,14 @@ class WilsonCI():
 		 
 		totalSeqs = max(totalSeqs, 1.0) 
 		
-		z = zScore
-		zSqrd = z*z
-		
-		p = float(posSeqs) / totalSeqs
-		q = 1.0 - p
-
-		term1 = p + zSqrd / (2*totalSeqs)
-		offset = z * math.sqrt(p*q / totalSeqs + zSqrd / (4*totalSeqs*totalSeqs))
-		denom = 1 + zSqrd / totalSeqs
-		
-		lowerCI = (term1 - offset) / denom
-		upperCI = (term1 + offset) / denom
+		lowerCI, upperCI, p = wilsonScoreInterval(posSeqs, totalSeqs, zScore)
 		
 		# Good correction, but computationally expensive
 		#if posSeqs >= 1 and posSeqs <=3:
 			# use one-sided Poisson approximation when probability ~= 0 (see Brown et al., 2001)
 		#	lowerCI = 0.5*chi2.isf(coverage, 2*posSeqs) / totalSeqs
 		
-		return lowerCI, upperCI, p
+		return float(lowerCI), float(upperCI), float(p)
 	
 if __name__ == "__main__": 
 	wilsonCI = WilsonCI()
@@ -22,6 +22,8 @@
 #=======================================================================
 
 from stamp.metagenomics import TableHelper
+from stamp.metagenomics.stats.ParallelStats import workerProcesses, picklablePreferences, featureChunks, runParallel
+from stamp.metagenomics.stats.RandomStreams import randomSeed
 
 from numpy import mean, std
 
@@ -48,6 +50,7 @@ class GroupStatTestResults(object):
 		self.dataHeadings['LowerCI'] = 8
 		self.dataHeadings['UpperCI'] = 9
 		self.dataHeadings['Note'] = 10
+		self.dataHeadings['Replicates'] = 11
 		
 		self.alpha = 0
 
@@ -170,6 +173,7 @@ class GroupStatTestResults(object):
 		self.tableHeadings += [oneMinAlphaStr + '% lower CI']
 		self.tableHeadings += [oneMinAlphaStr + '% upper CI']
 		self.tableHeadings += ['Note']
+		self.tableHeadings += ['Replicates']
 		self.tableHeadings += headingsSampleStats
 	
 	def performMultCompCorrection(self, multCompCorrection): 
@@ -286,6 +290,7 @@ class GroupStatsTests(object):
 	
 	def __init__(self, preferences):
 		self.results = GroupStatTestResults(preferences)
+		self.preferences = preferences
 		 
 	def run(self, statTest, testType, confIntervMethod, coverage, profile, progress = None):
 		self.results.test = statTest.name
@@ -310,25 +315,43 @@ class GroupStatsTests(object):
 		upperCIs = []
 		effectSizes = []
 		notes = []
-		if statTest.bSingleFeatureInterface:
-			# process features one at a time
+		replicatesUsed = []
+		if not statTest.bPooledFeatures:
+			# statistics of each feature are independent so features are processed in chunks
 			for feature in profile.getFeatures():
 				if progress == 'Verbose':
 					print '    ' + feature
-				elif progress != None:
-					if progress.wasCanceled():
-						self.results.data = []
-						return
-
-					index += 1
-					progress.setValue(index)
-															
-				# get statistics
+					
 				seqGroup1, seqGroup2 = profile.getFeatureCounts(feature)
 				parentSeqGroup1, parentSeqGroup2= profile.getParentFeatureCounts(feature)
-				results = statTest.run(seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, confIntervMethod, coverage)
-				pValueOneSided, pValueTwoSided, lowerCI, upperCI, effectSize, note = results
+				seqsGroup1.append(seqGroup1)
+				seqsGroup2.append(seqGroup2)
+				parentSeqsGroup1.append(parentSeqGroup1)
+				parentSeqsGroup2.append(parentSeqGroup2)
 				
+			numWorkers = workerProcesses(self.preferences)
+			if numWorkers > 1 and len(seqsGroup1) > 1:
+				# process chunks of features in parallel
+				chunks = featureChunks(len(seqsGroup1), numWorkers)
+				workerPreferences = picklablePreferences(self.preferences)
+				chunkArgs = [(statTest.__class__, workerPreferences, str(confIntervMethod), coverage, 
+											seqsGroup1[start:end], seqsGroup2[start:end], parentSeqsGroup1[start:end], parentSeqsGroup2[start:end]) for start, end in chunks]
+				chunkResults = runParallel(groupStatisticsWorker, chunkArgs, [end - start for start, end in chunks], numWorkers, randomSeed(self.preferences), progress)
+				if chunkResults == None:
+					self.results.data = []
+					return
+				
+				statistics = []
+				for chunkStatistics in chunkResults:
+					statistics += chunkStatistics
+			else:
+				statistics = groupStatistics(statTest, confIntervMethod, coverage, seqsGroup1, seqsGroup2, parentSeqsGroup1, parentSeqsGroup2, progress)
+				if statistics == None:
+					self.results.data = []
+					return
+			index = len(seqsGroup1)
+				
+			for pValueOneSided, pValueTwoSided, lowerCI, upperCI, effectSize, note, replicates in statistics:
 				if testType == 'One-sided':
 					pValue = pValueOneSided
 				elif testType == 'Two-sided':
@@ -337,24 +360,25 @@ class GroupStatsTests(object):
 					print 'Error: Unknown test type.'
 
 				# record results
-				seqsGroup1.append(seqGroup1)
-				seqsGroup2.append(seqGroup2)
-				parentSeqsGroup1.append(parentSeqGroup1)
-				parentSeqsGroup2.append(parentSeqGroup2)
 				pValues.append(pValue)
 				lowerCIs.append(lowerCI)
 				upperCIs.append(upperCI)
 				effectSizes.append(effectSize)
 				notes.append(note)
+				replicatesUsed.append(replicates)
 				
 			if progress != None and progress != 'Verbose':
 				index += 1
 				progress.setValue(index)
 		else:
-			# process all features at once
+			# tests which pool information across features process all features at once and report their own progress
 			seqsGroup1, seqsGroup2 = profile.getFeatureCountsAll()
 			parentSeqsGroup1, parentSeqsGroup2= profile.getParentFeatureCountsAll()
 			pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs, effectSizes, notes = statTest.runAll(seqsGroup1, seqsGroup2, parentSeqsGroup1, parentSeqsGroup2, confIntervMethod, coverage, progress)
+			if statTest.replicatesUsed != None:
+				replicatesUsed = statTest.replicatesUsed
+			else:
+				replicatesUsed = [0] * len(notes)
 			if progress == 'Verbose':
 				print '    Processing all features...'
 			elif progress != None and progress.wasCanceled():
@@ -394,7 +418,7 @@ class GroupStatsTests(object):
 			row = [features[i], float(mean(propGroup1)), float(std(propGroup1)), 
 							float(mean(propGroup2)), float(std(propGroup2)),
 							float(pValues[i]),float(pValues[i]),float(effectSizes[i]),
-							float(lowerCIs[i]),float(upperCIs[i]), notes[i]]
+							float(lowerCIs[i]),float(upperCIs[i]), notes[i], replicatesUsed[i]]
 							
 			for j in xrange(0, len(seqsGroup1[i])):
 				row.append(seqsGroup1[i][j])
@@ -425,3 +449,40 @@ class GroupStatsTests(object):
 		# sort results according to p-values
 		if len(self.results.data) >= 1:
 			self.results.data = TableHelper.SortTable(self.results.data, [self.results.dataHeadings['pValues']])
+
+def groupStatistics(statTest, confIntervMethod, coverage, seqsGroup1, seqsGroup2, parentSeqsGroup1, parentSeqsGroup2, progress = None):
+	'''
+	Calculate statistics for features with the given counts. Returns a list with the 
+	statistics of each feature or None if the progress dialog was canceled.
+	'''
+	statistics = []
+	for start, end in featureChunks(len(seqsGroup1), 1):
+		# process a chunk of features at once with tests which support this so progress 
+		# is reported and canceling is checked between chunks
+		if not statTest.bSingleFeatureInterface:
+			chunkStatistics = statTest.runAll(seqsGroup1[start:end], seqsGroup2[start:end], parentSeqsGroup1[start:end], parentSeqsGroup2[start:end], confIntervMethod, coverage)
+			replicatesUsed = statTest.replicatesUsed
+			
+		for i in xrange(start, end):
+			if progress != None and progress != 'Verbose':
+				if progress.wasCanceled():
+					return None
+
+				progress.setValue(i+1)
+				
+			if statTest.bSingleFeatureInterface:
+				results = tuple(statTest.run(seqsGroup1[i], seqsGroup2[i], parentSeqsGroup1[i], parentSeqsGroup2[i], confIntervMethod, coverage))
+				replicates = 0
+			else:
+				results = tuple([statistic[i-start] for statistic in chunkStatistics])
+				replicates = replicatesUsed[i-start] if replicatesUsed != None else 0
+				
+			statistics.append(results + (replicates,))
+		
+	return statistics
+	
+def groupStatisticsWorker(statTestClass, preferences, confIntervMethod, coverage, seqsGroup1, seqsGroup2, parentSeqsGroup1, parentSeqsGroup2):
+	'''
+	Calculate statistics for a chunk of features in a worker process.
+	'''
+	return groupStatistics(statTestClass(preferences), confIntervMethod, coverage, seqsGroup1, seqsGroup2, parentSeqsGroup1, parentSeqsGroup2)
@@ -0,0 +1,110 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Summary statistics of groups of samples for many features at once.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import copy
+
+import numpy as np
+
+def groupMatrix(allData):
+	'''
+	Convert the values of each feature given as a list of groups into a features x samples
+	matrix along with the index of the group each sample belongs to. All features must have
+	the same number of samples in each group.
+	'''
+	if len(allData) == 0:
+		return np.zeros((0, 0)), np.zeros(0, dtype=int)
+
+	groupSizes = [len(group) for group in allData[0]]
+	groupLabels = np.repeat(np.arange(0, len(groupSizes)), groupSizes)
+
+	values = np.array([[x for group in data for x in group] for data in allData], dtype=float)
+	values = values.reshape((len(allData), len(groupLabels)))
+
+	return values, groupLabels
+
+class GroupSummaryStats(object):
+	'''
+	Sufficient statistics of each group for a features x samples matrix.
+
+	Per-group sums are found with a matrix product against a one-hot encoding of the group
+	labels. Sums of squares are calculated from deviations about each group mean so groups
+	with identical values have a variance of exactly zero.
+	'''
+
+	def __init__(self, values, groupLabels, numGroups = None):
+		values = np.asarray(values, dtype=float)
+		groupLabels = np.asarray(groupLabels, dtype=int)
+		if numGroups == None:
+			numGroups = groupLabels.max() + 1 if len(groupLabels) > 0 else 0
+
+		indicator = (groupLabels[:, np.newaxis] == np.arange(0, numGroups)).astype(float)
+
+		self.numSamples = len(groupLabels)
+		self.groupSizes = indicator.sum(axis=0)
+
+		if self.numSamples > 0:
+			self.grandMeans = values.mean(axis=1)
+		else:
+			self.grandMeans = np.zeros(values.shape[0])
+
+		self.groupSums = np.dot(values, indicator)
+		with np.errstate(invalid='ignore', divide='ignore'):
+			means = self.groupSums / self.groupSizes
+
+		deviations = values - means[:, groupLabels]
+		self.groupSumSqrDevs = np.dot(deviations*deviations, indicator)
+
+	def subset(self, rows):
+		'''
+		Summary statistics of the features with the given indices.
+		'''
+		groupStats = copy.copy(self)
+		for attr in ['grandMeans', 'groupSums', 'groupSumSqrDevs']:
+			setattr(groupStats, attr, getattr(self, attr)[rows])
+		return groupStats
+
+	def groupMeans(self):
+		'''
+		Mean of each group (features x groups). Empty groups have a mean of NaN.
+		'''
+		with np.errstate(invalid='ignore', divide='ignore'):
+			return self.groupSums / self.groupSizes
+
+	def groupVariances(self):
+		'''
+		Unbiased variance of each group (features x groups). Groups with less than 2 samples have a variance of NaN.
+		'''
+		with np.errstate(invalid='ignore', divide='ignore'):
+			return np.where(self.groupSizes >= 2, self.groupSumSqrDevs / (self.groupSizes - 1), np.nan)
+
+	def sumOfSquares(self):
+		'''
+		Between group, within group, and total sum of squares of each feature.
+		'''
+		meanDiff = np.where(self.groupSizes > 0, self.groupMeans() - self.grandMeans[:, np.newaxis], 0)
+
+		betweenSS = (self.groupSizes * meanDiff*meanDiff).sum(axis=1)
+		withinSS = self.groupSumSqrDevs.sum(axis=1)
+		totalSS = betweenSS + withinSS
+
+		return betweenSS, withinSS, totalSS
@@ -0,0 +1,107 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Monte Carlo estimation of p-values with optional sequential stopping.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import numpy as np
+from scipy import special
+
+# number of replicates drawn for all features before any feature is stopped
+INITIAL_REPLICATES = 100
+
+# a feature is stopped once the lower bound of a one-sided Clopper-Pearson confidence interval on 
+# the p-value of each tail exceeds the significance level. This is the probability of stopping a 
+# tail whose p-value is at the significance level.
+STOPPING_ERROR = 1e-3
+
+# maximum number of values held in memory at once when drawing replicates
+MAX_BLOCK_SIZE = 2**22
+
+def replicateRounds(replicates, bAdaptive):
+	'''
+	Ranges of replicates drawn in each round. With sequential stopping the
+	number of replicates drawn in each round doubles.
+	'''
+	if not bAdaptive:
+		return [(0, replicates)]
+		
+	rounds = []
+	start = 0
+	size = INITIAL_REPLICATES
+	while start < replicates:
+		end = min(start + size, replicates)
+		rounds.append((start, end))
+		size = end
+		start = end
+		
+	return rounds
+
+def pValueLowerBound(counts, replicates):
+	'''
+	Lower bound of a one-sided Clopper-Pearson confidence interval on the p-value estimated from 
+	the given number of replicates falling in the tail.
+	'''
+	counts = np.asarray(counts, dtype=float)
+	return np.where(counts > 0, special.betaincinv(np.maximum(counts, 1), replicates - counts + 1, STOPPING_ERROR), 0.0)
+
+def tailCounts(numFeatures, numTails, replicates, countReplicates, bAdaptive = False, alpha = 0.05, replicateSize = 1, maxBlockSize = MAX_BLOCK_SIZE, progress = None):
+	'''
+	Count replicates with a statistic at least as extreme as the observed statistic of each feature.
+	
+	countReplicates(indices, start, end) must return an array with a row for each of the numTails
+	tails of interest giving, for each of the specified features, the number of replicates in the range 
+	[start, end) falling in the tail. Features are processed in chunks so at most maxBlockSize 
+	values are held in memory, where each replicate of a feature requires replicateSize values.
+	
+	With sequential stopping no further replicates are drawn for a feature once the p-value of 
+	every tail is confidently above the significance level alpha. Features which may be significant 
+	are given the full number of replicates.
+	
+	Returns the tail counts and number of replicates drawn for each feature, or None, None
+	if the progress dialog was canceled.
+	'''
+	counts = np.zeros((numTails, numFeatures), dtype=int)
+	replicatesUsed = np.zeros(numFeatures, dtype=int)
+	
+	active = np.arange(0, numFeatures)
+	for start, end in replicateRounds(replicates, bAdaptive):
+		if progress != None:
+			progress.setValue(start)
+			if progress.wasCanceled():
+				return None, None
+				
+		chunkSize = max(1, maxBlockSize / ((end - start)*replicateSize))
+		for chunkStart in xrange(0, len(active), chunkSize):
+			indices = active[chunkStart:chunkStart + chunkSize]
+			
+			counts[:, indices] += countReplicates(indices, start, end)
+			
+		replicatesUsed[active] = end
+		
+		if bAdaptive:
+			active = active[pValueLowerBound(counts[:, active].min(axis=0), end) <= alpha]
+			if len(active) == 0:
+				break
+				
+	if progress != None:
+		progress.setValue(replicates)
+				
+	return counts, replicatesUsed
@@ -22,6 +22,9 @@
 #=======================================================================
 
 from stamp.metagenomics import TableHelper
+from stamp.metagenomics.stats.ParallelStats import workerProcesses, picklablePreferences, featureChunks, runParallel
+from stamp.metagenomics.stats.RandomStreams import randomSeed
+from stamp.metagenomics.stats.GroupSummaryStats import GroupSummaryStats, groupMatrix
 
 from numpy import mean, std
 
@@ -60,6 +63,11 @@ class MultiGroupStatTestResults(object):
 		self.multCompCorrectionInfo = ''
 		self.postHocResults = PostHocResults()
 		
+		# post-hoc results of each feature indexed by feature name along with the
+		# post-hoc test and coverage used to calculate these results
+		self.postHocTable = {}
+		self.postHocTableSettings = None
+		
 		self.tableHeadings = []
 		
 		self.preferences = preferences
@@ -257,32 +265,60 @@ class MultiGroupStatsTests(object):
 	def __init__(self, preferences):
 		self.results = MultiGroupStatTestResults(preferences)
 		self.preferences = preferences
+		
+		# proportions and group summary statistics of all features used by batch post-hoc tests
+		self.featureIndex = {}
+		self.values = None
+		self.groupLabels = None
+		self.groupStats = None
 		 
 	def run(self, statTest, effectSizeMeasure, profile, progress = None):
 		self.results.data = []
 		self.results.test = statTest.name
 		self.results.profile = profile
+		self.results.postHocTable = {}
+		self.results.postHocTableSettings = None
 		
 		if progress == 'Verbose':
 			print '  Processing feature:'
 		 
-		index = 0
-		for feature in profile.getFeatures():
+		features = profile.getFeatures()
+		allData = []
+		for feature in features:
 			if progress == 'Verbose':
 					print '    ' + feature
-			elif progress != None:
-				if progress.wasCanceled():
-					self.results.data = []
-					return
-
-				index += 1
-				progress.setValue(index)
-								
+					
+			allData.append(profile.getActiveFeatureProportions(feature))
+			
+		self.featureIndex = dict([(feature, i) for i, feature in enumerate(features)])
+		self.values, self.groupLabels = groupMatrix(allData)
+		self.groupStats = GroupSummaryStats(self.values, self.groupLabels, len(profile.activeGroupNames))
+			
+		# calculate statistics
+		numWorkers = workerProcesses(self.preferences)
+		if numWorkers > 1 and len(features) > 1:
+			# process chunks of features in parallel
+			chunks = featureChunks(len(features), numWorkers)
+			workerPreferences = picklablePreferences(self.preferences)
+			chunkArgs = [(statTest.__class__, effectSizeMeasure.__class__, workerPreferences, allData[start:end]) for start, end in chunks]
+			chunkResults = runParallel(multiGroupStatisticsWorker, chunkArgs, [end - start for start, end in chunks], numWorkers, randomSeed(self.preferences), progress)
+			if chunkResults == None:
+				self.results.data = []
+				return
+				
+			statistics = []
+			for chunkStatistics in chunkResults:
+				statistics += chunkStatistics
+		else:
+			statistics = multiGroupStatistics(statTest, effectSizeMeasure, allData, progress)
+			if statistics == None:
+				self.results.data = []
+				return
+		index = len(features)
+				
+		for feature, (pValue, note, effectSize) in zip(features, statistics):
 			seqCount = profile.getActiveFeatureCounts(feature)
 			parentCount = profile.getActiveParentCounts(feature)
-			data = profile.getActiveFeatureProportions(feature)
-			pValue, note = statTest.hypothesisTest(data)
-			effectSize = effectSizeMeasure.run(data)
  
 			row = [feature, float(pValue), float(pValue), effectSize, note]
 			
@@ -329,25 +365,119 @@ class MultiGroupStatsTests(object):
 			index += 1
 			progress.setValue(index)
 			
-	def runPostHocTest(self, postHocTest, profile, selectedFeature, coverage):
+	def runPostHocTest(self, postHocTest, profile, selectedFeature, coverage, progress = None):
 		if selectedFeature == '':
 			self.results.postHocResults = PostHocResults()
 			return
 			
 		self.results.postHocTest = postHocTest.name
 		
-		data = profile.getActiveFeatureProportions(selectedFeature)
-		pValues, effectSize, lowerCI, upperCI, labels, note = postHocTest.run(data, coverage, profile.activeGroupNames)
+		settings = (postHocTest.name, coverage, tuple(profile.activeGroupNames))
+		if settings != self.results.postHocTableSettings:
+			self.results.postHocTable = {}
+			self.results.postHocTableSettings = settings
 		
-		self.results.postHocResults.feature = selectedFeature
-		self.results.postHocResults.alpha = 1.0 - coverage
-		self.results.postHocResults.labels = labels
-		self.results.postHocResults.pValues = pValues
-		self.results.postHocResults.effectSizes = effectSize
-		self.results.postHocResults.lowerCIs = lowerCI
-		self.results.postHocResults.upperCIs = upperCI
-		self.results.postHocResults.note = note
-
-
+		if selectedFeature not in self.results.postHocTable:
+			# run post-hoc test on the selected feature along with all significant active features (i.e.,
+			# those chosen by the user and passing all filters) not already in the table, in order of 
+			# significance so the most significant are available if the test is canceled
+			alpha = 1.0 - coverage
+			activeFeatures = self.results.getActiveFeatures()
+			activePValues = self.results.getColumn('pValuesCorrected', True)
+			significantFeatures = [feature for pValue, feature in sorted(zip(activePValues, activeFeatures)) if pValue <= alpha]
+			
+			features = [selectedFeature]
+			for feature in significantFeatures:
+				if feature not in self.results.postHocTable and feature not in features:
+					features.append(feature)
+					
+			self.runPostHocTestAll(postHocTest, profile, features, coverage, progress)
+			
+		self.results.postHocResults = self.results.postHocTable[selectedFeature]
+		
+	def runPostHocTestAll(self, postHocTest, profile, features, coverage, progress = None):
+		'''
+		Run post-hoc test on the specified features and add the results to the post-hoc table. Features
+		are processed in chunks so progress is reported and canceling is checked between chunks. Results
+		of chunks completed before the test is canceled are kept.
+		'''
+		if progress != None and progress != 'Verbose':
+			progress.setMaximum(len(features))
+			
+		bBatch = not postHocTest.bSingleFeatureInterface and len([f for f in features if f not in self.featureIndex]) == 0
+		for start, end in featureChunks(len(features), 1):
+			if bBatch:
+				# reuse the proportions and group summary statistics calculated for the statistical test
+				rows = [self.featureIndex[feature] for feature in features[start:end]]
+				pValues, effectSizes, lowerCIs, upperCIs, labels, notes = postHocTest.runAll(self.values[rows], self.groupLabels, coverage, profile.activeGroupNames, self.groupStats.subset(rows))
+				
+				for i, feature in enumerate(features[start:end]):
+					self.addPostHocResults(feature, coverage, labels, pValues[i].tolist(), effectSizes[i].tolist(), lowerCIs[i].tolist(), upperCIs[i].tolist(), notes[i])
+			else:
+				for feature in features[start:end]:
+					data = profile.getActiveFeatureProportions(feature)
+					pValues, effectSizes, lowerCIs, upperCIs, labels, note = postHocTest.run(data, coverage, profile.activeGroupNames)
+					self.addPostHocResults(feature, coverage, labels, pValues, effectSizes, lowerCIs, upperCIs, note)
+					
+			if progress != None and progress != 'Verbose':
+				progress.setValue(end)
+				if progress.wasCanceled():
+					return
+			
+	def addPostHocResults(self, feature, coverage, labels, pValues, effectSizes, lowerCIs, upperCIs, note):
+		postHocResults = PostHocResults()
+		postHocResults.feature = feature
+		postHocResults.alpha = 1.0 - coverage
+		postHocResults.labels = labels
+		postHocResults.pValues = pValues
+		postHocResults.effectSizes = effectSizes
+		postHocResults.lowerCIs = lowerCIs
+		postHocResults.upperCIs = upperCIs
+		postHocResults.note = note
+		
+		self.results.postHocTable[feature] = postHocResults
 
+def multiGroupStatistics(statTest, effectSizeMeasure, allData, progress = None):
+	'''
+	Calculate p-value and effect size of features with the given proportions. Returns a list 
+	with the statistics of each feature or None if the progress dialog was canceled.
+	'''
+	statistics = []
+	for start, end in featureChunks(len(allData), 1):
+		# process a chunk of features at once with tests and effect size measures which support 
+		# this so progress is reported and canceling is checked between chunks
+		if not statTest.bSingleFeatureInterface or not effectSizeMeasure.bSingleFeatureInterface:
+			values, groupLabels = groupMatrix(allData[start:end])
+			
+		if not statTest.bSingleFeatureInterface:
+			pValues, notes = statTest.hypothesisTestAll(values, groupLabels)
+			
+		if not effectSizeMeasure.bSingleFeatureInterface:
+			effectSizes = effectSizeMeasure.runAll(values, groupLabels)
+		
+		for i in xrange(start, end):
+			if progress != None and progress != 'Verbose':
+				if progress.wasCanceled():
+					return None
 
+				progress.setValue(i+1)
+				
+			if statTest.bSingleFeatureInterface:
+				pValue, note = statTest.hypothesisTest(allData[i])
+			else:
+				pValue, note = pValues[i-start], notes[i-start]
+				
+			if effectSizeMeasure.bSingleFeatureInterface:
+				effectSize = effectSizeMeasure.run(allData[i])
+			else:
+				effectSize = float(effectSizes[i-start])
+				
+			statistics.append((pValue, note, effectSize))
+		
+	return statistics
+	
+def multiGroupStatisticsWorker(statTestClass, effectSizeMeasureClass, preferences, allData):
+	'''
+	Calculate statistics for a chunk of features in a worker process.
+	'''
+	return multiGroupStatistics(statTestClass(preferences), effectSizeMeasureClass(preferences), allData)
@@ -0,0 +1,105 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Calculate statistics for chunks of features in parallel.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import math
+import random
+import pickle
+import multiprocessing
+
+import numpy as np
+
+from stamp.metagenomics.stats.RandomStreams import randomStream
+
+# number of chunks assigned to each worker process so work is balanced and 
+# progress is reported regularly
+CHUNKS_PER_WORKER = 8
+
+def workerProcesses(preferences):
+	'''
+	Number of worker processes to use for calculating statistics.
+	'''
+	return max(1, int(preferences.get('Worker processes', 1)))
+
+def picklablePreferences(preferences):
+	'''
+	Copy of preferences containing only those entries which can be sent to a worker process.
+	'''
+	workerPreferences = {}
+	for key, value in preferences.iteritems():
+		try:
+			pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+		except Exception:
+			continue
+			
+		workerPreferences[key] = value
+		
+	return workerPreferences
+
+def featureChunks(numFeatures, numWorkers):
+	'''
+	Split features into consecutive chunks given as (start, end) index pairs.
+	'''
+	chunkSize = max(1, int(math.ceil(float(numFeatures) / (numWorkers*CHUNKS_PER_WORKER))))
+	return [(start, min(start + chunkSize, numFeatures)) for start in xrange(0, numFeatures, chunkSize)]
+
+def runChunk(args):
+	worker, seed, chunkIndex, workerArgs = args
+	
+	# plugins should draw random numbers from their own streams, but the global generators are
+	# also seeded for each chunk as forked processes otherwise share the state of their parent
+	rng = randomStream(seed, 'chunk', chunkIndex)
+	random.seed(rng.randint(0, 2**31 - 1))
+	np.random.seed(rng.randint(0, 2**31 - 1))
+	
+	return worker(*workerArgs)
+
+def runParallel(worker, chunkArgs, chunkSizes, numWorkers, seed, progress = None, index = 0):
+	'''
+	Evaluate worker(*args) for the arguments of each chunk using a pool of worker processes. 
+	
+	Worker must be a module level function. Results are returned in the order of the chunks. 
+	Progress is advanced by the size of each chunk as it completes and None is returned if 
+	the progress dialog is canceled. The global random number generators used by each chunk 
+	are seeded from the run seed and index of the chunk.
+	'''
+	pool = multiprocessing.Pool(numWorkers)
+	try:
+		results = []
+		for chunkSize, result in zip(chunkSizes, pool.imap(runChunk, [(worker, seed, chunkIndex, args) for chunkIndex, args in enumerate(chunkArgs)])):
+			results.append(result)
+			
+			if progress != None and progress != 'Verbose':
+				index += chunkSize
+				progress.setValue(index)
+				if progress.wasCanceled():
+					pool.terminate()
+					return None
+					
+		pool.close()
+	except:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+		
+	return results
@@ -0,0 +1,65 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Reproducible streams of random numbers.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import hashlib
+
+import numpy as np
+
+# seed used when no seed has been specified in the preferences
+DEFAULT_SEED = 1
+
+def randomSeed(preferences):
+	'''
+	Seed for all random numbers drawn during a run.
+	'''
+	return int(preferences.get('Random seed', DEFAULT_SEED))
+
+def randomStream(seed, *key):
+	'''
+	Random number generator for the stream identified by the given key.
+	
+	The key should identify the quantity being estimated (e.g., the counts of a feature and 
+	the range of replicates being drawn) so the same random numbers are used for it no matter 
+	how features are divided between chunks or processes. Streams with different keys are 
+	seeded independently.
+	'''
+	keyWords = np.frombuffer(hashlib.sha1(repr(key)).digest(), dtype='<u4')
+	return np.random.RandomState(np.concatenate(([seed & 0xffffffff], keyWords)).astype(np.uint32))
+
+def uniqueKeys(keys):
+	'''
+	Position of the first occurrence of each distinct key along with the index of the distinct
+	key for every key. Keys must be hashable.
+	'''
+	firstPositions = []
+	keyIndices = np.empty(len(keys), dtype=int)
+	keyIndex = {}
+	for pos, key in enumerate(keys):
+		index = keyIndex.get(key)
+		if index == None:
+			index = len(firstPositions)
+			keyIndex[key] = index
+			firstPositions.append(pos)
+		keyIndices[pos] = index
+		
+	return firstPositions, keyIndices
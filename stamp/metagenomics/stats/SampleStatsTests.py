@@ -22,6 +22,12 @@
 #=======================================================================
 
 from stamp.metagenomics import TableHelper
+from stamp.metagenomics.stats.ParallelStats import workerProcesses, picklablePreferences, featureChunks, runParallel
+from stamp.metagenomics.stats.RandomStreams import randomSeed
+from stamp.metagenomics.stats.StatisticsCache import StatisticsCache, resultPreferences
+
+# statistics of contingency tables calculated during this session
+statisticsCache = StatisticsCache()
 
 class SampleStatTestResults(object):
 	'''
@@ -48,6 +54,7 @@ class SampleStatTestResults(object):
 		self.dataHeadings['LowerCI'] = 10
 		self.dataHeadings['UpperCI'] = 11
 		self.dataHeadings['Note'] = 12
+		self.dataHeadings['Replicates'] = 13
 
 		self.alpha = 0
 		self.beta = 0.2
@@ -172,6 +179,7 @@ class SampleStatTestResults(object):
 		self.tableHeadings += [oneMinAlphaStr + '% lower CI']
 		self.tableHeadings += [oneMinAlphaStr + '% upper CI']
 		self.tableHeadings += ['Note']
+		self.tableHeadings += ['Replicates']
 	
 	def contingencyTable(self, bActiveFeaturesOnly = False):
 		if self.profile == None:
@@ -294,6 +302,7 @@ class SampleStatsTests(object):
 	
 	def __init__(self, preferences):
 		self.results = SampleStatTestResults(preferences)
+		self.preferences = preferences
 		 
 	def run(self, statTest, testType, confIntervMethod, coverage, profile, progress = None):
 		self.results.test = statTest.name
@@ -307,21 +316,77 @@ class SampleStatsTests(object):
 		 
 		self.results.data = []
 		index = 0
-		for feature in profile.getFeatures():
+		
+		features = profile.getFeatures()
+		seqs1 = []
+		seqs2 = []
+		parentSeqs1 = []
+		parentSeqs2 = []
+		for feature in features:
+			seq1, seq2, parentSeq1, parentSeq2 = profile.getTableData(feature)
+			seqs1.append(seq1)
+			seqs2.append(seq2)
+			parentSeqs1.append(parentSeq1)
+			parentSeqs2.append(parentSeq2)
+			
+		# calculate statistics once for each distinct contingency table which is not in the cache
+		if self.preferences.get('Cache statistical results', False):
+			statisticsCache.load()
+			
+		settingsKey = (statTest.name, confIntervMethod.name, coverage) + resultPreferences(self.preferences)
+		tableKeys = [settingsKey + (seqs1[i], seqs2[i], parentSeqs1[i], parentSeqs2[i]) for i in xrange(0, len(features))]
+		
+		tableStatistics = {}
+		uniqueIndices = []
+		for i, key in enumerate(tableKeys):
+			if key not in tableStatistics:
+				tableStatistics[key] = statisticsCache.get(key)
+				if tableStatistics[key] == None:
+					uniqueIndices.append(i)
+					
+		uniqueSeqs1 = [seqs1[i] for i in uniqueIndices]
+		uniqueSeqs2 = [seqs2[i] for i in uniqueIndices]
+		uniqueParentSeqs1 = [parentSeqs1[i] for i in uniqueIndices]
+		uniqueParentSeqs2 = [parentSeqs2[i] for i in uniqueIndices]
+		
+		numWorkers = workerProcesses(self.preferences)
+		if numWorkers > 1 and len(uniqueIndices) > 1:
+			# process chunks of features in parallel
+			chunks = featureChunks(len(uniqueIndices), numWorkers)
+			workerPreferences = picklablePreferences(self.preferences)
+			chunkArgs = [(statTest.__class__, confIntervMethod.__class__, workerPreferences, coverage, 
+										uniqueSeqs1[start:end], uniqueSeqs2[start:end], uniqueParentSeqs1[start:end], uniqueParentSeqs2[start:end]) for start, end in chunks]
+			chunkResults = runParallel(sampleStatisticsWorker, chunkArgs, [end - start for start, end in chunks], numWorkers, randomSeed(self.preferences), progress)
+			if chunkResults == None:
+				self.results.data = []
+				return
+				
+			uniqueStatistics = []
+			for chunkStatistics in chunkResults:
+				uniqueStatistics += chunkStatistics
+		else:
+			uniqueStatistics = sampleStatistics(statTest, confIntervMethod, coverage, uniqueSeqs1, uniqueSeqs2, uniqueParentSeqs1, uniqueParentSeqs2, progress)
+			if uniqueStatistics == None:
+				self.results.data = []
+				return
+				
+		for i, tableStatistic in zip(uniqueIndices, uniqueStatistics):
+			tableStatistics[tableKeys[i]] = tableStatistic
+			statisticsCache.put(tableKeys[i], tableStatistic)
+			
+		statistics = [tableStatistics[key] for key in tableKeys]
+		index = len(features)
+		
+		for i, feature in enumerate(features):
 			if progress == 'Verbose':
 				print '    ' + feature
-			elif progress != None:
-				if progress.wasCanceled():
-					self.results.data = []
-					return
 
-				index += 1
-				progress.setValue(index)
-
-			seq1, seq2, parentSeq1, parentSeq2 = profile.getTableData(feature)
-
-			# Difference between proportions test
-			pValueOneSided, pValueTwoSided, note = statTest.hypothesisTest(seq1, seq2, parentSeq1, parentSeq2)
+			seq1 = seqs1[i]
+			seq2 = seqs2[i]
+			parentSeq1 = parentSeqs1[i]
+			parentSeq2 = parentSeqs2[i]
+			
+			pValueOneSided, pValueTwoSided, lowerCI, upperCI, effectSize, note, replicates = statistics[i]
 			
 			if testType == 'One-sided':
 				pValue = pValueOneSided
@@ -329,20 +394,11 @@ class SampleStatsTests(object):
 				pValue = pValueTwoSided
 			else:
 				print 'Error: Unknown test type.'
-			
-			# Confidence interval
-			lowerCI, upperCI, effectSize, ciNote = confIntervMethod.run(seq1, seq2, parentSeq1, parentSeq2, coverage)
-			
-			if ciNote != '':
-				if note != '':
-					note += '; ' + ciNote
-				else:
-					note = ciNote
  
 			self.results.data.append([feature,seq1,seq2,parentSeq1,parentSeq2,
 															(float(seq1))/max(parentSeq1,1) * 100, (float(seq2))/max(parentSeq2,1) * 100,\
 															float(pValue),float(pValue),\
-															float(effectSize),float(lowerCI),float(upperCI), note])
+															float(effectSize),float(lowerCI),float(upperCI), note, replicates])
 															
 		self.results.createTableHeadings(profile.sampleNames[0], profile.sampleNames[1])
 										
@@ -353,5 +409,64 @@ class SampleStatsTests(object):
 		if progress != None and progress != 'Verbose':
 			index += 1
 			progress.setValue(index)
+			
+def sampleStatistics(statTest, confIntervMethod, coverage, seqs1, seqs2, parentSeqs1, parentSeqs2, progress = None):
+	'''
+	Calculate p-values and confidence intervals for features with the given counts. Returns 
+	a list with the statistics of each feature or None if the progress dialog was canceled.
+	'''
+	# resampling tests stop drawing replicates for features confidently above the significance level
+	statTest.alpha = 1.0 - coverage
+	
+	statistics = []
+	for start, end in featureChunks(len(seqs1), 1):
+		# process a chunk of features at once with tests and CI methods which support this so
+		# progress is reported and canceling is checked between chunks
+		if not statTest.bSingleFeatureInterface:
+			pValuesOneSided, pValuesTwoSided, notes = statTest.hypothesisTestAll(seqs1[start:end], seqs2[start:end], parentSeqs1[start:end], parentSeqs2[start:end])
+			replicatesUsed = statTest.replicatesUsed
+			
+		if not confIntervMethod.bSingleFeatureInterface:
+			lowerCIs, upperCIs, effectSizes, ciNotes = confIntervMethod.runAll(seqs1[start:end], seqs2[start:end], parentSeqs1[start:end], parentSeqs2[start:end], coverage)
+		
+		for i in xrange(start, end):
+			if progress != None and progress != 'Verbose':
+				if progress.wasCanceled():
+					return None
+
+				progress.setValue(i+1)
 
+			seq1 = seqs1[i]
+			seq2 = seqs2[i]
+			parentSeq1 = parentSeqs1[i]
+			parentSeq2 = parentSeqs2[i]
+
+			# Difference between proportions test
+			if statTest.bSingleFeatureInterface:
+				pValueOneSided, pValueTwoSided, note = statTest.hypothesisTest(seq1, seq2, parentSeq1, parentSeq2)
+				replicates = 0
+			else:
+				pValueOneSided, pValueTwoSided, note = pValuesOneSided[i-start], pValuesTwoSided[i-start], notes[i-start]
+				replicates = replicatesUsed[i-start] if replicatesUsed != None else 0
+			
+			# Confidence interval
+			if confIntervMethod.bSingleFeatureInterface:
+				lowerCI, upperCI, effectSize, ciNote = confIntervMethod.run(seq1, seq2, parentSeq1, parentSeq2, coverage)
+			else:
+				lowerCI, upperCI, effectSize, ciNote = lowerCIs[i-start], upperCIs[i-start], effectSizes[i-start], ciNotes[i-start]
+			
+			if ciNote != '':
+				if note != '':
+					note += '; ' + ciNote
+				else:
+					note = ciNote
+					
+			statistics.append((pValueOneSided, pValueTwoSided, lowerCI, upperCI, effectSize, note, replicates))
+		
+	return statistics
 
+def sampleStatisticsWorker(statTestClass, confIntervMethodClass, preferences, coverage, seqs1, seqs2, parentSeqs1, parentSeqs2):
+	'''
+	Calculate statistics for a chunk of features in a worker process.
+	'''
+	return sampleStatistics(statTestClass(preferences), confIntervMethodClass(preferences), coverage, seqs1, seqs2, parentSeqs1, parentSeqs2)
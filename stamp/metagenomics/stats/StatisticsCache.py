@@ -0,0 +1,163 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Cache of statistics calculated for contingency tables.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import os
+import pickle
+from collections import OrderedDict
+
+# maximum number of results held in a cache
+MAX_ENTRIES = 200000
+
+# version of the saved statistics. This must be incremented whenever the algorithm used to calculate
+# statistics or the format of cached values changes so results saved by earlier versions are discarded.
+CACHE_VERSION = 2
+
+# preferences which affect the statistics calculated for a contingency table
+RESULT_PREFERENCES = ['Pseudocount', 'Replicates', 'Adaptive replicates', 'Random seed', 'Barnard nuisance steps']
+
+def resultPreferences(preferences):
+	'''
+	Values of all preferences which affect the statistics calculated for a contingency table.
+	'''
+	return tuple([preferences.get(name, None) for name in RESULT_PREFERENCES])
+
+class StatisticsCache(object):
+	'''
+	Least recently used cache of statistics.
+
+	Keys must identify everything the statistics depend on (e.g., the statistical test,
+	coverage of confidence intervals, relevant preferences, and contingency table). The
+	cache can be saved to disk so results are reused between sessions.
+	'''
+
+	def __init__(self, cacheFile = None, maxEntries = MAX_ENTRIES):
+		if cacheFile == None:
+			cacheFile = os.path.join(os.path.expanduser('~'), '.stamp', 'statistics_cache', 'statistics.pkl')
+		self.cacheFile = cacheFile
+		self.maxEntries = maxEntries
+
+		self.entries = OrderedDict()
+		self.bLoaded = False
+		self.bModified = False
+
+	def __len__(self):
+		return len(self.entries)
+
+	def get(self, key):
+		'''
+		Cached statistics for key or None if key is not in the cache.
+		'''
+		value = self.entries.pop(key, None)
+		if value != None:
+			# mark as most recently used
+			self.entries[key] = value
+		return value
+
+	def put(self, key, value):
+		'''
+		Add statistics to the cache, removing the least recently used entries if the cache is full.
+		'''
+		self.entries.pop(key, None)
+		self.entries[key] = value
+		while len(self.entries) > self.maxEntries:
+			self.entries.popitem(last=False)
+		self.bModified = True
+
+	def load(self):
+		'''
+		Add statistics saved in a previous session to the cache. The cache file is only read once.
+		'''
+		if self.bLoaded:
+			return
+		self.bLoaded = True
+
+		if not os.path.exists(self.cacheFile):
+			return
+
+		try:
+			fin = open(self.cacheFile, 'rb')
+			try:
+				version, entries = pickle.load(fin)
+			finally:
+				fin.close()
+		except:
+			# results which can not be read are simply calculated again
+			return
+
+		if version != CACHE_VERSION:
+			# results of an earlier version may differ from those calculated now
+			try:
+				os.remove(self.cacheFile)
+			except OSError:
+				pass
+			return
+
+		# entries of the current session are more recently used than saved entries
+		sessionEntries = self.entries
+		self.entries = OrderedDict()
+		for key, value in entries:
+			self.entries[key] = value
+		for key, value in sessionEntries.iteritems():
+			self.entries.pop(key, None)
+			self.entries[key] = value
+		while len(self.entries) > self.maxEntries:
+			self.entries.popitem(last=False)
+
+	def save(self):
+		'''
+		Save cached statistics to disk.
+		'''
+		if not self.bModified:
+			return
+
+		try:
+			cacheDir = os.path.dirname(self.cacheFile)
+			if not os.path.exists(cacheDir):
+				os.makedirs(cacheDir)
+
+			# write to temporary file so an incomplete cache is never read
+			fout = open(self.cacheFile + '.tmp', 'wb')
+			pickle.dump((CACHE_VERSION, self.entries.items()), fout, pickle.HIGHEST_PROTOCOL)
+			fout.close()
+
+			if os.path.exists(self.cacheFile):
+				os.remove(self.cacheFile)
+			os.rename(self.cacheFile + '.tmp', self.cacheFile)
+			self.bModified = False
+		except:
+			# cached statistics are simply calculated again in the next session
+			pass
+
+	def clear(self):
+		'''
+		Remove all cached statistics, including those saved to disk.
+		'''
+		self.entries = OrderedDict()
+		self.bModified = False
+
+		for f in [self.cacheFile, self.cacheFile + '.tmp']:
+			if os.path.exists(f):
+				try:
+					os.remove(f)
+				except OSError:
+					pass
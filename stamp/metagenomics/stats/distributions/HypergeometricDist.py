@@ -0,0 +1,84 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Hypergeometric distribution of 2x2 contingency tables with fixed margins.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import numpy as np
+from scipy import special
+
+# maximum number of tables considered at once when evaluating the distribution of many features
+MAX_TABLES = 2**20
+
+def logFactorialTable(n):
+	'''
+	Natural logarithm of k! for k = 0, ..., n.
+	'''
+	return special.gammaln(np.arange(0, n+1) + 1.0)
+
+def chunkFeatures(lengths, maxSize = MAX_TABLES):
+	'''
+	Split features into consecutive chunks whose total number of tables does not exceed maxSize.
+	A feature with more than maxSize tables is placed in a chunk by itself.
+	'''
+	chunks = []
+	start = 0
+	size = 0
+	for i, length in enumerate(lengths):
+		if size + length > maxSize and i > start:
+			chunks.append((start, i))
+			start = i
+			size = 0
+		size += length
+
+	if start < len(lengths):
+		chunks.append((start, len(lengths)))
+
+	return chunks
+
+def tableSupport(lower, upper):
+	'''
+	All values in the integer ranges [lower[i], upper[i]] concatenated together
+	along with the index i of the range each value belongs to.
+	'''
+	lengths = upper - lower + 1
+	offsets = np.cumsum(lengths) - lengths
+
+	feature = np.repeat(np.arange(0, len(lengths)), lengths)
+	values = np.arange(0, lengths.sum()) - offsets[feature] + lower[feature]
+
+	return feature, values
+
+def logPMF(logFactorial, a, r1, r2, c1, c2):
+	'''
+	Log probability of the 2x2 table with top-left entry a, row sums r1, r2, and column sums c1, c2.
+
+	Entries of the table are paired so tables related by swapping rows or columns
+	have identical probabilities.
+	'''
+	b = r1 - a
+	c = c1 - a
+	d = c2 - b
+
+	logMargins = (logFactorial[r1] + logFactorial[r2]) + (logFactorial[c1] + logFactorial[c2]) - logFactorial[r1+r2]
+	return logMargins - ((logFactorial[a] + logFactorial[d]) + (logFactorial[b] + logFactorial[c]))
+
+if __name__ == "__main__":
+	pass
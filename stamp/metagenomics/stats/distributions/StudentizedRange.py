@@ -0,0 +1,296 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Studentized range distribution calculated by numerical integration.
+#
+# See 'Algorithm AS 190: Probabilities and Upper Quantiles for the
+# Studentized Range' by Lund and Lund, Applied Statistics, 1983.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import numpy as np
+from scipy import special
+from scipy.interpolate import InterpolatedUnivariateSpline
+
+# Gauss-Legendre quadrature rule applied to each panel of an integral
+GAUSS_NODES, GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(16)
+
+# the range of k normal variables is tabulated for values in [0, MAX_RANGE] and
+# is assumed to never exceed larger values (probability < 1e-100)
+MAX_RANGE = 30.0
+RANGE_STEP = 0.02
+
+# probability of the scale variable falling outside the interval being integrated over
+SCALE_TAIL = 1e-20
+
+# number of panels used to integrate over the scale variable
+SCALE_PANELS = 16
+
+# maximum number of points evaluated at once when integrating over the scale variable
+MAX_POINTS = 2**20
+
+# maximum number of iterations used to find a quantile
+MAX_ITERATIONS = 100
+
+# number of points, equally spaced in 1/df over [0, 1], at which quantiles are tabulated
+QUANTILE_GRID_POINTS = 257
+
+def compositeGauss(lower, upper, panels):
+	'''
+	Nodes and weights for integrating over [lower, upper] with a Gauss-Legendre rule on equal
+	width panels. Bounds may be arrays, in which case a row of nodes is returned for each interval.
+	'''
+	lower = np.asarray(lower, dtype=float)[..., np.newaxis]
+	upper = np.asarray(upper, dtype=float)[..., np.newaxis]
+
+	width = (upper - lower) / panels
+	offsets = np.repeat(np.arange(0, panels), len(GAUSS_NODES))
+	nodes = np.tile(0.5*(GAUSS_NODES + 1.0), panels)
+	weights = np.tile(0.5*GAUSS_WEIGHTS, panels)
+
+	return lower + (offsets + nodes)*width, weights*width
+
+class RangeDistribution(object):
+	'''
+	Upper tail probability of the range of k independent standard normal variables.
+
+	The probability is tabulated once on a fine grid and interpolated with an interpolating
+	cubic spline over its logarithm.
+	'''
+
+	def __init__(self, k):
+		self.k = k
+
+		w = np.arange(0, MAX_RANGE + 0.5*RANGE_STEP, RANGE_STEP)
+		z, zWeights = compositeGauss(-9.0, 9.0 + 0.5*MAX_RANGE, 32)
+
+		# P(range > w) = k * integral of phi(z) * (Phi(z)^(k-1) - (Phi(z) - Phi(z-w))^(k-1)) dz,
+		# with the difference of powers calculated so small probabilities are accurate
+		phi = np.exp(-0.5*z*z) / np.sqrt(2*np.pi)
+		Phi = special.ndtr(z)
+		PhiShifted = special.ndtr(z[np.newaxis, :] - w[:, np.newaxis])
+
+		with np.errstate(divide='ignore', invalid='ignore'):
+			ratio = np.where(Phi > 0, PhiShifted / Phi, 1.0)
+			powerDiff = -Phi**(k-1) * np.expm1((k-1)*np.log1p(-np.minimum(ratio, 1.0)))
+			tail = k*np.dot(powerDiff, phi*zWeights)
+
+		tail[0] = 1.0
+		self.logTail = InterpolatedUnivariateSpline(w, np.log(np.maximum(tail, 1e-300)), k=3)
+
+	def sf(self, w):
+		w = np.asarray(w, dtype=float)
+		with np.errstate(invalid='ignore'):
+			p = np.exp(self.logTail(np.clip(w, 0, MAX_RANGE).ravel())).reshape(w.shape)
+			p = np.where(w >= MAX_RANGE, 0.0, p)
+		return np.where(np.isnan(w), np.nan, np.minimum(p, 1.0))
+
+def scaleQuadrature(df):
+	'''
+	Nodes (log s) and weights for integrating over the distribution of s = sqrt(chi2(df) / df)
+	for each degrees of freedom. The weights include the density of log s. Infinite degrees of
+	freedom have all nodes at s = 1.
+	'''
+	bInfinite = np.isinf(df)
+	if bInfinite.any():
+		x = np.zeros((len(df), SCALE_PANELS*len(GAUSS_NODES)))
+		weights = np.ones(x.shape) / x.shape[1]
+		if not bInfinite.all():
+			x[~bInfinite], weights[~bInfinite] = scaleQuadrature(df[~bInfinite])
+		return x, weights
+		
+	halfDF = 0.5*df
+
+	# bounds on s^2 where the Chernoff bound, P(chi2(df) / df <= z) <= (z*exp(1-z))^(df/2) for z < 1
+	# (and similarly for z > 1), gives a tail probability less than SCALE_TAIL
+	c = -np.exp(2*np.log(SCALE_TAIL)/df - 1.0)
+	lower = 0.5*np.log(-special.lambertw(c, 0).real)
+	upper = 0.5*np.log(-special.lambertw(c, -1).real)
+
+	x, weights = compositeGauss(lower, upper, SCALE_PANELS)
+
+	dfCol = df[:, np.newaxis]
+	logDensity = np.log(2.0) + (halfDF*np.log(halfDF) - special.gammaln(halfDF))[:, np.newaxis] + dfCol*x - 0.5*dfCol*np.exp(2*x)
+	weights = weights * np.exp(logDensity)
+
+	# normalize weights so the density integrates to exactly 1
+	weights /= weights.sum(axis=1)[:, np.newaxis]
+
+	return x, weights
+
+rangeDistributions = {}
+def rangeDistribution(k):
+	if k not in rangeDistributions:
+		rangeDistributions[k] = RangeDistribution(k)
+	return rangeDistributions[k]
+
+def sfQuadrature(q, rangeDist, x, weights):
+	'''
+	Integrate P(range > q*s) over the distribution of s given by nodes x and weights for each q.
+	'''
+	return np.clip((weights * rangeDist.sf(q[:, np.newaxis] * np.exp(x))).sum(axis=1), 0.0, 1.0)
+
+def sf(q, k, df):
+	'''
+	Probability that a studentized range statistic of k groups with df degrees of freedom
+	exceeds q. Both q and df may be arrays.
+	'''
+	q, df = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(df, dtype=float))
+	shape = q.shape
+	q = q.ravel()
+	df = df.ravel()
+
+	pValues = np.empty(len(q))
+	pValues.fill(np.nan)
+	if k < 2:
+		return pValues.reshape(shape)
+
+	bValid = ~(np.isnan(q) | np.isnan(df)) & (df > 0)
+	pValues[bValid & (q <= 0)] = 1.0
+	bValid &= (q > 0)
+
+	# quadrature rules are only calculated once for each unique df
+	rangeDist = rangeDistribution(k)
+	uniqueDF, dfIndices = np.unique(df[bValid], return_inverse=True)
+	validQ = q[bValid]
+	validP = np.empty(len(validQ))
+
+	chunkSize = max(1, MAX_POINTS / (SCALE_PANELS*len(GAUSS_NODES)))
+	for start in xrange(0, len(uniqueDF), chunkSize):
+		end = min(start + chunkSize, len(uniqueDF))
+		x, weights = scaleQuadrature(uniqueDF[start:end])
+
+		bChunk = (dfIndices >= start) & (dfIndices < end)
+		rows = dfIndices[bChunk] - start
+		validP[bChunk] = sfQuadrature(validQ[bChunk], rangeDist, x[rows], weights[rows])
+
+	pValues[bValid] = validP
+
+	return pValues.reshape(shape)
+
+def cdf(q, k, df):
+	'''
+	Probability that a studentized range statistic of k groups with df degrees of freedom
+	is at most q. Both q and df may be arrays.
+	'''
+	return 1.0 - sf(q, k, df)
+
+def solveQuantiles(alpha, k, df):
+	'''
+	Critical values q with an upper tail probability of alpha for each of the given degrees of
+	freedom, found by the Illinois variant of the false position method applied to log(sf) as a 
+	function of log(q).
+	'''
+	rangeDist = rangeDistribution(k)
+	quantiles = np.empty(len(df))
+
+	chunkSize = max(1, MAX_POINTS / (SCALE_PANELS*len(GAUSS_NODES)))
+	for start in xrange(0, len(df), chunkSize):
+		end = min(start + chunkSize, len(df))
+		x, weights = scaleQuadrature(df[start:end])
+
+		logSF = lambda u: np.log(np.maximum(sfQuadrature(np.exp(u), rangeDist, x, weights), 1e-300)) - np.log(alpha)
+
+		lower = np.ones(end - start) * np.log(1e-3)
+		upper = np.ones(end - start) * np.log(1e6)
+		fLower = logSF(lower)
+		fUpper = logSF(upper)
+		bLastUpper = np.zeros(end - start, dtype=bool)
+		bLastLower = np.zeros(end - start, dtype=bool)
+		for _ in xrange(0, MAX_ITERATIONS):
+			u = (lower*fUpper - upper*fLower) / (fUpper - fLower)
+			fu = logSF(u)
+
+			# replace the bound with the same sign and halve the value at the retained bound
+			# if the same bound has been replaced twice in a row
+			bUpper = (fu < 0)
+			fLower = np.where(bUpper & bLastUpper, 0.5*fLower, fLower)
+			fUpper = np.where(~bUpper & bLastLower, 0.5*fUpper, fUpper)
+			lower = np.where(bUpper, lower, u)
+			fLower = np.where(bUpper, fLower, fu)
+			upper = np.where(bUpper, u, upper)
+			fUpper = np.where(bUpper, fu, fUpper)
+			bLastUpper = bUpper
+			bLastLower = ~bUpper
+
+			if np.all(np.abs(fu) < 1e-12):
+				break
+		quantiles[start:end] = np.exp(u)
+
+	return quantiles
+
+class QuantileTable(object):
+	'''
+	Critical values of k groups at significance level alpha for any degrees of freedom of at
+	least 1. Quantiles are solved for once on a grid equally spaced in 1/df and interpolated with
+	a cubic spline over their logarithm, so each new degrees of freedom costs a spline evaluation.
+	'''
+
+	def __init__(self, k, alpha):
+		invDF = np.linspace(0, 1, QUANTILE_GRID_POINTS)
+		with np.errstate(divide='ignore'):
+			quantiles = solveQuantiles(alpha, k, 1.0 / invDF)
+		self.logQuantile = InterpolatedUnivariateSpline(invDF, np.log(quantiles), k=3)
+
+	def isf(self, df):
+		return np.exp(self.logQuantile(1.0 / df))
+
+quantileTables = {}
+def quantileTable(k, alpha):
+	if (k, alpha) not in quantileTables:
+		quantileTables[(k, alpha)] = QuantileTable(k, alpha)
+	return quantileTables[(k, alpha)]
+
+def isf(alpha, k, df):
+	'''
+	Critical value q with an upper tail probability of alpha for a studentized range statistic
+	of k groups with df degrees of freedom. The degrees of freedom may be an array.
+	'''
+	df = np.asarray(df, dtype=float)
+	shape = df.shape
+	df = df.ravel()
+
+	quantiles = np.empty(len(df))
+	quantiles.fill(np.nan)
+	if k < 2 or not (0 < alpha < 1):
+		return quantiles.reshape(shape)
+
+	# degrees of freedom of at least 1 are interpolated from tabulated quantiles
+	bTable = ~np.isnan(df) & (df >= 1)
+	if bTable.any():
+		quantiles[bTable] = quantileTable(k, alpha).isf(df[bTable])
+
+	# smaller degrees of freedom, where quantiles grow rapidly, are solved for directly
+	bSolve = ~np.isnan(df) & (df > 0) & (df < 1)
+	if bSolve.any():
+		uniqueDF, dfIndices = np.unique(df[bSolve], return_inverse=True)
+		quantiles[bSolve] = solveQuantiles(alpha, k, uniqueDF)[dfIndices]
+
+	return quantiles.reshape(shape)
+
+def ppf(p, k, df):
+	'''
+	Critical value q with a cumulative probability of p for a studentized range statistic
+	of k groups with df degrees of freedom. The degrees of freedom may be an array.
+	'''
+	return isf(1.0 - p, k, df)
+
+if __name__ == "__main__":
+	print isf(0.05, 3, 10)	# 3.877
+	print sf(3.877, 3, 10)	# 0.05
@@ -36,9 +36,9 @@ approach. Journal of the Royal Statistical Society, Series B, 66:187-205.
 '''
 
 from stamp.plugins.common.AbstractMultCompCorrection import AbstractMultCompCorrection
+from stamp.metagenomics.stats.RandomStreams import randomSeed, randomStream
 
-import numpy
-import scipy
+import numpy as np
 
 class StoreyFDR(AbstractMultCompCorrection):
   
@@ -48,64 +48,54 @@ class StoreyFDR(AbstractMultCompCorrection):
     self.method = 'False discovery rate'
     self.bCorrectedValues = True
     self.numSignFeatures = 0
+    self.preferences = preferences
     
   def correct(self, pValues, alpha):   
+    pValues = np.asarray(pValues, dtype=float)
     numPvalues = len(pValues)
+    if numPvalues == 0:
+      self.numSignFeatures = 0
+      self.estimated_pi0_hat = 1.0
+      return []
 
+    # p-values are sorted once so the number of p-values above each lambda can be found with
+    # a binary search
+    order = np.argsort(pValues, kind='mergesort')
+    sortedPvalues = pValues[order]
+
+    testPts = np.arange(0.0, 0.951, 0.05)
+    numBelow = np.searchsorted(sortedPvalues, testPts, side='right')
+    
     # Find minimum pi0_hat value (i.e. proportion of features that are truly null)
-    testPts = scipy.arange(0.0, 0.951, 0.05)
-    min_pi0_hat = 1
-    for testPt in testPts:
-      numerator = [pValue for pValue in pValues if pValue > testPt]
-      pi0 = float(len(numerator)) / (numPvalues*(1.0-testPt))
-      if pi0 < min_pi0_hat:
-        min_pi0_hat = pi0
+    pi0 = (numPvalues - numBelow) / (numPvalues*(1.0-testPts))
+    min_pi0_hat = min(pi0.min(), 1)
         
-    # Perform bootstrapping analyzes to estimate MSE of each pi0_hat
+    # Perform bootstrapping analyzes to estimate MSE of each pi0_hat. A bootstrap resample only
+    # matters through how many of its p-values fall between consecutive lambda values, so these
+    # counts are drawn directly from a multinomial distribution over the intervals between lambdas.
     bootstraps = 100
-    minMSE = 1e100
-    numpy.random.seed()
-    for testPt in testPts:
-      # calculate bootstrap pi0 values  
-      mse = 0
-      for dummy in xrange(0, bootstraps):
-        bootstrapPvalues = []
-        for i in xrange(0, numPvalues):
-          rnd = numpy.random.randint(0, numPvalues)
-          bootstrapPvalues.append(pValues[rnd])
-        
-        numerator = [pValue for pValue in bootstrapPvalues if pValue > testPt]
-        bootstrap_pi0_hat = float(len(numerator)) / (numPvalues*(1.0-testPt))
-        
-        mse += (bootstrap_pi0_hat - min_pi0_hat)**2
-        
-      mse /= bootstraps
-      
-      if mse < minMSE:
-        minMSE = mse
-        selectedLambda = testPt
+    rng = randomStream(randomSeed(self.preferences), self.name)
     
-    numerator = [pValue for pValue in pValues if pValue > selectedLambda]
-    self.estimated_pi0_hat = float(len(numerator)) / (numPvalues*(1.0-selectedLambda))
+    intervalSizes = np.diff(np.concatenate(([0], numBelow, [numPvalues])))
+    intervalCounts = rng.multinomial(numPvalues, intervalSizes / float(numPvalues), size=bootstraps)
     
-    # append an index identifier to each p-value
-    indexedList = []
-    index = 0
-    for value in pValues:
-      indexedList.append([value, index])
-      index += 1
-      
-    # sort p-values in descending order
-    indexedList.sort(reverse = True)
-
-    # calculate q-values
-    qValues = [None]*numPvalues
-    qValues[indexedList[0][1]] = (self.estimated_pi0_hat * indexedList[0][0])
+    # number of resampled p-values above each lambda (bootstraps x lambdas)
+    bootstrapAbove = np.cumsum(intervalCounts[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    bootstrap_pi0_hat = bootstrapAbove / (numPvalues*(1.0-testPts))
+    
+    mse = ((bootstrap_pi0_hat - min_pi0_hat)**2).mean(axis=0)
+    selectedLambda = np.argmin(mse)
+    
+    self.estimated_pi0_hat = float(pi0[selectedLambda])
+    
+    # calculate q-values as the reverse cumulative minimum of pi0*m*p/rank over the sorted p-values
+    ranks = np.arange(1, numPvalues+1)
+    sortedQvalues = np.minimum.accumulate((self.estimated_pi0_hat * numPvalues * sortedPvalues / ranks)[::-1])[::-1]
     
-    for i in xrange(1,len(pValues)):
-      qValues[indexedList[i][1]] =  min(self.estimated_pi0_hat*numPvalues*indexedList[i][0] / (numPvalues - i), qValues[indexedList[i-1][1]]) 
+    qValues = np.empty(numPvalues)
+    qValues[order] = sortedQvalues
   
-    self.numSignFeatures = len([x for x in qValues if x <= alpha])
+    self.numSignFeatures = int((qValues <= alpha).sum())
     
     if self.estimated_pi0_hat < 0.01:
       try:
@@ -114,7 +104,7 @@ class StoreyFDR(AbstractMultCompCorrection):
       except ImportError: 
         print 'Storey\'s FDR error: P-values do not appear to be uniformly distributed. Consider using the Benjamini-Hochberg FDR approach.'
         
-    return qValues
+    return qValues.tolist()
   
   def additionalInfo(self):
     return [['Number of significant features', self.numSignFeatures],
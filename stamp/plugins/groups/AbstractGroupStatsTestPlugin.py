@@ -31,6 +31,9 @@ class AbstractGroupStatsTestPlugin:
 		self.confIntervMethods = []	# list of CI methods supported by this test
 		
 		self.bSingleFeatureInterface = True
+		self.bPooledFeatures = False	# set to True if the statistics of a feature depend on the other features
+		
+		self.replicatesUsed = None	# replicates drawn for each feature by the last call to a resampling test
 	
 	def run(self, seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, confIntervMethod, coverage):
 		'''
@@ -21,9 +21,9 @@
 # along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
-import math
+import numpy as np
+
 from stamp.plugins.groups.AbstractGroupStatsTestPlugin import AbstractGroupStatsTestPlugin
-from numpy import var
 
 from scipy.stats.distributions import t
 
@@ -37,74 +37,73 @@ class Ttest(AbstractGroupStatsTestPlugin):
 		
 		self.name = "t-test (equal variance)"
 		self.confIntervMethods = ["DP: t-test inverted"]
+		self.bSingleFeatureInterface = False
 		
 	def run(self, seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, confIntervMethod, coverage):
-		note = ''
+		results = self.runAll([seqGroup1], [seqGroup2], [parentSeqGroup1], [parentSeqGroup2], confIntervMethod, coverage)
+		return tuple([float(statistic[0]) for statistic in results[0:5]]) + (results[5][0],)
 		
-		n1 = len(seqGroup1)
-		n2 = len(seqGroup2)
+	def runAll(self, seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, confIntervMethod, coverage, progress = None):
+		'''
+		Perform t-test on all features. Counts are given as features x samples matrices.
+		'''
+		numFeatures = len(seqGroup1)
+		n1 = len(seqGroup1[0]) if numFeatures > 0 else 0
+		n2 = len(seqGroup2[0]) if numFeatures > 0 else 0
 		
-		try:
-			if n1 < 2 or n2 < 2:
-				raise Exception('degenerate case: both groups must contain at least 2 samples')
-				
-			# calculate proportions
-			propGroup1 = []
-			for i in xrange(0, n1):
-				if parentSeqGroup1[i] > 0:
-					propGroup1.append(float(seqGroup1[i]) / parentSeqGroup1[i])
-				else:
-					propGroup1.append( 0.0 )
-					note = 'degenerate case: parent group had a count of zero'
-				
-			propGroup2 = []
-			for i in xrange(0, n2):
-				if parentSeqGroup2[i] > 0:
-					propGroup2.append(float(seqGroup2[i]) / parentSeqGroup2[i])
-				else:
-					propGroup2.append( 0.0 )
-					note = 'degenerate case: parent group had a count of zero'
-			
-			# calculate statistics
-			meanG1 = float(sum(propGroup1)) / n1
-			meanG2 = float(sum(propGroup2)) / n2
-			dp = meanG1 - meanG2
-			
-			varG1 = var(propGroup1, ddof=1)
-			varG2 = var(propGroup2, ddof=1)
-			
-			dof = n1 + n2 - 2
-			pooledVar = ((n1 - 1)*varG1 + (n2 - 1)*varG2) / (n1 + n2 - 2)
-			sqrtPooledVar = math.sqrt(pooledVar)
-			denom = sqrtPooledVar * math.sqrt(1.0/n1 + 1.0/n2)
-				
-			# p-value
-			T_statistic = (meanG1 - meanG2) / denom
-			pValue = t.cdf(T_statistic, dof)
+		if n1 < 2 or n2 < 2:
+			notes = ['degenerate case: both groups must contain at least 2 samples'] * numFeatures
+			return np.ones(numFeatures)*0.5, np.ones(numFeatures), np.zeros(numFeatures), np.zeros(numFeatures), np.zeros(numFeatures), notes
 			
-			# CI
-			tCritical = t.isf(0.5 * (1.0-coverage), dof) # 0.5 factor accounts from symmetric nature of distribution
-			lowerCI = dp - tCritical*denom
-			upperCI = dp + tCritical*denom
-
-		except Exception as note:
-			pValue = 0.5
-			lowerCI = 0.0
-			upperCI = 0.0
-			dp = 0.0
-		except ZeroDivisionError:
-			if meanG1 != meanG2:
-				pValue = 0.0 # the difference (at least according to these samples) must be true as there is no variance
+		seqGroup1 = np.asarray(seqGroup1, dtype=float)
+		seqGroup2 = np.asarray(seqGroup2, dtype=float)
+		parentSeqGroup1 = np.asarray(parentSeqGroup1, dtype=float)
+		parentSeqGroup2 = np.asarray(parentSeqGroup2, dtype=float)
+		
+		# calculate proportions (features x samples)
+		propGroup1 = np.where(parentSeqGroup1 > 0, seqGroup1 / np.where(parentSeqGroup1 > 0, parentSeqGroup1, 1.0), 0.0)
+		propGroup2 = np.where(parentSeqGroup2 > 0, seqGroup2 / np.where(parentSeqGroup2 > 0, parentSeqGroup2, 1.0), 0.0)
+		bZeroParent = (parentSeqGroup1 <= 0).any(axis=1) | (parentSeqGroup2 <= 0).any(axis=1)
+		
+		# calculate statistics
+		meanG1 = propGroup1.sum(axis=1) / n1
+		meanG2 = propGroup2.sum(axis=1) / n2
+		dp = meanG1 - meanG2
+		
+		varG1 = propGroup1.var(axis=1, ddof=1)
+		varG2 = propGroup2.var(axis=1, ddof=1)
+		
+		dof = n1 + n2 - 2
+		pooledVar = ((n1 - 1)*varG1 + (n2 - 1)*varG2) / (n1 + n2 - 2)
+		denom = np.sqrt(pooledVar) * np.sqrt(1.0/n1 + 1.0/n2)
+		
+		bZeroVar = (denom == 0)
+		
+		# p-value
+		T_statistic = dp / np.where(bZeroVar, 1.0, denom)
+		pValuesOneSided = t.sf(T_statistic, dof)
+		pValuesTwoSided = np.minimum(2 * t.sf(np.abs(T_statistic), dof), 1.0)
+		
+		# CI
+		tCritical = t.isf(0.5 * (1.0-coverage), dof) # 0.5 factor accounts from symmetric nature of distribution
+		lowerCIs = dp - tCritical*denom
+		upperCIs = dp + tCritical*denom
+		
+		# the difference (at least according to these samples) must be true if there is no variance
+		pValuesOneSided = np.where(bZeroVar, np.where(dp != 0, 1.0, 0.5), pValuesOneSided)
+		pValuesTwoSided = np.where(bZeroVar, np.where(dp != 0, 0.0, 1.0), pValuesTwoSided)
+		
+		notes = []
+		for bVar, bParent in zip(bZeroVar, bZeroParent):
+			if bVar:
+				notes.append('degenerate case: variance of both groups is zero')
+			elif bParent:
+				notes.append('degenerate case: parent group had a count of zero')
 			else:
-				pValue = 0.5
-				
-			lowerCI = dp
-			upperCI = dp
-			note = 'degenerate case: variance of both groups is zero'
+				notes.append('')
 
-		return 1.0 - pValue, 2*min(pValue, 1.0 - pValue), lowerCI*100, upperCI*100, dp*100, note
+		return pValuesOneSided, pValuesTwoSided, lowerCIs*100, upperCIs*100, dp*100, notes
 
 if __name__ == "__main__": 
-	tTest = Ttest()
+	tTest = Ttest({})
 	pValueOne, pValueTwo, lowerCI, upperCI, dp, note = tTest.run([5,4,6,4,3], [5,2,2,5,6,7], [10,10,10,10,10], [10,10,10,10,10,10], "DP: t-test inverted", 0.95)
-
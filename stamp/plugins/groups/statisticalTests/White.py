@@ -30,7 +30,7 @@
 
 import math
 
-from stamp.metagenomics.Bootstrap import bootstrapDiffOfMeanProp
+from stamp.metagenomics.Bootstrap import bootstrapDiffOfMeanPropAll
 from stamp.plugins.groups.AbstractGroupStatsTestPlugin import AbstractGroupStatsTestPlugin
 
 class White(AbstractGroupStatsTestPlugin):
@@ -48,8 +48,12 @@ class White(AbstractGroupStatsTestPlugin):
 		
 		self.bSingleFeatureInterface = False
 		
+		# the null distribution of the t-statistic is pooled across features
+		self.bPooledFeatures = True
+		
 	def runAll(self, seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, confIntervMethod, coverage, progress):
-		return detect_differentially_abundant_features(seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, coverage, self.preferences['Replicates'], self.preferences, progress)
+		pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs, effectSizes, notes, self.replicatesUsed = detect_differentially_abundant_features(seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, coverage, self.preferences['Replicates'], self.preferences, progress)
+		return pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs, effectSizes, notes
 
 
 
@@ -67,222 +71,207 @@ class White(AbstractGroupStatsTestPlugin):
 
 from stamp.plugins.samples.statisticalTests.Fishers import Fishers
 from stamp.plugins.samples.confidenceIntervalMethods.DiffBetweenPropAsymptoticCC import DiffBetweenPropAsymptoticCC
+from stamp.metagenomics.stats.MonteCarlo import tailCounts
+from stamp.metagenomics.stats.RandomStreams import randomSeed, randomStream
 
-from numpy import var
+import numpy as np
 
-import random
+# maximum number of proportions held in memory when calculating t-statistics for a block of permutations
+MAX_BLOCK_SIZE = 2**22
 
 # Perform non-parametric t-test proposed by White et al. (2009)
 #  -> B is the number of permutations to use in estimating the null t-stat distribution.
 def detect_differentially_abundant_features(seqGroup1, seqGroup2, parentSeqGroup1, parentSeqGroup2, coverage, B, preferences, progress):
-	numFeatures = len(seqGroup1)   
-	n1 = len(seqGroup1[0])
-	n2 = len(seqGroup2[0])
+	seqGroup1 = np.asarray(seqGroup1, dtype=float)
+	seqGroup2 = np.asarray(seqGroup2, dtype=float)
+	parentSeqGroup1 = np.asarray(parentSeqGroup1, dtype=float)
+	parentSeqGroup2 = np.asarray(parentSeqGroup2, dtype=float)
 	
-	# convert to proportions
-	propGroup1 = []
-	for r in xrange(0, numFeatures):
-		row = []
-		for c in xrange(0, n1):
-			row.append(float(seqGroup1[r][c]) / parentSeqGroup1[r][c])
-		propGroup1.append(row)
-			
-	propGroup2 = []
-	for r in xrange(0, numFeatures):
-		row = []
-		for c in xrange(0, n2):
-			row.append(float(seqGroup2[r][c]) / parentSeqGroup2[r][c])
-		propGroup2.append(row)
+	n1 = seqGroup1.shape[1]
+	n2 = seqGroup2.shape[1]
+	
+	# convert to proportions (features x samples)
+	propGroup1 = seqGroup1 / parentSeqGroup1
+	propGroup2 = seqGroup2 / parentSeqGroup2
 
 	# calculate t-statistics for unpooled variances for each feature
 	T_statistics, effectSizes, notes = calc_twosample_ts(propGroup1, propGroup2)
 
 	# generate statistics using non-parametric t-test based on permutations of the t-statistic
-	pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs = permuted_statistics(propGroup1, propGroup2, seqGroup1, seqGroup2, T_statistics, coverage, B, progress)
+	bAdaptive = preferences.get('Adaptive replicates', False)
+	rng = randomStream(randomSeed(preferences), "White's non-parametric t-test")
+	pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs, replicatesUsed = permuted_statistics(propGroup1, propGroup2, seqGroup1, seqGroup2, T_statistics, coverage, B, bAdaptive, rng, progress)
 	if progress != None and progress.wasCanceled():
-		return [], [], [], [], [], []
+		return [], [], [], [], [], [], []
 	
 	# generate p values for sparse data using fisher's exact test
-	fishers = Fishers(preferences)
-	diffBetweenProp = DiffBetweenPropAsymptoticCC(preferences)
-	for r in xrange(0, numFeatures):
-		if sum(seqGroup1[r]) < n1 and sum(seqGroup2[r]) < n2:
-			p1, p2, note = fishers.hypothesisTest(sum(seqGroup1[r]), sum(seqGroup2[r]), sum(parentSeqGroup1[r]), sum(parentSeqGroup2[r]))
-			l, u, es, note = diffBetweenProp.run(sum(seqGroup1[r]), sum(seqGroup2[r]), sum(parentSeqGroup1[r]), sum(parentSeqGroup2[r]), coverage)
-			pValuesOneSided[r] = p1 
-			pValuesTwoSided[r] = p2 
-			lowerCIs[r] = l
-			upperCIs[r] = u
-			effectSizes[r] = es
+	sparseIndices = np.nonzero((seqGroup1.sum(axis=1) < n1) & (seqGroup2.sum(axis=1) < n2))[0]
+	if len(sparseIndices) > 0:
+		seq1 = seqGroup1[sparseIndices].sum(axis=1)
+		seq2 = seqGroup2[sparseIndices].sum(axis=1)
+		parentSeq1 = parentSeqGroup1[sparseIndices].sum(axis=1)
+		parentSeq2 = parentSeqGroup2[sparseIndices].sum(axis=1)
+		
+		fishers = Fishers(preferences)
+		p1, p2, _ = fishers.hypothesisTestAll(seq1, seq2, parentSeq1, parentSeq2)
+		
+		diffBetweenProp = DiffBetweenPropAsymptoticCC(preferences)
+		l, u, es, _ = diffBetweenProp.runAll(seq1, seq2, parentSeq1, parentSeq2, coverage)
+		
+		for i, r in enumerate(sparseIndices):
+			pValuesOneSided[r] = p1[i]
+			pValuesTwoSided[r] = p2[i]
+			lowerCIs[r] = l[i]
+			upperCIs[r] = u[i]
+			effectSizes[r] = es[i]
 			notes[r] = "heuristic: statistics calculated with Fisher's test"
+			replicatesUsed[r] = 0
 
-	return pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs, effectSizes, notes 
+	return pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs, effectSizes, notes, replicatesUsed
 
 # Function to calculate permuted pvalues from Storey and Tibshirani(2003)
-def permuted_statistics(propGroup1, propGroup2, seqGroup1, seqGroup2, T_statistics, coverage, B, progress):
+def permuted_statistics(propGroup1, propGroup2, seqGroup1, seqGroup2, T_statistics, coverage, B, bAdaptive, rng, progress):
 	n1 = len(seqGroup1[0])
 	n2 = len(seqGroup2[0]) 
 	numSamples = n1 + n2
 	numFeatures = len(seqGroup1)
 	progressIndex = 0
 	
+	progressDlg = None
 	if progress != None and progress != 'Verbose':
-		progress.setMaximum(B + numFeatures)
-		progress.setLabelText('Calculating null distribution...')
+		progressDlg = progress
+		progressDlg.setMaximum(B + numFeatures)
+		progressDlg.setLabelText('Calculating null distribution...')
 	
 	# calculate null distribution of the t-statistics using B permutations
-	permuted_ttests = []
-	permuted_effectSizes = []
-	for j in xrange(0, B):  
-		if progress != None and progress != 'Verbose':
-			progressIndex += 1
-			progress.setValue(progressIndex)
-			if progress.wasCanceled():
-					return [], [], [], []
-					
-		trial_ts, trail_effectSizes, notes = permute_and_calc_ts(propGroup1, propGroup2, random.sample(xrange(numSamples), numSamples))
-		permuted_ttests.append(trial_ts)
-		
-	if progress != None:
-		progress.setLabelText('Calculating p-values...')
-		progress.setValue(0)
-		progressIndex = 0
-
-	# calculate each pvalue using the null ts
-	pValuesOneSided = []
-	pValuesTwoSided = []
+	permutations = np.argsort(rng.random_sample((B, numSamples)), axis=1)
+	props = np.hstack((propGroup1, propGroup2))
 
 	if n1 < 8 or n2 < 8:
+		# the null distribution is pooled across features so all permutations are required for every feature
+		blockSize = max(1, MAX_BLOCK_SIZE / max(numFeatures*numSamples, 1))
+		permuted_ttests = np.zeros((B, numFeatures))
+		for start in xrange(0, B, blockSize):
+			end = min(start + blockSize, B)
+			if progressDlg != None:
+				progressIndex = end
+				progressDlg.setValue(progressIndex)
+				if progressDlg.wasCanceled():
+						return [], [], [], [], []
+						
+			permuted_ttests[start:end] = permute_and_calc_ts(props, n1, permutations[start:end])
+			
+		if progressDlg != None:
+			progressDlg.setLabelText('Calculating p-values...')
+			progressDlg.setValue(0)
+			progressIndex = 0
+			
 		# pool just the frequently observed ts  
-		cleanedpermuted_ttests = permuted_ttests
-		highFreqIndices = []
-		for r in xrange(0, numFeatures): 
-			if sum(seqGroup1[r]) >= n1 or sum(seqGroup2[r]) >= n2:
-				highFreqIndices.append(r)
-				
-		if progress != None:
-			progress.setMaximum(highFreqIndices)
-			  
-		#now for each feature
-		pValuesOneSided = [0.0] * numFeatures
-		pValuesTwoSided = [0.0] * numFeatures
-		lowerCIs = [0.0] * numFeatures
-		upperCIs = [0.0] * numFeatures
-		for hfIndex in highFreqIndices:
-			if progress != None and progress != 'Verbose':
-				progressIndex += 1
-				progress.setValue(progressIndex)
-				if progress.wasCanceled():
-						return [], [], [], []
-					
-			oneTailed = 0
-			twoTailed = 0
-			for i in xrange(0, B):
-				for hfIndex2 in highFreqIndices: 
-					if cleanedpermuted_ttests[i][hfIndex2] > T_statistics[hfIndex]:
-						oneTailed += 1
-					if abs(cleanedpermuted_ttests[i][hfIndex2]) > abs(T_statistics[hfIndex]):
-						twoTailed += 1
+		highFreqIndices = np.nonzero((seqGroup1.sum(axis=1) >= n1) | (seqGroup2.sum(axis=1) >= n2))[0]
+		
+		pValuesOneSided = np.zeros(numFeatures)
+		pValuesTwoSided = np.zeros(numFeatures)
+		if len(highFreqIndices) > 0:
+			# sort pooled null distribution once so the number of permuted ts exceeding 
+			# each observed t-statistic can be found with a binary search
+			pooled = np.sort(permuted_ttests[:, highFreqIndices], axis=None)
+			pooledAbs = np.sort(np.abs(pooled))
+			numPooled = len(pooled)
+			
+			T_highFreq = T_statistics[highFreqIndices]
+			oneTailed = numPooled - np.searchsorted(pooled, T_highFreq, side='right')
+			twoTailed = numPooled - np.searchsorted(pooledAbs, np.abs(T_highFreq), side='right')
 
-			pValuesOneSided[hfIndex] = (1.0/(B*len(highFreqIndices))) * oneTailed
-			pValuesTwoSided[hfIndex] = (1.0/(B*len(highFreqIndices))) * twoTailed
-	else:
-		print 'blah'
-		if progress != None:
-			progress.setMaximum(numFeatures*B)
+			pValuesOneSided[highFreqIndices] = (1.0/numPooled) * oneTailed
+			pValuesTwoSided[highFreqIndices] = (1.0/numPooled) * twoTailed
 			
-		for r in xrange(0, numFeatures): 
-			oneTailed = 0
-			twoTailed = 0
-			for i in xrange(0, B):
-				if progress != None and progress != 'Verbose':
-					progressIndex += 1
-					progress.setValue(progressIndex)
-					if progress.wasCanceled():
-							return [], [], [], []
-						
-				if permuted_ttests[i][r] > T_statistics[r]:
-					oneTailed += 1
-				if abs(permuted_ttests[i][r]) > abs(T_statistics[r]):
-					twoTailed += 1
-					
-			p1 = (1.0/(B+1)) * (oneTailed+1)
-			pValuesOneSided.append(p1)
+		pValuesOneSided = pValuesOneSided.tolist()
+		pValuesTwoSided = pValuesTwoSided.tolist()
+		replicatesUsed = [B] * numFeatures
+	else:
+		# count permuted ts more extreme than the observed t-statistic of each feature
+		def countExceedances(indices, start, end):
+			permuted_ttests = permute_and_calc_ts(props[indices], n1, permutations[start:end])
+			T = T_statistics[indices]
+			return [(permuted_ttests > T).sum(axis=0), (np.abs(permuted_ttests) > np.abs(T)).sum(axis=0)]
 			
-			p2 = (1.0/(B+1)) * (twoTailed+1)
-			pValuesTwoSided.append(p2)
+		counts, replicatesUsed = tailCounts(numFeatures, 2, B, countExceedances, bAdaptive, 1.0 - coverage, numSamples, MAX_BLOCK_SIZE, progressDlg)
+		if counts is None:
+			return [], [], [], [], []
+		
+		if progressDlg != None:
+			progressDlg.setLabelText('Calculating p-values...')
+			progressDlg.setValue(0)
+			progressIndex = 0
+		
+		pValuesOneSided = ((1.0/(replicatesUsed+1)) * (counts[0]+1)).tolist()
+		pValuesTwoSided = ((1.0/(replicatesUsed+1)) * (counts[1]+1)).tolist()
+		replicatesUsed = replicatesUsed.tolist()
 			
 	# calculate difference in mean proportions confidence intervals using a bootstrapping procedure
-	lowerCIs = []
-	upperCIs = []
-	for r in xrange(0, numFeatures): 
-		lowerCI, upperCI = bootstrapDiffOfMeanProp(propGroup1[r], propGroup2[r], coverage, replicates = B)
-		lowerCIs.append(lowerCI*100)
-		upperCIs.append(upperCI*100)
+	lowerCIs, upperCIs = bootstrapDiffOfMeanPropAll(propGroup1, propGroup2, coverage, replicates = B, randomState = rng)
+	lowerCIs = (lowerCIs*100).tolist()
+	upperCIs = (upperCIs*100).tolist()
 			
-	if progress != None and progress != 'Verbose':
+	if progressDlg != None:
 		progressIndex += 1
-		progress.setValue(progressIndex)
+		progressDlg.setValue(progressIndex)
 
-	return pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs
+	return pValuesOneSided, pValuesTwoSided, lowerCIs, upperCIs, replicatesUsed
 
 # Calculate t-statistic under different permutations of the samples.
-def permute_and_calc_ts(propGroup1, propGroup2, permVec):
-	n1 = len(propGroup1[0])
-	n2 = len(propGroup2[0]) 
-	numSamples = n1 + n2
-	numFeatures = len(propGroup1) 
-	
-	# first permute the rows in the matrix
-	permPropGroup1 = []
-	permPropGroup2 = []
-	for r in xrange(0, numFeatures):
-		row = propGroup1[r] + propGroup2[r]
-		
-		group1 = []
-		for i in xrange(0, n1):
-			group1.append(row[permVec[i]])
-		permPropGroup1.append(group1)
-		
-		group2 = []
-		for i in xrange(0, n2):
-			group2.append(row[permVec[i+n1]])
-		permPropGroup2.append(group2)
-
-	return calc_twosample_ts(permPropGroup1, permPropGroup2)
+#  -> props is a features x samples matrix and each row of permutations gives an ordering of the samples,
+#       with the first n1 samples assigned to group 1. Returns a permutations x features matrix.
+def permute_and_calc_ts(props, n1, permutations):
+	permProps = props[:, permutations].transpose(1, 0, 2)
+	T_statistics, _, _ = twosample_ts(permProps[:, :, 0:n1], permProps[:, :, n1:])
+	return T_statistics
 	
 # Calc two sample two statistics
 def calc_twosample_ts(propGroup1, propGroup2):
-	n1 = len(propGroup1[0])
-	n2 = len(propGroup2[0]) 
-	numFeatures = len(propGroup1)
+	T_statistics, dp, bDegenerate = twosample_ts(propGroup1, propGroup2)
 	
-	T_statistics = []
-	effectSizes = []
+	effectSizes = (dp*100).tolist()
 	notes = []
-	for r in xrange(0, numFeatures):
-		meanG1 = float(sum(propGroup1[r])) / n1
-		varG1 = var(propGroup1[r], ddof=1)
-		stdErrG1 = varG1 / n1
-
-		meanG2 = float(sum(propGroup2[r])) / n2
-		varG2 = var(propGroup2[r], ddof=1)
-		stdErrG2 = varG2 / n2 
-		
-		dp = meanG1 - meanG2
-		effectSizes.append(dp*100)
-		
-		denom = math.sqrt(stdErrG1 + stdErrG2)
-
-		if denom == 0:
+	for bZeroVariance in bDegenerate:
+		if bZeroVariance:
 			notes.append('degenerate case: zero variance for both groups; variance set to 1e-6.')
-			T_statistics.append(dp/1e-6) 
 		else:
 			notes.append('')
-			T_statistics.append(dp/denom) 
 
 	return T_statistics, effectSizes, notes
 	
+# Calc two sample t-statistics over the last axis of the proportion arrays
+def twosample_ts(propGroup1, propGroup2):
+	n1 = propGroup1.shape[-1]
+	n2 = propGroup2.shape[-1]
+	
+	meanG1 = sequential_sum(propGroup1) / n1
+	varG1 = propGroup1.var(axis=-1, ddof=1)
+	stdErrG1 = varG1 / n1
+
+	meanG2 = sequential_sum(propGroup2) / n2
+	varG2 = propGroup2.var(axis=-1, ddof=1)
+	stdErrG2 = varG2 / n2 
+	
+	dp = meanG1 - meanG2
+	denom = np.sqrt(stdErrG1 + stdErrG2)
+	
+	bDegenerate = (denom == 0)
+	T_statistics = dp / np.where(bDegenerate, 1e-6, denom)
+
+	return T_statistics, dp, bDegenerate
+	
+# Sum over the last axis by adding samples in order, as the built-in sum() does. Rounding is then
+#  independent of how the proportions are laid out in memory so ties between observed and 
+#  permuted t-statistics are resolved consistently.
+def sequential_sum(values):
+	total = np.zeros(values.shape[0:-1])
+	for i in xrange(0, values.shape[-1]):
+		total += values[..., i]
+		
+	return total
+	
 if __name__ == "__main__": 
 	pass
 
@@ -30,9 +30,20 @@ class AbstractMultiGroupEffectSizePlugin:
     self.name = 'Unnamed'         # name of filter
     self.plotTitle = 'Untitled'   # title to use in plots
     self.bLogScale = False        # indicate if effect size is returned in log space
+    
+    self.bSingleFeatureInterface = True   # set to False if runAll() is implemented
 
   def run(self, data):
     '''
     Must return the effect size.
     '''
     pass
+  
+  def runAll(self, values, groupLabels):
+    '''
+    Process all features simultaneously. Values are given as a features x samples matrix
+      along with the index of the group each sample belongs to.
+    
+    Must return a list indicating the effect size of each feature.
+    '''
+    pass
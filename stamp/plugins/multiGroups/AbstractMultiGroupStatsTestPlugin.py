@@ -27,6 +27,8 @@ class AbstractMultiGroupStatsTestPlugin:
 	'''
 	def __init__(self, preferences):
 		self.name = 'Unnamed'
+		
+		self.bSingleFeatureInterface = True		# set to False if hypothesisTestAll() is implemented
 	
 	def hypothesisTest(self, data):
 		'''
@@ -35,3 +37,13 @@ class AbstractMultiGroupStatsTestPlugin:
 		  resulting test.
 		'''
 		pass
+		
+	def hypothesisTestAll(self, values, groupLabels):
+		'''
+		Process all features simultaneously. Values are given as a features x samples matrix
+		  along with the index of the group each sample belongs to.
+		
+		Must return lists indicating, for each feature, the p-value and a note indicating
+		  any information about the resulting test.
+		'''
+		pass
@@ -21,12 +21,18 @@
 # along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
 #======================================================================='''
 
+import numpy as np
+
+from stamp.metagenomics.stats.GroupSummaryStats import groupMatrix
+
 class AbstractPostHocTestPlugin:
 	'''
 	Abstract base class specifying interface for a post-hoc test
 	'''
 	def __init__(self, preferences):
 		self.name = 'Unnamed'
+		
+		self.bSingleFeatureInterface = True		# set to False if runAll() is implemented
 	
 	def run(self, data, coverage, groupNames):
 		'''
@@ -35,3 +41,30 @@ class AbstractPostHocTestPlugin:
 		  (e.g., degenerate cases).
 		'''
 		pass
+		
+	def runAll(self, values, groupLabels, coverage, groupNames, groupStats = None):
+		'''
+		Process all features simultaneously. Values are given as a features x samples matrix
+		  along with the index of the group each sample belongs to and, optionally, the
+		  GroupSummaryStats of these values.
+		
+		Must return features x contrasts arrays of p-values, effect sizes, lower CIs, and upper CIs,
+		  a list with the label of each contrast, and a list with a note for each feature.
+		'''
+		pass
+		
+	def contrasts(self, groupNames):
+		'''
+		Index of the first and second group in each contrast along with the label of each contrast.
+		'''
+		groupI, groupJ = np.triu_indices(len(groupNames), 1)
+		labels = [groupNames[i] + ' : ' + groupNames[j] for i, j in zip(groupI, groupJ)]
+		return groupI, groupJ, labels
+		
+	def runSingleFeature(self, data, coverage, groupNames):
+		'''
+		Perform test on a single feature using runAll().
+		'''
+		values, groupLabels = groupMatrix([data])
+		pValues, effectSizes, lowerCIs, upperCIs, labels, notes = self.runAll(values, groupLabels, coverage, groupNames)
+		return pValues[0].tolist(), effectSizes[0].tolist(), lowerCIs[0].tolist(), upperCIs[0].tolist(), labels, notes[0]
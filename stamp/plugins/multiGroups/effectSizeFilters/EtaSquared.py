@@ -21,7 +21,10 @@
 # along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
+import numpy as np
+
 from stamp.plugins.multiGroups.AbstractMultiGroupEffectSizePlugin import AbstractMultiGroupEffectSizePlugin
+from stamp.metagenomics.stats.GroupSummaryStats import GroupSummaryStats, groupMatrix
 
 class EtaSquared(AbstractMultiGroupEffectSizePlugin):
 	
@@ -30,34 +33,27 @@ class EtaSquared(AbstractMultiGroupEffectSizePlugin):
 		self.name = 'Eta-squared'
 		self.plotTitle = 'Eta-squared'
 		self.bLogScale = False 
+		self.bSingleFeatureInterface = False
 
 	def run(self, data):
-		for group in data:
-			if len(group) < 1:
-				return -1.0
-				
-		totalSum = 0.0
-		N = 0.0
-		for i in xrange(0, len(data)):
-			for x in data[i]:
-				totalSum += x
-				N += 1
-		grandMean = totalSum / N
-
-		totalSS = 0.0
-		betweenGroupSS = 0.0
-		for i in xrange(0, len(data)):
-			groupSum = 0.0
-			for x in data[i]:
-				totalSS += (x - grandMean)*(x - grandMean)
-				groupSum += x
-			betweenGroupSS += (groupSum*groupSum) / len(data[i])
-		betweenGroupSS -= (totalSum*totalSum) / N
-
-		if totalSS != 0:
-			etaSquared = betweenGroupSS / totalSS
-		else:
-			etaSquared = -1.0	# degenerate case where all samples have the same value
+		values, groupLabels = groupMatrix([data])
+		return self.runAll(values, groupLabels)[0]
+		
+	def runAll(self, values, groupLabels):
+		'''
+		Calculate eta-squared of all features from the sums of squares of each group.
+		'''
+		groupStats = GroupSummaryStats(values, groupLabels)
+		numFeatures = len(groupStats.grandMeans)
+		
+		if len(groupStats.groupSizes) == 0 or groupStats.groupSizes.min() < 1:
+			return -np.ones(numFeatures)
+			
+		betweenSS, withinSS, totalSS = groupStats.sumOfSquares()
+		
+		# degenerate case where all samples have the same value
+		bDegenerate = (totalSS == 0)
+		etaSquared = np.where(bDegenerate, -1.0, betweenSS / np.where(bDegenerate, 1.0, totalSS))
 		
 		return etaSquared
 	
@@ -1 +1 @@
-#=======================================================================# Author: Donovan Parks## Perform a post-hoc test by applying Welch's t-test to each pair of groups.## Copyright 2011 Donovan Parks## This file is part of STAMP.## STAMP is free software: you can redistribute it and/or modify# it under the terms of the GNU General Public License as published by# the Free Software Foundation, either version 3 of the License, or# (at your option) any later version.## STAMP is distributed in the hope that it will be useful,# but WITHOUT ANY WARRANTY; without even the implied warranty of# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	See the# GNU General Public License for more details.## You should have received a copy of the GNU General Public License# along with STAMP.	If not, see <http://www.gnu.org/licenses/>.#=======================================================================import mathfrom stamp.plugins.multiGroups.AbstractPostHocTestPlugin import AbstractPostHocTestPluginfrom stamp.plugins.groups.statisticalTests.Welch import Welchfrom scipy.stats import distributionsclass WelchUncorrected(AbstractPostHocTestPlugin):	'''	Perform a post-hoc test by applying Welch's t-test to each pair of groups.	'''		def __init__(self, preferences):		AbstractPostHocTestPlugin.__init__(self, preferences)		self.name = 'Welch\'s (uncorrected)'		self.welch = Welch(preferences)		def run(self, data, coverage, groupNames):		# calculate statistics for each pair of groups		pValues = []		effectSizes = []		lowerCIs = []		upperCIs = []		labels = []		postHocNote = ''		for i in xrange(0, len(data)):			for j in xrange(i+1, len(data)):				pValueOneSided, pValueTwoSided, lowerCI, upperCI, dp, note = self.welch.run(data[i], data[j], [0.01]*len(data[i]), [0.01]*len(data[j]), '', coverage)								pValues.append(pValueTwoSided)				effectSizes.append(dp)				lowerCIs.append(lowerCI)				upperCIs.append(upperCI)				if note != '':					postHocNote = note				labels.append(groupNames[i] + ' : ' + groupNames[j])					return pValues, effectSizes, lowerCIs, upperCIs, labels, postHocNoteif __name__ == "__main__": 	pass
\ No newline at end of file
+#=======================================================================# Author: Donovan Parks## Perform a post-hoc test by applying Welch's t-test to each pair of groups.## Copyright 2011 Donovan Parks## This file is part of STAMP.## STAMP is free software: you can redistribute it and/or modify# it under the terms of the GNU General Public License as published by# the Free Software Foundation, either version 3 of the License, or# (at your option) any later version.## STAMP is distributed in the hope that it will be useful,# but WITHOUT ANY WARRANTY; without even the implied warranty of# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	See the# GNU General Public License for more details.## You should have received a copy of the GNU General Public License# along with STAMP.	If not, see <http://www.gnu.org/licenses/>.#=======================================================================import numpy as npfrom stamp.plugins.multiGroups.AbstractPostHocTestPlugin import AbstractPostHocTestPluginfrom stamp.plugins.groups.statisticalTests.Welch import Welchclass WelchUncorrected(AbstractPostHocTestPlugin):	'''	Perform a post-hoc test by applying Welch's t-test to each pair of groups.	'''		def __init__(self, preferences):		AbstractPostHocTestPlugin.__init__(self, preferences)		self.name = 'Welch\'s (uncorrected)'		self.welch = Welch(preferences)		self.bSingleFeatureInterface = False		def run(self, data, coverage, groupNames):		return self.runSingleFeature(data, coverage, groupNames)			def runAll(self, values, groupLabels, coverage, groupNames, groupStats = None):		'''		Apply Welch's t-test to each pair of groups for all features at once.		'''		values = np.asarray(values, dtype=float)		groupLabels = np.asarray(groupLabels)		groupI, groupJ, labels = self.contrasts(groupNames)				# calculate statistics for each pair of groups		numFeatures = values.shape[0]		pValues = np.zeros((numFeatures, len(labels)))		effectSizes = np.zeros((numFeatures, len(labels)))		lowerCIs = np.zeros((numFeatures, len(labels)))		upperCIs = np.zeros((numFeatures, len(labels)))		notes = [''] * numFeatures		for c, (i, j) in enumerate(zip(groupI, groupJ)):			group1 = values[:, groupLabels == i]			group2 = values[:, groupLabels == j]			parent1 = np.ones(group1.shape)*0.01			parent2 = np.ones(group2.shape)*0.01						_, pValues[:, c], lowerCIs[:, c], upperCIs[:, c], effectSizes[:, c], welchNotes = self.welch.runAll(group1, group2, parent1, parent2, '', coverage)						for f, note in enumerate(welchNotes):				if note != '':					notes[f] = note					return pValues, effectSizes, lowerCIs, upperCIs, labels, notesif __name__ == "__main__": 	pass
\ No newline at end of file
@@ -21,10 +21,12 @@
 # along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
 #======================================================================='''
 
-import math
+import numpy as np
+
 from stamp.plugins.multiGroups.AbstractMultiGroupStatsTestPlugin import AbstractMultiGroupStatsTestPlugin
+from stamp.metagenomics.stats.GroupSummaryStats import GroupSummaryStats, groupMatrix
 
-from scipy.stats import f_oneway
+from scipy.stats import f
 
 class ANOVA(AbstractMultiGroupStatsTestPlugin):
 	'''
@@ -34,23 +36,39 @@ class ANOVA(AbstractMultiGroupStatsTestPlugin):
 	def __init__(self, preferences):
 		AbstractMultiGroupStatsTestPlugin.__init__(self, preferences)
 		self.name = 'ANOVA'
+		self.bSingleFeatureInterface = False
 	
 	def hypothesisTest(self, data):
-		note = ''
-		for group in data:
-			if len(group) < 2:
-				note = 'degenerate case: at least one group contains less than 2 samples'
-				return 1.0, note
-				
-		F_value, pValue = apply(f_oneway, data)
-		if math.isnan(pValue):
-			pValue = 1.0 # invalid data for calculating p-value so assume large p-value
-			note = 'degenerate case: failed to calculate p-value'
+		values, groupLabels = groupMatrix([data])
+		pValues, notes = self.hypothesisTestAll(values, groupLabels)
+		return pValues[0], notes[0]
+		
+	def hypothesisTestAll(self, values, groupLabels):
+		'''
+		Perform ANOVA on all features using the sums of squares of each group.
+		'''
+		groupStats = GroupSummaryStats(values, groupLabels)
+		numFeatures = len(groupStats.grandMeans)
+		
+		if len(groupStats.groupSizes) == 0 or groupStats.groupSizes.min() < 2:
+			return np.ones(numFeatures), ['degenerate case: at least one group contains less than 2 samples'] * numFeatures
+		
+		betweenSS, withinSS, totalSS = groupStats.sumOfSquares()
+		dfBetween = len(groupStats.groupSizes) - 1
+		dfWithin = groupStats.numSamples - len(groupStats.groupSizes)
+		
+		with np.errstate(invalid='ignore', divide='ignore'):
+			F_values = (betweenSS / dfBetween) / (withinSS / dfWithin)
+			pValues = f.sf(F_values, dfBetween, dfWithin)
+			
+		# invalid data for calculating p-value so assume large p-value
+		bInvalid = np.isnan(pValues)
+		pValues = np.where(bInvalid, 1.0, pValues)
+		notes = ['degenerate case: failed to calculate p-value' if invalid else '' for invalid in bInvalid]
 			
-		return pValue, note
+		return pValues, notes
 
 if __name__ == "__main__": 
-	anova = ANOVA()
-	pValueOne, pValueTwo = anova.hypothesisTest([[10, 20, 30], [20, 30, 40], [10, 30, 50, 70]])
-	print pValueOne
-	print pValueTwo
+	anova = ANOVA({})
+	pValue, note = anova.hypothesisTest([[10, 20, 30], [20, 30, 40], [10, 30, 50, 70]])
+	print pValue
@@ -1 +1 @@
-#=======================================================================# Author: Donovan Parks## Perform Kruskal-Wallis H-test for independent groups.## Copyright 2011 Donovan Parks## This file is part of STAMP.## STAMP is free software: you can redistribute it and/or modify# it under the terms of the GNU General Public License as published by# the Free Software Foundation, either version 3 of the License, or# (at your option) any later version.## STAMP is distributed in the hope that it will be useful,# but WITHOUT ANY WARRANTY; without even the implied warranty of# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	See the# GNU General Public License for more details.## You should have received a copy of the GNU General Public License# along with STAMP.	If not, see <http://www.gnu.org/licenses/>.#======================================================================='''import mathimport sysfrom stamp.plugins.multiGroups.AbstractMultiGroupStatsTestPlugin import AbstractMultiGroupStatsTestPluginfrom scipy.stats import kruskalfrom numpy import arrayclass KruskalWallis(AbstractMultiGroupStatsTestPlugin):	'''	Perform Kruskal-Wallis H-test	'''		def __init__(self, preferences):		AbstractMultiGroupStatsTestPlugin.__init__(self, preferences)		self.name = 'Kruskal-Wallis H-test'		def hypothesisTest(self, data):		note = ''		arrayData = []		for group in data:			if len(group) < 5:				note = 'degenerate case: at least one group contains less than 5 samples'				return 1.0, note					arrayData.append(array(group))						try:			H_statistic, pValue = apply(kruskal, arrayData)		except:			pValue = 1.0			note = 'Invalid input data for Kruskal-Wallis H-test.'				return pValue, noteif __name__ == "__main__": 	kw = KruskalWallis()	pValue, note = kw.hypothesisTest([[10, 20, 30], [20, 30, 40], [10, 30, 50, 70]])	print pValue	print note
\ No newline at end of file
+#=======================================================================# Author: Donovan Parks## Perform Kruskal-Wallis H-test for independent groups.## Copyright 2011 Donovan Parks## This file is part of STAMP.## STAMP is free software: you can redistribute it and/or modify# it under the terms of the GNU General Public License as published by# the Free Software Foundation, either version 3 of the License, or# (at your option) any later version.## STAMP is distributed in the hope that it will be useful,# but WITHOUT ANY WARRANTY; without even the implied warranty of# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	See the# GNU General Public License for more details.## You should have received a copy of the GNU General Public License# along with STAMP.	If not, see <http://www.gnu.org/licenses/>.#======================================================================='''import numpy as npfrom stamp.plugins.multiGroups.AbstractMultiGroupStatsTestPlugin import AbstractMultiGroupStatsTestPluginfrom stamp.metagenomics.stats.GroupSummaryStats import GroupSummaryStats, groupMatrixfrom scipy.stats import chi2class KruskalWallis(AbstractMultiGroupStatsTestPlugin):	'''	Perform Kruskal-Wallis H-test	'''		def __init__(self, preferences):		AbstractMultiGroupStatsTestPlugin.__init__(self, preferences)		self.name = 'Kruskal-Wallis H-test'		self.bSingleFeatureInterface = False		def hypothesisTest(self, data):		values, groupLabels = groupMatrix([data])		pValues, notes = self.hypothesisTestAll(values, groupLabels)		return pValues[0], notes[0]			def rankData(self, values):		'''		Rank the values of each feature (row), assigning tied values their average rank. Also		returns the sum of t^3 - t over all groups of t tied values within each feature.		'''		numFeatures, numSamples = values.shape		rows = np.arange(0, numFeatures)[:, np.newaxis]				order = np.argsort(values, axis=1, kind='mergesort')		sortedValues = values[rows, order]				# index of tied run each sorted value belongs to, unique across all features		bNewRun = np.ones((numFeatures, numSamples), dtype=bool)		bNewRun[:, 1:] = sortedValues[:, 1:] != sortedValues[:, :-1]		runIds = np.cumsum(bNewRun.ravel()) - 1				# average of the ranks (1-based positions) spanned by each run		positions = np.tile(np.arange(1, numSamples+1, dtype=float), numFeatures)		runSizes = np.bincount(runIds).astype(float)		runRanks = np.bincount(runIds, weights=positions) / runSizes				ranks = np.empty((numFeatures, numSamples))		ranks[rows, order] = runRanks[runIds].reshape((numFeatures, numSamples))				runFeature = np.repeat(np.arange(0, numFeatures), bNewRun.sum(axis=1))		ties = np.bincount(runFeature, weights=runSizes**3 - runSizes, minlength=numFeatures)				return ranks, ties			def hypothesisTestAll(self, values, groupLabels):		'''		Perform Kruskal-Wallis H-test on all features using the mean rank of each group.		'''		values = np.asarray(values, dtype=float)		numFeatures = values.shape[0]				groupSizes = np.bincount(groupLabels) if len(groupLabels) > 0 else np.zeros(0)		if len(groupSizes) == 0 or groupSizes.min() < 5:			return np.ones(numFeatures), ['degenerate case: at least one group contains less than 5 samples'] * numFeatures					ranks, ties = self.rankData(values)				groupStats = GroupSummaryStats(ranks, groupLabels, len(groupSizes))		numSamples = float(groupStats.numSamples)		meanRankDiff = groupStats.groupMeans() - 0.5*(numSamples + 1)		H_statistics = 12.0 / (numSamples*(numSamples + 1)) * (groupStats.groupSizes * meanRankDiff**2).sum(axis=1)				with np.errstate(invalid='ignore', divide='ignore'):			tieCorrection = 1.0 - ties / (numSamples**3 - numSamples)			H_statistics /= tieCorrection			pValues = chi2.sf(H_statistics, len(groupSizes) - 1)				# all values of a feature are identical		bInvalid = np.isnan(pValues)		pValues = np.where(bInvalid, 1.0, pValues)		notes = ['Invalid input data for Kruskal-Wallis H-test.' if invalid else '' for invalid in bInvalid]				return pValues, notesif __name__ == "__main__": 	kw = KruskalWallis({})	pValue, note = kw.hypothesisTest([[10, 20, 30, 40, 50], [20, 30, 40, 50, 60], [10, 30, 50, 70, 90]])	print pValue	print note
\ No newline at end of file
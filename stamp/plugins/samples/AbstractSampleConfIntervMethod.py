@@ -31,9 +31,20 @@ class AbstractSampleConfIntervMethod:
     self.plotLabel = 'No plot label defined'
     self.bRatio = False       # indicate if effect size statistic is a ratio (imples skewed distribution)
     
+    self.bSingleFeatureInterface = True   # set to False if runAll() is implemented
+    
   
   def run(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
     '''
     Must return the lower and upper values of the confidence interval along with the effect size.
     '''
     pass
+  
+  def runAll(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
+    '''
+    Process all features simultaneously. Arguments are lists with an entry for each feature.
+    
+    Must return lists indicating, for each feature, the lower and upper values of the confidence
+      interval, the effect size, and a note indicating any information about the resulting statistics.
+    '''
+    pass
@@ -28,6 +28,11 @@ class AbstractSampleStatsTestPlugin:
   def __init__(self, preferences):
     self.preferences = preferences
     self.name = 'Unnamed'
+    
+    self.bSingleFeatureInterface = True   # set to False if hypothesisTestAll() is implemented
+    
+    self.alpha = 0.05             # significance level features are tested at
+    self.replicatesUsed = None    # replicates drawn for each feature by the last call to a resampling test
   
   def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
     '''
@@ -36,6 +41,15 @@ class AbstractSampleStatsTestPlugin:
     '''
     pass
   
+  def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
+    '''
+    Process all features simultaneously. Arguments are lists with an entry for each feature.
+    
+    Must return lists indicating, for each feature, the one-sided and two-sided p-values
+      along with a note indicating any information about the resulting p-values.
+    '''
+    pass
+  
   def power(self, seq1, seq2, totalSeq1, totalSeq2, alpha):
     '''
     Power of the statistical test. Return an empty list if the power cannot be calculated.
@@ -23,6 +23,8 @@
 
 import math
 
+import numpy as np
+
 from stamp.plugins.samples.AbstractSampleConfIntervMethod import AbstractSampleConfIntervMethod
 
 from stamp.metagenomics.stats.distributions.NormalDist import zScore
@@ -34,6 +36,7 @@ class DiffBetweenPropAsymptotic(AbstractSampleConfIntervMethod):
 		self.name = 'DP: Asymptotic'
 		self.plotLabel = 'Difference between proportions (%)'
 		self.bRatio = False
+		self.bSingleFeatureInterface = False
 		
 	def run(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
 		'''
@@ -58,6 +61,29 @@ class DiffBetweenPropAsymptotic(AbstractSampleConfIntervMethod):
 		offset = zScore(coverage) * stdErr
 		
 		return (diff - offset) * 100, (diff + offset) * 100, diff * 100, note
+		
+	def runAll(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
+		'''
+		Calculate confidence intervals of all features using standard asymptotic method.
+		'''
+		seq1 = np.asarray(seq1, dtype=float)
+		seq2 = np.asarray(seq2, dtype=float)
+		totalSeq1 = np.asarray(totalSeq1, dtype=float)
+		totalSeq2 = np.asarray(totalSeq2, dtype=float)
+		
+		bDegenerate = (totalSeq1 == 0) | (totalSeq2 == 0)
+		totalSeq1 = np.where(totalSeq1 == 0, self.preferences['Pseudocount'], totalSeq1)
+		totalSeq2 = np.where(totalSeq2 == 0, self.preferences['Pseudocount'], totalSeq2)
+		notes = ['degenerate case: CI calculation used pseudocount' if degenerate else '' for degenerate in bDegenerate]
+			
+		R1 = seq1 / totalSeq1
+		R2 = seq2 / totalSeq2
+		
+		diff = R1 - R2
+		stdErr = np.sqrt((R1*(1-R1)) / totalSeq1 + (R2*(1-R2)) / totalSeq2)
+		offset = zScore(coverage) * stdErr
+		
+		return (diff - offset) * 100, (diff + offset) * 100, diff * 100, notes
 	
 if __name__ == "__main__": 
 	pass
\ No newline at end of file
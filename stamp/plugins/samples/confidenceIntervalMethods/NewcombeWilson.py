@@ -22,11 +22,12 @@
 # along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
-import math
+import numpy as np
 
 from stamp.plugins.samples.AbstractSampleConfIntervMethod import AbstractSampleConfIntervMethod
 
 from stamp.metagenomics.stats.distributions.NormalDist import zScore
+from stamp.metagenomics.stats.CI.WilsonCI import wilsonScoreInterval
 
 class NewcombeWilson(AbstractSampleConfIntervMethod):
 	
@@ -35,65 +36,45 @@ class NewcombeWilson(AbstractSampleConfIntervMethod):
 		self.name = 'DP: Newcombe-Wilson'
 		self.plotLabel = 'Difference between proportions (%)'
 		self.bRatio = False
+		self.bSingleFeatureInterface = False
 	
-	def NewcombeWilsonFindRoots(self, seq, totalSeq, z):
+	def run(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
 		'''
-		Find roots required by Newcombe-Wilson CI method
+		Calculate confidence interval using Newcombe-Wilson method.
+			Results are report as percent difference.
 		'''
-		value = 0.0
-		stepSize = 1.0 / max(totalSeq,1000)
-		steps = int(1.0 / stepSize)
-		prevP = z*math.sqrt(value*(1.0-value) / totalSeq) - abs(value - float(seq) / totalSeq)
-		prevValue = value
-		roots = []
-		for dummy in xrange(0,steps):
-			p = z*math.sqrt(value*(1.0-value) / totalSeq) - abs(value - float(seq) / totalSeq)
-			if p*prevP < 0 or (p == 0 and value == 0) or (p == 0 and value == 1.0):
-				# we have found a root since there is a sign change
-				if abs(p)+abs(prevP) != 0:
-					root = prevValue + stepSize*(1.0 - (abs(p)/(abs(p)+abs(prevP))))
-				else:
-					root = prevValue
-				roots.append(root)
-				
-				if len(roots) == 2:
-					break
-			
-			prevP = p
-			prevValue = value	
-			value += stepSize
+		lowerCIs, upperCIs, effectSizes, notes = self.runAll([seq1], [seq2], [totalSeq1], [totalSeq2], coverage)
 		
-		# check if we have a double root
-		if len(roots) == 1:
-			roots.append(roots[0])
+		return float(lowerCIs[0]), float(upperCIs[0]), float(effectSizes[0]), notes[0]
 		
-		return roots
-	
-	def run(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
+	def runAll(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
 		'''
-		Calculate confidence interval using Newcombe-Wilson method.
-			Results are report as percent difference.
+		Calculate confidence intervals of all features using Newcombe-Wilson method.
+		
+		The Wilson score intervals of each proportion are the roots of a quadratic so are 
+		calculated in closed form. The interval of the difference combines the distance from each 
+		proportion to its bounds so remains exact when a proportion is 0 or 1.
 		'''
-		note = ''
+		seq1 = np.asarray(seq1, dtype=float)
+		seq2 = np.asarray(seq2, dtype=float)
+		totalSeq1 = np.asarray(totalSeq1, dtype=float)
+		totalSeq2 = np.asarray(totalSeq2, dtype=float)
 		
-		if totalSeq1 == 0:
-			totalSeq1 = self.preferences['Pseudocount']
-			note = 'degenerate case: CI calculation used pseudocount'
-			
-		if totalSeq2 == 0:
-			totalSeq2 = self.preferences['Pseudocount']
-			note = 'degenerate case: CI calculation used pseudocount'
+		bDegenerate = (totalSeq1 == 0) | (totalSeq2 == 0)
+		totalSeq1 = np.where(totalSeq1 == 0, self.preferences['Pseudocount'], totalSeq1)
+		totalSeq2 = np.where(totalSeq2 == 0, self.preferences['Pseudocount'], totalSeq2)
+		notes = ['degenerate case: CI calculation used pseudocount' if degenerate else '' for degenerate in bDegenerate]
 		
 		z = zScore(coverage)
 		
-		roots1 = self.NewcombeWilsonFindRoots(seq1, totalSeq1, z)
-		roots2 = self.NewcombeWilsonFindRoots(seq2, totalSeq2, z)
+		lower1, upper1, R1 = wilsonScoreInterval(seq1, totalSeq1, z)
+		lower2, upper2, R2 = wilsonScoreInterval(seq2, totalSeq2, z)
 	
-		diff = float(seq1)/totalSeq1 - float(seq2)/totalSeq2
-		lowerCI = z*math.sqrt(roots1[0]*(1-roots1[0])/totalSeq1 + roots2[1]*(1-roots2[1])/totalSeq2)
-		upperCI = z*math.sqrt(roots1[1]*(1-roots1[1])/totalSeq1 + roots2[0]*(1-roots2[0])/totalSeq2)
+		diff = R1 - R2
+		lowerCI = np.sqrt((R1-lower1)**2 + (upper2-R2)**2)
+		upperCI = np.sqrt((upper1-R1)**2 + (R2-lower2)**2)
 		
-		return (diff-lowerCI)*100, (diff+upperCI)*100, diff*100, note
+		return (diff-lowerCI)*100, (diff+upperCI)*100, diff*100, notes
 	
 if __name__ == "__main__": 
 	pass
\ No newline at end of file
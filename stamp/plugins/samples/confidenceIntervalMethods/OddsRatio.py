@@ -23,6 +23,8 @@
 
 import math
 
+import numpy as np
+
 from stamp.plugins.samples.AbstractSampleConfIntervMethod import AbstractSampleConfIntervMethod
 
 from stamp.metagenomics.stats.distributions.NormalDist import zScore
@@ -34,6 +36,7 @@ class OddsRatio(AbstractSampleConfIntervMethod):
 		self.name = 'OR: Haldane adjustment'
 		self.plotLabel = 'Odds ratio'
 		self.bRatio = True
+		self.bSingleFeatureInterface = False
 		
 	def tableValues(self, seq1, seq2, totalSeq1, totalSeq2):
 		a = seq1
@@ -72,6 +75,35 @@ class OddsRatio(AbstractSampleConfIntervMethod):
 		upperCI = math.exp(logUpperCI)
 		
 		return lowerCI, upperCI, effectSize, note
+		
+	def runAll(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
+		'''
+		Calculate odds ratio confidence intervals of all features.
+		'''
+		a = np.asarray(seq1, dtype=float)
+		b = np.asarray(seq2, dtype=float)
+		c = np.asarray(totalSeq1, dtype=float) - a
+		d = np.asarray(totalSeq2, dtype=float) - b
+		
+		# boundary correction (Haldane, 1956 modification; see Agresti, Biometrics 1999)
+		bDegenerate = (a == 0) | (b == 0) | (c == 0) | (d == 0)
+		pseudocounts = np.where(bDegenerate, self.preferences['Pseudocount'], 0)
+		a = a + pseudocounts
+		b = b + pseudocounts
+		c = c + pseudocounts
+		d = d + pseudocounts
+		notes = ['degenerate case: CI calculation used pseudocount' if degenerate else '' for degenerate in bDegenerate]
+		
+		effectSizes = (a * d) / (b * c)
+		logEffectSizes = np.log(effectSizes)
+		
+		logSE = np.sqrt(1.0/a + 1.0/b + 1.0/c + 1.0/d)
+		
+		z = zScore(coverage)
+		lowerCIs = np.exp(logEffectSizes - z*logSE)
+		upperCIs = np.exp(logEffectSizes + z*logSE)
+		
+		return lowerCIs, upperCIs, effectSizes, notes
 	
 if __name__ == "__main__": 
 	oddsRatio = OddsRatio()
@@ -23,6 +23,8 @@
 
 import math
 
+import numpy as np
+
 from stamp.plugins.samples.AbstractSampleConfIntervMethod import AbstractSampleConfIntervMethod
 
 from stamp.metagenomics.stats.distributions.NormalDist import zScore
@@ -34,6 +36,7 @@ class RatioProportions(AbstractSampleConfIntervMethod):
 		self.name = 'RP: Asymptotic'
 		self.plotLabel = 'Ratio of proportions'
 		self.bRatio = True
+		self.bSingleFeatureInterface = False
 		
 	def run(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
 		'''
@@ -61,6 +64,34 @@ class RatioProportions(AbstractSampleConfIntervMethod):
 		upperCI = math.exp(logUpperCI)
 		
 		return lowerCI, upperCI, effectSize, note
+		
+	def runAll(self, seq1, seq2, totalSeq1, totalSeq2, coverage):
+		'''
+		Calculate ratio of proportions (relative risk) confidence intervals of all features.
+		'''
+		seq1 = np.asarray(seq1, dtype=float)
+		seq2 = np.asarray(seq2, dtype=float)
+		totalSeq1 = np.asarray(totalSeq1, dtype=float)
+		totalSeq2 = np.asarray(totalSeq2, dtype=float)
+		
+		bDegenerate = (seq1 == 0) | (seq2 == 0)
+		pseudocounts = np.where(bDegenerate, self.preferences['Pseudocount'], 0)
+		seq1 = seq1 + pseudocounts
+		seq2 = seq2 + pseudocounts
+		totalSeq1 = totalSeq1 + 2*pseudocounts
+		totalSeq2 = totalSeq2 + 2*pseudocounts
+		notes = ['degenerate case: CI calculation used pseudocount' if degenerate else '' for degenerate in bDegenerate]
+			
+		effectSizes = (seq1 / totalSeq1) / (seq2 / totalSeq2)
+		logEffectSizes = np.log(effectSizes)
+		
+		logSE = np.sqrt(1.0/seq1 - 1.0/totalSeq1 + 1.0/seq2 - 1.0/totalSeq2)
+		
+		z = zScore(coverage)
+		lowerCIs = np.exp(logEffectSizes - z*logSE)
+		upperCIs = np.exp(logEffectSizes + z*logSE)
+		
+		return lowerCIs, upperCIs, effectSizes, notes
 	
 if __name__ == "__main__": 
 		ratioProp = RatioProportions()
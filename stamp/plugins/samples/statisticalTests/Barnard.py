@@ -0,0 +1,144 @@
+#=======================================================================
+# Author: Donovan Parks
+#
+# Perform Barnard's exact test using the Wald statistic to order tables.
+#
+# See 'Significance Tests for 2x2 Tables' by G.A. Barnard, Biometrika, 1947.
+#
+# Copyright 2011 Donovan Parks
+#
+# This file is part of STAMP.
+#
+# STAMP is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# STAMP is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
+#=======================================================================
+
+import math
+
+import numpy as np
+
+from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
+from stamp.plugins.samples.statisticalTests.Fishers import Fishers
+from stamp.metagenomics.stats.distributions.HypergeometricDist import MAX_TABLES
+
+from scipy import special
+
+# default number of values of the nuisance parameter considered in (0, 0.5]
+NUISANCE_STEPS = 100
+
+# maximum number of tables, (totalSeq1+1)*(totalSeq2+1), enumerated for a feature. Fisher's
+# exact test is used for features with larger samples.
+MAX_ENUMERATED_TABLES = 10**6
+
+class Barnard(AbstractSampleStatsTestPlugin):
+	'''
+	Perform Barnard's exact test.
+	'''
+
+	def __init__(self, preferences):
+		AbstractSampleStatsTestPlugin.__init__(self, preferences)
+		self.name = 'Barnard\'s exact test'
+		self.nuisanceSteps = int(preferences.get('Barnard nuisance steps', NUISANCE_STEPS))
+		self.fishers = Fishers(preferences)
+
+	def logChoose(self, n, k):
+		lgn1 = special.gammaln(n+1)
+		lgk1 = special.gammaln(k+1)
+		lgnk1 = special.gammaln(n-k+1)
+		return lgn1 - (lgnk1 + lgk1)
+
+	def binomialPMF(self, n, pi):
+		'''
+		Binomial probabilities of 0, ..., n successes (rows) for each success probability (columns).
+		'''
+		k = np.arange(0, n+1, dtype=float)[:, np.newaxis]
+		logP = self.logChoose(n, k) + k*np.log(pi) + (n-k)*np.log1p(-pi)
+		return np.exp(logP)
+
+	def waldStatistics(self, a, b, totalSeq1, totalSeq2):
+		'''
+		Wald statistic (standardized difference between proportions) of tables with a and b positive
+		sequences in each sample. Tables where the pooled proportion is 0 or 1 have no difference
+		between proportions and are given a statistic of zero.
+		'''
+		pooledP = (a + b) / float(totalSeq1 + totalSeq2)
+		stdDev = np.sqrt(pooledP * (1.0 - pooledP) * (1.0/totalSeq1 + 1.0/totalSeq2))
+		diff = a / float(totalSeq1) - b / float(totalSeq2)
+
+		return np.where(stdDev > 0, diff / np.where(stdDev > 0, stdDev, 1.0), 0.0)
+
+	def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
+		seq1 = int(math.floor(seq1 + 0.5))
+		seq2 = int(math.floor(seq2 + 0.5))
+		totalSeq1 = int(math.floor(totalSeq1 + 0.5))
+		totalSeq2 = int(math.floor(totalSeq2 + 0.5))
+
+		if totalSeq1 == 0 or totalSeq2 == 0:
+			return 1.0, 1.0, 'degenerate case: parent has a count of zero'
+			
+		if (totalSeq1+1)*(totalSeq2+1) > MAX_ENUMERATED_TABLES:
+			pValueOneSided, pValueTwoSided, note = self.fishers.hypothesisTest(seq1, seq2, totalSeq1, totalSeq2)
+			return pValueOneSided, pValueTwoSided, 'large sample: Fisher\'s exact test used in place of Barnard\'s'
+
+		obsStat = float(self.waldStatistics(seq1, seq2, totalSeq1, totalSeq2))
+
+		# tables with a statistic equal to the observed table to within rounding error are
+		# considered as extreme as the observed table
+		tolerance = 1e-9 * max(abs(obsStat), 1.0)
+
+		# probability of extreme tables is maximized over the nuisance parameter (the common
+		# population proportion). The two-sided set of extreme tables is symmetric so its
+		# probability is symmetric about 0.5, but the one-sided set is not.
+		dPi = 0.5 / self.nuisanceSteps
+		pi = dPi * np.arange(1, 2*self.nuisanceSteps)
+
+		binomial1 = self.binomialPMF(totalSeq1, pi)
+		binomial2 = self.binomialPMF(totalSeq2, pi)
+
+		# probability of extreme tables for each value of the nuisance parameter is found
+		# with a matrix product over blocks of rows of the (totalSeq1+1) x (totalSeq2+1) tables
+		b = np.arange(0, totalSeq2+1, dtype=float)
+		blockSize = max(1, MAX_TABLES / (totalSeq2+1))
+
+		probOneSided = np.zeros(len(pi))
+		probTwoSided = np.zeros(len(pi))
+		for start in xrange(0, totalSeq1+1, blockSize):
+			a = np.arange(start, min(start + blockSize, totalSeq1+1), dtype=float)[:, np.newaxis]
+			stat = self.waldStatistics(a, b, totalSeq1, totalSeq2)
+
+			# Barnard recommends that the set of extreme tables satisfy symmetry and convexity conditions.
+			# Convexity is handled by considering all tables and symmetry is explicitly enforced by also
+			# including the table (totalSeq1 - a, totalSeq2 - b) of each extreme table.
+			mirrorStat = self.waldStatistics(totalSeq1 - a, totalSeq2 - b, totalSeq1, totalSeq2)
+			bExtremeTwoSided = (np.abs(stat) >= abs(obsStat) - tolerance) | (np.abs(mirrorStat) >= abs(obsStat) - tolerance)
+
+			if obsStat >= 0:
+				bExtremeOneSided = stat >= obsStat - tolerance
+			else:
+				bExtremeOneSided = stat <= obsStat + tolerance
+
+			rows = binomial1[start:start+len(a)]
+			probOneSided += (rows * np.dot(bExtremeOneSided.astype(float), binomial2)).sum(axis=0)
+			probTwoSided += (rows * np.dot(bExtremeTwoSided.astype(float), binomial2)).sum(axis=0)
+
+		# p-values may slightly exceed 1 due to rounding error accumulated over the summation
+		pValueOneSided = min(probOneSided.max(), 1.0)
+		pValueTwoSided = min(probTwoSided.max(), 1.0)
+
+		return pValueOneSided, pValueTwoSided, ''
+
+if __name__ == "__main__":
+	barnard = Barnard({})
+	pValueOne, pValueTwo, note = barnard.hypothesisTest(8, 3, 100, 100)
+	print pValueOne
+	print pValueTwo
@@ -21,10 +21,11 @@
 # along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
-import random
-from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
+import numpy as np
 
-from numpy.random import binomial
+from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
+from stamp.metagenomics.stats.MonteCarlo import tailCounts
+from stamp.metagenomics.stats.RandomStreams import randomSeed, randomStream, uniqueKeys
 
 class Bootstrap(AbstractSampleStatsTestPlugin):
 	'''
@@ -34,46 +35,72 @@ class Bootstrap(AbstractSampleStatsTestPlugin):
 	def __init__(self, preferences):
 		AbstractSampleStatsTestPlugin.__init__(self, preferences)
 		self.name = 'Bootstrap'
+		self.bSingleFeatureInterface = False
 
 	def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
+		pValuesOneSided, pValuesTwoSided, notes = self.hypothesisTestAll([seq1], [seq2], [totalSeq1], [totalSeq2])
+		return pValuesOneSided[0], pValuesTwoSided[0], notes[0]
+		
+	def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
 		replicates = self.preferences['Replicates']
-
-		# create null distribution
-		if totalSeq1 != 0 and totalSeq2 != 0:
-			pooledN = totalSeq1 + totalSeq2
-			pooledP = float(seq1 + seq2) / pooledN
-
-			diff = []
-			for dummy in xrange(0, replicates):
-				c1 = binomial(totalSeq1, pooledP)
-				c2 = binomial(totalSeq2, pooledP)
-					
-				diff.append(float(c1) / totalSeq1 - float(c2) / totalSeq2) 
-
+		bAdaptive = self.preferences.get('Adaptive replicates', False)
+		seed = randomSeed(self.preferences)
+		
+		seq1 = np.asarray(seq1, dtype=float)
+		seq2 = np.asarray(seq2, dtype=float)
+		totalSeq1 = np.asarray(totalSeq1, dtype=float)
+		totalSeq2 = np.asarray(totalSeq2, dtype=float)
+		
+		bDegenerate = (totalSeq1 == 0) | (totalSeq2 == 0)
+		
+		# parent counts of degenerate features are replaced so replicates can be drawn for all features
+		n1 = np.where(bDegenerate, 1, totalSeq1)
+		n2 = np.where(bDegenerate, 1, totalSeq2)
+		pooledP = np.where(bDegenerate, 0, (seq1 + seq2) / (n1 + n2))
+		obsDiff = seq1 / n1 - seq2 / n2
+		
+		def countReplicates(indices, start, end):
+			# create null distribution with a random stream for each distinct contingency table. Drawing
+			# from a stream per table, rather than making a single 2-D draw for all features, makes results
+			# independent of how features are split into chunks and processes. Features with identical
+			# tables share a stream so replicates are only drawn once for each distinct table.
+			tables = [(float(seq1[i]), float(seq2[i]), float(totalSeq1[i]), float(totalSeq2[i])) for i in indices]
+			firstPositions, tableIndices = uniqueKeys(tables)
+			c1 = np.zeros((len(firstPositions), end - start))
+			c2 = np.zeros((len(firstPositions), end - start))
+			for row, pos in enumerate(firstPositions):
+				i = indices[pos]
+				rng = randomStream(seed, self.name, *(tables[pos] + (start,)))
+				c1[row] = rng.binomial(int(n1[i]), pooledP[i], end - start)
+				c2[row] = rng.binomial(int(n2[i]), pooledP[i], end - start)
+			c1 = c1[tableIndices]
+			c2 = c2[tableIndices]
+			diff = c1 / n1[indices, np.newaxis] - c2 / n2[indices, np.newaxis]
+			
 			# determine number of replicates w/ an effect size more extreme than the observed data
-			obsDiff = float(seq1) / totalSeq1 - float(seq2) / totalSeq2
-
-			leftCount = 0
-			rightCount = 0
-			twoSidedCount = 0
-			for value in diff:
-				if value <= obsDiff:
-					leftCount += 1
-				if value >= obsDiff:
-					rightCount += 1
-				if abs(value) >= abs(obsDiff):
-					twoSidedCount += 1
-				
-			oneSidedCount = leftCount
-			if rightCount < oneSidedCount:
-				oneSidedCount = rightCount
-			note = ''
-		else:
-			oneSidedCount = replicates
-			twoSidedCount = replicates
-			note = 'degenerate case: parent has a count of zero'
+			chunkObsDiff = obsDiff[indices, np.newaxis]
+			leftCount = (diff <= chunkObsDiff).sum(axis=1)
+			rightCount = (diff >= chunkObsDiff).sum(axis=1)
+			twoSidedCount = (np.abs(diff) >= np.abs(chunkObsDiff)).sum(axis=1)
+			
+			return [leftCount, rightCount, twoSidedCount]
+			
+		counts, replicatesUsed = tailCounts(len(seq1), 3, replicates, countReplicates, bAdaptive, self.alpha)
+		self.replicatesUsed = replicatesUsed.tolist()
+		
+		pValuesOneSided = np.minimum(counts[0], counts[1]) / replicatesUsed.astype(float)
+		pValuesTwoSided = counts[2] / replicatesUsed.astype(float)
+		pValuesOneSided[bDegenerate] = 1.0
+		pValuesTwoSided[bDegenerate] = 1.0
+		
+		notes = []
+		for degenerate in bDegenerate:
+			if degenerate:
+				notes.append('degenerate case: parent has a count of zero')
+			else:
+				notes.append('')
 
-		return float(oneSidedCount) / replicates, float(twoSidedCount) / replicates, ''
+		return pValuesOneSided, pValuesTwoSided, notes
  
 if __name__ == "__main__": 
 	bootstrap = Bootstrap()
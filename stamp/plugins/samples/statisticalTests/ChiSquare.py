@@ -23,6 +23,8 @@
 
 import math
 
+import numpy as np
+
 from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
 from stamp.metagenomics.stats.distributions.NormalDist import standardNormalCDF, zScore
 
@@ -36,6 +38,7 @@ class ChiSquare(AbstractSampleStatsTestPlugin):
   def __init__(self, preferences):
     AbstractSampleStatsTestPlugin.__init__(self, preferences)
     self.name = 'Chi-square test'
+    self.bSingleFeatureInterface = False
   
   def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
     # Contingency table:
@@ -66,6 +69,34 @@ class ChiSquare(AbstractSampleStatsTestPlugin):
   
     return float('inf'), pValueTwoSided, ''
   
+  def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
+    x1 = np.asarray(seq1, dtype=float)
+    x2 = np.asarray(seq2, dtype=float)
+    y1 = np.asarray(totalSeq1, dtype=float) - x1
+    y2 = np.asarray(totalSeq2, dtype=float) - x2
+    
+    bDegenerate = ((x1 == 0) & (x2 == 0)) | ((x1 == np.asarray(totalSeq1)) | (x2 == np.asarray(totalSeq2)))
+    
+    N = x1+x2+y1+y2
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+      E00 = ((x1+x2) * (x1+y1)) / N
+      E01 = ((x1+x2) * (x2+y2)) / N
+      E10 = ((y1+y2) * (x1+y1)) / N
+      E11 = ((y1+y2) * (x2+y2)) / N
+    
+      X2 = (np.abs(x1 - E00))**2 / E00
+      X2 += (np.abs(x2 - E01))**2 / E01
+      X2 += (np.abs(y1 - E10))**2 / E10
+      X2 += (np.abs(y2 - E11))**2 / E11
+    
+      # calculate p-values
+      pValuesTwoSided = np.where(bDegenerate, 1.0, 1.0 - chi2.cdf(X2,1))
+    
+    notes = ['degenerate case: suspect p-value' if degenerate else '' for degenerate in bDegenerate]
+  
+    return np.inf * np.ones(len(x1)), pValuesTwoSided, notes
+  
   def power(self, seq1, seq2, totalSeq1, totalSeq2, alpha): 
     # The chi-square test is equivalent to the difference between proportions
     # test as illustrated by Rivals et al., 2007. Here we use the standard
@@ -23,6 +23,8 @@
 
 import math
 
+import numpy as np
+
 from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
 from stamp.metagenomics.stats.distributions.NormalDist import standardNormalCDF, zScore
 
@@ -34,6 +36,7 @@ class DiffBetweenProp(AbstractSampleStatsTestPlugin):
 	def __init__(self, preferences):
 		AbstractSampleStatsTestPlugin.__init__(self, preferences)
 		self.name = 'Difference between proportions'
+		self.bSingleFeatureInterface = False
 	
 	def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
 		if (seq1 == 0 and seq2 == 0) or (seq1 == totalSeq1 and seq2 == totalSeq2):
@@ -57,6 +60,33 @@ class DiffBetweenProp(AbstractSampleStatsTestPlugin):
 		pValueTwoSided = 2*pValueOneSided
 	
 		return pValueOneSided, pValueTwoSided, note
+		
+	def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
+		seq1 = np.asarray(seq1, dtype=float)
+		seq2 = np.asarray(seq2, dtype=float)
+		totalSeq1 = np.asarray(totalSeq1, dtype=float)
+		totalSeq2 = np.asarray(totalSeq2, dtype=float)
+		
+		bDegenerate = ((seq1 == 0) & (seq2 == 0)) | ((seq1 == totalSeq1) & (seq2 == totalSeq2))
+		
+		with np.errstate(divide='ignore', invalid='ignore'):
+			R1 = seq1 / totalSeq1
+			R2 = seq2 / totalSeq2
+			diff = R1 - R2
+			P = (seq1 + seq2) / (totalSeq1 + totalSeq2)
+			Q = 1.0 - P
+		
+			D = np.where(bDegenerate, 0, diff / np.sqrt(P*Q*((1.0/totalSeq1) + (1.0/totalSeq2))))
+		
+		# calculate one-sided and two-sided p-values
+		ZScore = np.abs(D)
+		pValuesOneSided = standardNormalCDF(ZScore)
+		pValuesOneSided = np.where(pValuesOneSided > 0.5, 1.0 - pValuesOneSided, pValuesOneSided)
+		pValuesTwoSided = 2*pValuesOneSided
+		
+		notes = ['degenerate case: suspect p-value' if degenerate else '' for degenerate in bDegenerate]
+	
+		return pValuesOneSided, pValuesTwoSided, notes
 	
 	def power(self, seq1, seq2, totalSeq1, totalSeq2, alpha): 
 		oneMinusAlpha = 1.0 - alpha
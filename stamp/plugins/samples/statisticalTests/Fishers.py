@@ -27,7 +27,10 @@
 
 import math
 
+import numpy as np
+
 from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
+from stamp.metagenomics.stats.distributions.HypergeometricDist import logFactorialTable, chunkFeatures, tableSupport, logPMF
 
 from scipy import special
 
@@ -39,6 +42,7 @@ class Fishers(AbstractSampleStatsTestPlugin):
 	def __init__(self, preferences):
 		AbstractSampleStatsTestPlugin.__init__(self, preferences)
 		self.name = 'Fisher\'s exact test'
+		self.bSingleFeatureInterface = False
 		
 	def logChoose(self, n, k):
 		lgn1 = special.gammaln(n+1)
@@ -102,6 +106,57 @@ class Fishers(AbstractSampleStatsTestPlugin):
 			pValueOneSided = pValueRight
 
 		return pValueOneSided, pValueTwoSided, ''
+	
+	def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
+		'''
+		Perform Fisher's exact test on all features. Tables of all features are evaluated together
+		using a single table of log factorials.
+		'''
+		seq1 = np.asarray(seq1, dtype=float)
+		
+		a = np.floor(seq1 + 0.5).astype(int)
+		b = np.floor(np.asarray(seq2, dtype=float) + 0.5).astype(int)
+		c = np.floor(np.asarray(totalSeq1, dtype=float) - seq1 + 0.5).astype(int)
+		d = np.floor(np.asarray(totalSeq2, dtype=float) - np.asarray(seq2, dtype=float) + 0.5).astype(int)
+		
+		r1 = a+b
+		r2 = c+d
+		c1 = a+c
+		c2 = b+d
+		
+		pValuesOneSided = np.zeros(len(a))
+		pValuesTwoSided = np.zeros(len(a))
+		if len(a) == 0:
+			return pValuesOneSided, pValuesTwoSided, []
+		
+		logFactorial = logFactorialTable((r1+r2).max())
+		
+		# tables with the same margins as the observed table
+		lower = np.maximum(0, r1 - c2)
+		upper = np.minimum(r1, c1)
+		
+		logCutoff = logPMF(logFactorial, a, r1, r2, c1, c2)
+		
+		for start, end in chunkFeatures((upper - lower + 1).tolist()):
+			feature, tableA = tableSupport(lower[start:end], upper[start:end])
+			feature += start
+			
+			logP = logPMF(logFactorial, tableA, r1[feature], r2[feature], c1[feature], c2[feature])
+			p = np.exp(logP)
+			
+			# minimum-likelihood two-sided p-value (tables with probabilities equal to the observed table
+			# to within rounding error are considered as extreme as the observed table)
+			bExtreme = logP <= logCutoff[feature] + 1e-7
+			pValueTwoSided = np.bincount(feature - start, weights=p*bExtreme, minlength=end-start)
+			
+			pValueRight = np.bincount(feature - start, weights=p*(tableA >= seq1[feature]), minlength=end-start)
+			pValueLeft = np.bincount(feature - start, weights=p*(tableA <= seq1[feature]), minlength=end-start)
+			
+			# p-values may slightly exceed 1 due to rounding error accumulated over the summation
+			pValuesOneSided[start:end] = np.minimum(np.minimum(pValueLeft, pValueRight), 1.0)
+			pValuesTwoSided[start:end] = np.minimum(pValueTwoSided, 1.0)
+		
+		return pValuesOneSided, pValuesTwoSided, [''] * len(a)
 
 if __name__ == "__main__": 
 	fishers = Fishers()
@@ -23,6 +23,8 @@
 
 import math
 
+import numpy as np
+
 from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
 
 from scipy.stats import chi2
@@ -35,6 +37,7 @@ class GTestYates(AbstractSampleStatsTestPlugin):
 	def __init__(self, preferences):
 		AbstractSampleStatsTestPlugin.__init__(self, preferences)
 		self.name = 'G-test (w/ Yates\')'
+		self.bSingleFeatureInterface = False
 
 	def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
 		# Contingency table:
@@ -90,6 +93,41 @@ class GTestYates(AbstractSampleStatsTestPlugin):
 			note = 'degenerate case: all values are zero'
 
 		return float('inf'), pValueTwoSided, note
+		
+	def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
+		x1 = np.asarray(seq1, dtype=float)
+		x2 = np.asarray(seq2, dtype=float)
+		y1 = np.asarray(totalSeq1, dtype=float) - x1
+		y2 = np.asarray(totalSeq2, dtype=float) - x2
+
+		# perform Yates' correction
+		correction = np.where(x1*y2 - x2*y1 > 0, 0.5, -0.5)
+		x1 = x1 - correction
+		y2 = y2 - correction
+		x2 = x2 + correction
+		y1 = y1 + correction
+
+		# calculate g-test statistic
+		N = x1+x2+y1+y2
+		
+		with np.errstate(divide='ignore', invalid='ignore'):
+			E00 = ((x1+x2) * (x1+y1)) / N
+			E01 = ((x1+x2) * (x2+y2)) / N
+			E10 = ((y1+y2) * (x1+y1)) / N
+			E11 = ((y1+y2) * (x2+y2)) / N
+			
+			gTest = np.where((x1 > 0) & (E00 > 0), x1 * np.log(x1/E00), 0)
+			gTest += np.where((x2 > 0) & (E01 > 0), x2 * np.log(x2/E01), 0)
+			gTest += np.where((y1 > 0) & (E10 > 0), y1 * np.log(y1/E10), 0)
+			gTest += np.where((y2 > 0) & (E11 > 0), y2 * np.log(y2/E11), 0)
+			gTest = 2*gTest
+			
+			# calculate p-values
+			pValuesTwoSided = np.where(N > 0, 1.0 - chi2.cdf(gTest,1), 1.0)
+			
+		notes = ['' if n > 0 else 'degenerate case: all values are zero' for n in N]
+
+		return np.inf * np.ones(len(x1)), pValuesTwoSided, notes
 
 if __name__ == "__main__": 
 	gTest = GTestYates()
@@ -25,11 +25,10 @@
 # along with STAMP.	If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
-import math
+import numpy as np
 
 from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
-
-from scipy import special
+from stamp.metagenomics.stats.distributions.HypergeometricDist import logFactorialTable, chunkFeatures, tableSupport, logPMF
 
 class Hypergeometric(AbstractSampleStatsTestPlugin):
 	'''
@@ -39,55 +38,67 @@ class Hypergeometric(AbstractSampleStatsTestPlugin):
 	def __init__(self, preferences):
 		AbstractSampleStatsTestPlugin.__init__(self, preferences)
 		self.name = 'Hypergeometric'
+		self.bSingleFeatureInterface = False
+			
+	def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
+		pValuesOneSided, pValuesTwoSided, notes = self.hypothesisTestAll([seq1], [seq2], [totalSeq1], [totalSeq2])
+		return pValuesOneSided[0], pValuesTwoSided[0], notes[0]
 		
-	def logChoose(self, n, k):
-		lgn1 = special.gammaln(n+1)
-		lgk1 = special.gammaln(k+1)
-		lgnk1 = special.gammaln(n-k+1)
+	def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
+		'''
+		Perform hypergeometric test on all features. The probabilities of all tables with the same margins
+		as the observed table are calculated from a single table of log factorials.
+		'''
+		seq1 = np.asarray(seq1, dtype=float)
+		seq2 = np.asarray(seq2, dtype=float)
 		
-		return lgn1 - (lgnk1 + lgk1)
-	
-	def hypergeometricPDF(self, a,b,c,d):
-		return math.exp(self.logChoose(a+b,a) +
-											self.logChoose(c+d,c) -
-											self.logChoose(a+b+c+d,a+c))
-	
-	def hypergeometricCDF(self, a,b,c,d):
-		cdf = 0
-		for i in xrange(0, int(a)+1):
-			cdf += self.hypergeometricPDF(i,b+(a-i),c+(a-i),d-(a-i))
-			
-		if cdf > 1.0:
-			# this is possible due to rounding error accumulated over the summation
-			cdf = 1.0
+		a = np.floor(seq1 + 0.5).astype(int)
+		b = np.floor(seq2 + 0.5).astype(int)
+		c = np.floor(np.asarray(totalSeq1, dtype=float) - seq1 + 0.5).astype(int)
+		d = np.floor(np.asarray(totalSeq2, dtype=float) - seq2 + 0.5).astype(int)
+		
+		r1 = a+b
+		r2 = c+d
+		c1 = a+c
+		c2 = b+d
+		
+		pValuesOneSided = np.zeros(len(a))
+		pValuesTwoSided = np.zeros(len(a))
+		if len(a) == 0:
+			return pValuesOneSided, pValuesTwoSided, []
+		
+		logFactorial = logFactorialTable((r1+r2).max())
+		
+		# tables with the same margins as the observed table
+		lower = np.maximum(0, r1 - c2)
+		upper = np.minimum(r1, c1)
+		
+		for start, end in chunkFeatures((upper - lower + 1).tolist()):
+			feature, tableA = tableSupport(lower[start:end], upper[start:end])
+			feature += start
 			
-		return cdf
+			# probabilities are scaled by the most probable table of each feature so they
+			# can be summed without underflow and then normalized
+			logP = logPMF(logFactorial, tableA, r1[feature], r2[feature], c1[feature], c2[feature])
+			maxLogP = np.empty(end-start)
+			maxLogP.fill(-np.inf)
+			np.maximum.at(maxLogP, feature - start, logP)
+			p = np.exp(logP - maxLogP[feature - start])
 			
-	def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
-		a = seq1
-		b = seq2
-		c = totalSeq1 - seq1
-		d = totalSeq2 - seq2
-
-		if seq1 > seq2:
-			pValueLeft = self.hypergeometricCDF(a,b,c,d)
-		else:
-			pValueLeft = self.hypergeometricCDF(b,a,d,c)
+			total = np.bincount(feature - start, weights=p, minlength=end-start)
+			pValueLeft = np.bincount(feature - start, weights=p*(tableA <= a[feature]), minlength=end-start) / total
+			pValueRight = np.bincount(feature - start, weights=p*(tableA >= a[feature]), minlength=end-start) / total
 			
-		pValueRight = (1.0 - pValueLeft) + self.hypergeometricPDF(a,b,c,d)
+			# doubling approach to calculating two-sided p-value
+			pValuesOneSided[start:end] = np.minimum(np.minimum(pValueLeft, pValueRight), 1.0)
+			pValuesTwoSided[start:end] = np.minimum(2 * pValuesOneSided[start:end], 1.0)
 		
-		pValueTwoSided = 2 * min(pValueLeft, pValueRight)
-					
-		pValueOneSided = pValueLeft
-		if pValueOneSided > pValueRight:
-			pValueOneSided = pValueRight
-
-		return pValueOneSided, pValueTwoSided, ''
+		return pValuesOneSided, pValuesTwoSided, [''] * len(a)
 
 if __name__ == "__main__": 
 	preferences = {}
 	hypergeometric = Hypergeometric(preferences)
-	pValueOneSided, pValueTwoSided = hypergeometric.hypothesisTest(10, 30, 100, 700)
+	pValueOneSided, pValueTwoSided, note = hypergeometric.hypothesisTest(10, 30, 100, 700)
 	print pValueOneSided
 	print pValueTwoSided
 	
@@ -98,7 +109,7 @@ if __name__ == "__main__":
 		print a
 		start = time.time()
 		for i in xrange(0, 10):
-			pValueOne, pValueTwo = hypergeometric.hypothesisTest(a/10, a/10, 1000000, 1000000)
+			pValueOne, pValueTwo, note = hypergeometric.hypothesisTest(a/10, a/10, 1000000, 1000000)
 		elapsed = (time.time() - start) / 10
 		fout.write(str(a) + ',' + str(elapsed) + '\n')
 		print elapsed
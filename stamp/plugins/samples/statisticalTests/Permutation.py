@@ -21,9 +21,11 @@
 # along with STAMP.  If not, see <http://www.gnu.org/licenses/>.
 #=======================================================================
 
-from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
+import numpy as np
 
-from numpy.random import hypergeometric
+from stamp.plugins.samples.AbstractSampleStatsTestPlugin import AbstractSampleStatsTestPlugin
+from stamp.metagenomics.stats.MonteCarlo import tailCounts
+from stamp.metagenomics.stats.RandomStreams import randomSeed, randomStream, uniqueKeys
 
 class Permutation(AbstractSampleStatsTestPlugin):
 	'''
@@ -33,47 +35,71 @@ class Permutation(AbstractSampleStatsTestPlugin):
 	def __init__(self, preferences):
 		AbstractSampleStatsTestPlugin.__init__(self, preferences)
 		self.name = 'Permutation'
+		self.bSingleFeatureInterface = False
 
 	def hypothesisTest(self, seq1, seq2, totalSeq1, totalSeq2):
+		pValuesOneSided, pValuesTwoSided, notes = self.hypothesisTestAll([seq1], [seq2], [totalSeq1], [totalSeq2])
+		return pValuesOneSided[0], pValuesTwoSided[0], notes[0]
+		
+	def hypothesisTestAll(self, seq1, seq2, totalSeq1, totalSeq2):
 		replicates = self.preferences['Replicates']
-
-		if totalSeq1 != 0 and totalSeq2 != 0:
-			# observed difference
-			obsDiff = float(seq1) / totalSeq1 - float(seq2) / totalSeq2
-
-			# randomly permute assignment of sequences
-			permutationDiffs = []
-			posSeq = seq1+seq2
-			negSeq = totalSeq1+totalSeq2-posSeq
-			for dummy in xrange(0, replicates):
-				c1 = hypergeometric(posSeq, negSeq, totalSeq1)         
-				c2 = posSeq - c1 
-					
-				permutationDiffs.append(float(c1) / totalSeq1 - float(c2) / totalSeq2) 
-				  
+		bAdaptive = self.preferences.get('Adaptive replicates', False)
+		seed = randomSeed(self.preferences)
+		
+		seq1 = np.asarray(seq1, dtype=float)
+		seq2 = np.asarray(seq2, dtype=float)
+		totalSeq1 = np.asarray(totalSeq1, dtype=float)
+		totalSeq2 = np.asarray(totalSeq2, dtype=float)
+		
+		bDegenerate = (totalSeq1 == 0) | (totalSeq2 == 0)
+		
+		# parent counts of degenerate features are replaced so replicates can be drawn for all features
+		n1 = np.where(bDegenerate, 1, totalSeq1)
+		n2 = np.where(bDegenerate, 1, totalSeq2)
+		posSeq = np.where(bDegenerate, 0, seq1 + seq2)
+		negSeq = n1 + n2 - posSeq
+		
+		# observed difference
+		obsDiff = seq1 / n1 - seq2 / n2
+		
+		def countReplicates(indices, start, end):
+			# randomly permute assignment of sequences with a random stream for each distinct contingency
+			# table so results do not depend on how features are split into chunks (see Bootstrap)
+			tables = [(float(seq1[i]), float(seq2[i]), float(totalSeq1[i]), float(totalSeq2[i])) for i in indices]
+			firstPositions, tableIndices = uniqueKeys(tables)
+			c1 = np.zeros((len(firstPositions), end - start))
+			for row, pos in enumerate(firstPositions):
+				i = indices[pos]
+				rng = randomStream(seed, self.name, *(tables[pos] + (start,)))
+				c1[row] = rng.hypergeometric(int(posSeq[i]), int(negSeq[i]), int(n1[i]), end - start)
+			c1 = c1[tableIndices]
+			c2 = posSeq[indices, np.newaxis] - c1
+			permutationDiffs = c1 / n1[indices, np.newaxis] - c2 / n2[indices, np.newaxis]
+			
 			# find p-value of permutation test (number of replicates with a value lower/greater than the observed value)
-			leftCount = 0
-			rightCount = 0
-			twoSidedCount = 0
-			for value in permutationDiffs:
-				if value <= obsDiff:
-					leftCount += 1
-				if value >= obsDiff:
-					rightCount += 1
-				if abs(value) >= abs(obsDiff):
-					twoSidedCount += 1
-				
-			oneSidedCount = leftCount
-			if rightCount < oneSidedCount:
-				oneSidedCount = rightCount
+			chunkObsDiff = obsDiff[indices, np.newaxis]
+			leftCount = (permutationDiffs <= chunkObsDiff).sum(axis=1)
+			rightCount = (permutationDiffs >= chunkObsDiff).sum(axis=1)
+			twoSidedCount = (np.abs(permutationDiffs) >= np.abs(chunkObsDiff)).sum(axis=1)
+			
+			return [leftCount, rightCount, twoSidedCount]
 			
-			note = ''
-		else:
-			oneSidedCount = replicates
-			twoSidedCount = replicates
-			note = 'degenerate case: parent has a count of zero'
+		counts, replicatesUsed = tailCounts(len(seq1), 3, replicates, countReplicates, bAdaptive, self.alpha)
+		self.replicatesUsed = replicatesUsed.tolist()
+		
+		pValuesOneSided = np.minimum(counts[0], counts[1]) / replicatesUsed.astype(float)
+		pValuesTwoSided = counts[2] / replicatesUsed.astype(float)
+		pValuesOneSided[bDegenerate] = 1.0
+		pValuesTwoSided[bDegenerate] = 1.0
+		
+		notes = []
+		for degenerate in bDegenerate:
+			if degenerate:
+				notes.append('degenerate case: parent has a count of zero')
+			else:
+				notes.append('')
 
-		return float(oneSidedCount) / replicates, float(twoSidedCount) / replicates, note
+		return pValuesOneSided, pValuesTwoSided, notes
   
  
 if __name__ == "__main__": 